@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compares the vectorized EAST decoder against the former per-cell loop.
+
+Usage:
+  python -m benchmarks.decode_predictions [--repeat N] [--density D]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from mocr import TextRecognizer
+
+
+def loop_decode_predictions(scores, geometry, min_confidence):
+    """Reference implementation of the decoder before vectorization."""
+
+    (num_rows, num_cols) = scores.shape[2:4]
+    rects = []
+    confidences = []
+    for y in range(0, num_rows):
+        scores_data = scores[0, 0, y]
+        xdata0 = geometry[0, 0, y]
+        xdata1 = geometry[0, 1, y]
+        xdata2 = geometry[0, 2, y]
+        xdata3 = geometry[0, 3, y]
+        angles_data = geometry[0, 4, y]
+        for x in range(0, num_cols):
+            if scores_data[x] < min_confidence:
+                continue
+            (offset_x, offset_y) = (x * 4.0, y * 4.0)
+            angle = angles_data[x]
+            cos = np.cos(angle)
+            sin = np.sin(angle)
+            h = xdata0[x] + xdata2[x]
+            w = xdata1[x] + xdata3[x]
+            end_x = int(offset_x + (cos * xdata1[x]) + (sin * xdata2[x]))
+            end_y = int(offset_y - (sin * xdata1[x]) + (cos * xdata2[x]))
+            start_x = int(end_x - w)
+            start_y = int(end_y - h)
+            rects.append((start_x, start_y, end_x, end_y))
+            confidences.append(scores_data[x])
+    return (rects, confidences)
+
+
+def synthetic_outputs(size, density, seed=0):
+    """Creates EAST shaped score and geometry volumes for a square input."""
+
+    random = np.random.RandomState(seed)
+    cells = size // 4
+    scores = (random.rand(1, 1, cells, cells) < density).astype(np.float32)
+    scores *= random.uniform(0.5, 1.0, scores.shape).astype(np.float32)
+    distances = random.rand(1, 4, cells, cells).astype(np.float32) * 40.0
+    angles = (random.rand(1, 1, cells, cells).astype(np.float32) - 0.5) * 0.5
+    return (scores, np.concatenate([distances, angles], axis=1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--density", type=float, default=0.2, help="Fraction of text cells."
+    )
+    args = parser.parse_args()
+
+    text_recognizer = TextRecognizer(None, None)
+    print(
+        "{:>6} {:>8} {:>10} {:>12} {:>8}".format(
+            "size", "cells", "loop ms", "vector ms", "speedup"
+        )
+    )
+    for size in (320, 640, 1280):
+        (scores, geometry) = synthetic_outputs(size, args.density)
+        loop = min(
+            timeit.repeat(
+                lambda: loop_decode_predictions(
+                    scores, geometry, text_recognizer.min_confidence
+                ),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        vector = min(
+            timeit.repeat(
+                lambda: text_recognizer.decode_predictions(scores, geometry),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        (rects, _) = text_recognizer.decode_predictions(scores, geometry)
+        print(
+            "{:>6} {:>8} {:>10.2f} {:>12.2f} {:>7.1f}x".format(
+                size, len(rects), loop * 1000.0, vector * 1000.0, loop / vector
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compares the EAST detector backends on the CPU.
+
+Every backend runs the forward pass on the sample cards at several input
+sizes, its decoded boxes are matched against the default cv2.dnn backend
+and the run fails when a backend finds less than --agreement of the same
+boxes. The ONNX model is an export of the same graph, e.g.
+python -m tf2onnx.convert --graphdef frozen_east_text_detection.pb
+--inputs input_images:0 --outputs feature_fusion/Conv_7/Sigmoid:0,feature_fusion/concat_3:0
+--output east.onnx
+
+Usage:
+  python -m benchmarks.detector_backends --east frozen_east_text_detection.pb --onnx east.onnx
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import tempfile
+import time
+import cv2
+import numpy as np
+
+from mocr import TextRecognizer, detector_backends
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "data")
+SAMPLE_CARDS = ("sample_uk_identity_card.png", "sample_de_identity_card.jpg")
+
+
+def agreement(reference, boxes, min_iou: float = 0.5) -> float:
+    """Returns the share of boxes of both sets with a counterpart of at least
+    min_iou intersection over union in the other set."""
+
+    if len(reference) == 0 and len(boxes) == 0:
+        return 1.0
+    if len(reference) == 0 or len(boxes) == 0:
+        return 0.0
+    reference = np.asarray(reference, dtype=np.float64)[:, None, :]
+    boxes = np.asarray(boxes, dtype=np.float64)[None, :, :]
+    width = np.minimum(reference[..., 2], boxes[..., 2]) - np.maximum(
+        reference[..., 0], boxes[..., 0]
+    )
+    height = np.minimum(reference[..., 3], boxes[..., 3]) - np.maximum(
+        reference[..., 1], boxes[..., 1]
+    )
+    intersection = np.maximum(0, width) * np.maximum(0, height)
+    area = lambda box: (box[..., 2] - box[..., 0]) * (box[..., 3] - box[..., 1])
+    iou = intersection / np.maximum(1e-9, area(reference) + area(boxes) - intersection)
+    matched = (iou.max(axis=1) >= min_iou).sum() + (iou.max(axis=0) >= min_iou).sum()
+    return matched / float(iou.shape[0] + iou.shape[1])
+
+
+def run(backend, model_path, image, size, repeat):
+    """Returns the boxes of one card and the forward pass timings."""
+
+    text_recognizer = TextRecognizer(
+        None, model_path, width=size, height=size, backend=backend
+    )
+    (resized_image, _, _, _, _) = text_recognizer.resize_image(image, size, size)
+    timings = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        (scores, geometry) = text_recognizer.geometry_score(model_path, resized_image)
+        if scores is None:
+            raise cv2.error("{} did not run the model".format(backend.key))
+        timings.append(time.perf_counter() - started)
+    # the first pass loads the model
+    return (text_recognizer.boxes(scores, geometry), timings[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--east", type=str, required=True, help="Frozen EAST graph.")
+    parser.add_argument("--onnx", type=str, help="EAST exported to ONNX.")
+    parser.add_argument(
+        "--int8", type=str, help="Quantized ONNX model, created from --onnx if missing."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[320, 640])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, help="ONNX Runtime intra-op threads.")
+    parser.add_argument(
+        "--agreement",
+        type=float,
+        default=0.9,
+        help="Minimum share of boxes matching the reference backend.",
+    )
+    args = parser.parse_args()
+    for path in (args.east, args.onnx):
+        if path is not None and not os.path.isfile(path):
+            parser.error("no model at {}".format(path))
+
+    backends = [
+        ("cv2.dnn default", detector_backends.OpenCVBackend("default"), args.east),
+        ("cv2.dnn opencv", detector_backends.OpenCVBackend("opencv"), args.east),
+        ("cv2.dnn openvino", detector_backends.OpenCVBackend("openvino"), args.east),
+    ]
+    if args.onnx:
+        onnx_backend = detector_backends.ONNXRuntimeBackend(args.threads)
+        backends.append(("onnxruntime", onnx_backend, args.onnx))
+        int8_path = args.int8
+        if int8_path is None or not os.path.isfile(int8_path):
+            int8_path = int8_path or os.path.join(tempfile.mkdtemp(), "east.int8.onnx")
+            detector_backends.quantize(args.onnx, int8_path)
+        backends.append(("onnxruntime int8", onnx_backend, int8_path))
+
+    failures = 0
+    for name in SAMPLE_CARDS:
+        image = cv2.imread(os.path.join(DATA_DIRECTORY, name))
+        for size in args.sizes:
+            reference = None
+            for (label, backend, model_path) in backends:
+                try:
+                    (boxes, timings) = run(
+                        backend, model_path, image, size, args.repeat
+                    )
+                except cv2.error as error:
+                    # e.g. openvino on an OpenCV build without the inference engine
+                    print(
+                        "{:<18} unavailable: {}".format(label, str(error).strip()[:60])
+                    )
+                    continue
+                if reference is None:
+                    reference = boxes
+                share = agreement(reference, boxes)
+                flag = ""
+                if share < args.agreement:
+                    flag = "  DISAGREES"
+                    failures += 1
+                print(
+                    "{:<18} {:<30} {:>5} {:>10.3f} ms {:>5} boxes {:>6.1%}{}".format(
+                        label,
+                        name,
+                        size,
+                        statistics.median(timings) * 1000.0,
+                        len(boxes),
+                        share,
+                        flag,
+                    )
+                )
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Compares the face detector backends on the sample cards.
+
+Every backend runs on the sample cards at several scales. The benchmark
+reports the median latency, the detection rate and the false positives.
+A card counts as detected when exactly one face overlaps its portrait.
+The bundled haar and LBP cascades always run. The DNN backends run when
+their model is given, the models come from the OpenCV model zoo.
+
+Usage:
+  python -m benchmarks.face_backends
+  python -m benchmarks.face_backends --yunet face_detection_yunet_2023mar.onnx
+"""
+
+import os
+import argparse
+import statistics
+import time
+import cv2
+
+from mocr import face_backends, face_detection, nms
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "data")
+# portraits of the sample cards in image coordinates
+SAMPLE_CARDS = {
+    "sample_uk_identity_card.png": (16, 97, 80, 80),
+    "sample_de_identity_card.jpg": (78, 221, 284, 284),
+}
+
+
+def run(backend, cases, repeat):
+    """Returns the median latency, the detected cards and the false positives."""
+
+    timings = []
+    (detected, false_positives) = (0, 0)
+    for (image, portrait) in cases:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            faces = face_detection.detect_faces(image, backend=backend)
+            timings.append(time.perf_counter() - started)
+        matches = [face for face in faces if nms.iou(face, portrait, xywh=True) >= 0.3]
+        detected += len(faces) == 1 and len(matches) == 1
+        false_positives += len(faces) - len(matches)
+    return (statistics.median(timings), detected, false_positives)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--lbp", type=str, help="LBP cascade instead of the bundled one."
+    )
+    parser.add_argument("--yunet", type=str, help="YuNet ONNX model.")
+    parser.add_argument("--ssd-model", type=str, help="res10 SSD caffemodel.")
+    parser.add_argument("--ssd-config", type=str, help="res10 SSD deploy.prototxt.")
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.5, 1.0, 2.0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = [
+        ("haar", face_backends.get_backend("haar")),
+        ("haar 1.3", face_backends.get_backend("haar", scale_factor=1.3)),
+        ("lbp", face_backends.get_backend("lbp", args.lbp)),
+    ]
+    if args.yunet:
+        backends.append(("yunet", face_backends.get_backend("yunet", args.yunet)))
+    if args.ssd_model:
+        backends.append(
+            (
+                "ssd",
+                face_backends.get_backend("ssd", args.ssd_model, args.ssd_config),
+            )
+        )
+
+    cases = []
+    for (name, portrait) in SAMPLE_CARDS.items():
+        image = cv2.imread(os.path.join(DATA_DIRECTORY, name))
+        for scale in args.scales:
+            cases.append(
+                (
+                    cv2.resize(image, None, fx=scale, fy=scale),
+                    tuple(int(round(value * scale)) for value in portrait),
+                )
+            )
+
+    print(
+        "{:<10} {:>12} {:>10} {:>16}".format(
+            "backend", "median", "detected", "false positives"
+        )
+    )
+    for (label, backend) in backends:
+        (median, detected, false_positives) = run(backend, cases, args.repeat)
+        print(
+            "{:<10} {:>9.3f} ms {:>5}/{:<4} {:>16}".format(
+                label, median * 1000.0, detected, len(cases), false_positives
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
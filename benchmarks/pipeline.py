@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Times every stage of the text recognition and face detection pipelines.
+
+Stages are measured on synthetic cards with varying text density at several
+EAST input sizes and on the sample cards in tests/data. Results are written
+as JSON so two runs (e.g. two releases) can be compared with --compare.
+
+Usage:
+  python -m benchmarks.pipeline --east tests/model/frozen_east_text_detection.pb --output bench.json
+  python -m benchmarks.pipeline --east ... --compare previous.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import cv2
+import numpy as np
+
+import mocr
+
+from mocr import TextRecognizer, face_detection, model_cache, tesseract_engine
+from benchmarks.decode_predictions import synthetic_outputs
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "data")
+SAMPLE_CARDS = ("sample_uk_identity_card.png", "sample_de_identity_card.jpg")
+WORDS = ("SURNAME", "GIVEN", "NAMES", "NATIONALITY", "01.01.1990", "LONDON", "M", "F")
+
+
+def synthetic_card(lines: int, seed: int = 0, size=(630, 1000)) -> np.ndarray:
+    """Returns a card sized image with the given number of printed text lines."""
+
+    generator = random.Random(seed)
+    (height, width) = size
+    card = np.full((height, width, 3), 235, np.uint8)
+    cv2.rectangle(card, (40, 120), (300, 460), (180, 170, 160), -1)
+    line_height = max(1, (height - 80) // max(lines, 1))
+    for line in range(lines):
+        text = " ".join(generator.choice(WORDS) for _ in range(generator.randint(1, 4)))
+        scale = min(1.2, line_height / 40.0)
+        cv2.putText(
+            card,
+            text,
+            (340, 60 + line * line_height),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            scale,
+            (20, 20, 20),
+            2,
+        )
+    return card
+
+
+def measure(function, repeat: int):
+    """Returns the result of the last call and the seconds of every call."""
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return (result, timings)
+
+
+def summary(stage: str, case: str, size: int, timings, count: int = 1) -> dict:
+    """Returns a JSON record for the timings of one stage, per item when count > 1."""
+
+    per_item = [timing / max(count, 1) for timing in timings]
+    return {
+        "stage": stage,
+        "case": case,
+        "size": size,
+        "count": count,
+        "min_ms": round(min(per_item) * 1000.0, 4),
+        "median_ms": round(statistics.median(per_item) * 1000.0, 4),
+        "mean_ms": round(statistics.mean(per_item) * 1000.0, 4),
+        "repeat": len(per_item),
+    }
+
+
+def run_text_stages(image_path, image, case, sizes, east_path, repeat, ocr):
+    records = []
+    has_model = east_path is not None and os.path.isfile(east_path)
+    text_recognizer = TextRecognizer(
+        image if image_path is None else image_path, east_path
+    )
+
+    (loaded, load_timings) = measure(text_recognizer.load_image, repeat)
+    records.append(summary("load_image", case, 0, load_timings))
+    (image, _, _) = loaded
+
+    if has_model:
+        (_, model_timings) = measure(lambda: cv2.dnn.readNet(east_path), 1)
+        records.append(summary("model_load", case, 0, model_timings))
+        model_cache.preload(east_path)
+
+    for size in sizes:
+        (resized, resize_timings) = measure(
+            lambda: text_recognizer.resize_image(image, size, size), repeat
+        )
+        records.append(summary("resize_image", case, size, resize_timings))
+        (resized_image, ratio_height, ratio_width, _, _) = resized
+
+        if has_model:
+            ((scores, geometry), forward_timings) = measure(
+                lambda: text_recognizer.geometry_score(east_path, resized_image), repeat
+            )
+            records.append(summary("forward", case, size, forward_timings))
+        else:
+            (scores, geometry) = synthetic_outputs(size, 0.05)
+
+        (decoded, decode_timings) = measure(
+            lambda: text_recognizer.decode_predictions(scores, geometry), repeat
+        )
+        records.append(summary("decode_predictions", case, size, decode_timings))
+        records[-1]["candidates"] = len(decoded[0])
+
+        (boxes, boxes_timings) = measure(
+            lambda: text_recognizer.boxes(scores, geometry), repeat
+        )
+        # boxes decodes as well, report the non-maxima suppression on its own
+        nms_timings = [
+            max(0.0, total - decode)
+            for (total, decode) in zip(boxes_timings, decode_timings)
+        ]
+        records.append(summary("nms", case, size, nms_timings))
+        records[-1]["kept"] = len(boxes)
+
+        if ocr and has_model and len(boxes):
+            (_, ocr_timings) = measure(
+                lambda: text_recognizer.get_results(
+                    boxes, image, ratio_height, ratio_width
+                ),
+                1,
+            )
+            records.append(
+                summary("get_results_per_roi", case, size, ocr_timings, len(boxes))
+            )
+    return records
+
+
+def run_face_stages(image, case, repeat):
+    records = []
+    (_, timings) = measure(lambda: face_detection.detect_face(image), repeat)
+    records.append(summary("detect_face", case, 0, timings))
+    (_, timings) = measure(
+        lambda: face_detection.detect_face(image, max_side=640), repeat
+    )
+    records.append(summary("detect_face_max_side_640", case, 0, timings))
+    return records
+
+
+def compare(current: dict, previous: dict, threshold: float):
+    """Prints the median change of every stage present in both runs."""
+
+    def key(record):
+        return (record["stage"], record["case"], record["size"])
+
+    previous_records = {key(record): record for record in previous["results"]}
+    regressions = 0
+    for record in current["results"]:
+        before = previous_records.get(key(record))
+        if before is None or before["median_ms"] == 0:
+            continue
+        ratio = record["median_ms"] / before["median_ms"]
+        flag = ""
+        if ratio > 1.0 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            "{:<28} {:<22} {:>5} {:>10.3f} -> {:>10.3f} ms {:>6.2f}x{}".format(
+                record["stage"],
+                record["case"],
+                record["size"],
+                before["median_ms"],
+                record["median_ms"],
+                ratio,
+                flag,
+            )
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--east",
+        type=str,
+        help="Path to EAST text detector, forward pass and OCR are skipped without it.",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[320, 640, 960, 1280])
+    parser.add_argument(
+        "--densities",
+        type=int,
+        nargs="+",
+        default=[2, 8, 16],
+        help="Text lines on synthetic cards.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-ocr", action="store_true", help="Skip get_results.")
+    parser.add_argument("--output", type=str, help="Write JSON results to this path.")
+    parser.add_argument(
+        "--compare", type=str, help="Previous JSON results to compare with."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as regression.",
+    )
+    args = parser.parse_args()
+
+    ocr = not args.no_ocr
+    if ocr:
+        try:
+            tesseract_engine.get_engine().image_to_string(
+                np.full((32, 64, 3), 255, np.uint8)
+            )
+        except Exception:
+            print("tesseract is not available, skipping get_results", file=sys.stderr)
+            ocr = False
+
+    records = []
+    for lines in args.densities:
+        card = synthetic_card(lines, seed=lines)
+        case = "synthetic_{}_lines".format(lines)
+        records.extend(
+            run_text_stages(None, card, case, args.sizes, args.east, args.repeat, ocr)
+        )
+        records.extend(run_face_stages(card, case, args.repeat))
+    for name in SAMPLE_CARDS:
+        path = os.path.join(DATA_DIRECTORY, name)
+        records.extend(
+            run_text_stages(path, None, name, args.sizes, args.east, args.repeat, ocr)
+        )
+        records.extend(run_face_stages(path, name, args.repeat))
+
+    result = {
+        "meta": {
+            "mocr": mocr.__version__,
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "east": os.path.basename(args.east) if args.east else None,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": records,
+    }
+
+    for record in records:
+        print(
+            "{:<28} {:<30} {:>5} {:>10.3f} ms".format(
+                record["stage"], record["case"], record["size"], record["median_ms"]
+            )
+        )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(result, output, indent=2)
+    if args.compare:
+        with open(args.compare) as previous:
+            regressions = compare(result, json.load(previous), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,5 +14,53 @@ __url__ = "https://github.com/verifid/mocr"
 __download_url__ = "https://pypi.org/project/mocr/"
 __description__ = "Meaningful Optical Character Recognition from identity cards with Deep Learning."
 
-from .text_recognition import TextRecognizer
-from mocr import face_detection
+import importlib
+import sys
+
+# submodules and attributes loaded on first access, so `import mocr` stays
+# cheap and OpenCV, numpy and pytesseract are only imported when needed
+_SUBMODULES = (
+    "aio",
+    "batch",
+    "card",
+    "detector_backends",
+    "face_backends",
+    "face_detection",
+    "image_io",
+    "instrumentation",
+    "model_cache",
+    "nms",
+    "result_cache",
+    "shared_image",
+    "templates",
+    "tesseract_engine",
+    "text_recognition",
+    "video_text",
+)
+_ATTRIBUTES = {"TextRecognizer": "text_recognition", "analyze_card": "card"}
+
+__all__ = ["TextRecognizer", "face_detection"]
+
+
+def __getattr__(name):
+    if name in _ATTRIBUTES:
+        module = importlib.import_module("." + _ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES) | set(_ATTRIBUTES))
+
+
+if sys.version_info < (3, 7):
+    # module level __getattr__ needs Python 3.7, older versions import the
+    # public API eagerly
+    from .text_recognition import TextRecognizer
+    from .card import analyze_card
+    from mocr import face_detection
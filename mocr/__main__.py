@@ -6,7 +6,7 @@ import sys
 import argparse
 import cv2
 
-from mocr import TextRecognizer, face_detection
+from mocr import TextRecognizer, face_detection, video_text
 
 
 def display_image(image, results, file_name):
@@ -21,6 +21,12 @@ def display_image(image, results, file_name):
 
 if __name__ == "__main__":
 
+    # headless bulk processing, e.g. python -m mocr batch cards/ --east model.pb
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from mocr import batch
+
+        sys.exit(batch.main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
         description="Meaningful Optical Character Recognition from identity cards with Deep Learning."
     )
@@ -34,6 +40,19 @@ if __name__ == "__main__":
     parser.add_argument(
         "--video-face", type=str, help="Path to input video on file system."
     )
+    parser.add_argument(
+        "--video-text", type=str, help="Path to input video on file system."
+    )
+    parser.add_argument(
+        "--max-pixels",
+        type=int,
+        help="Keep the aspect ratio within this many pixels instead of 320x320.",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        help="Detect text on overlapping tiles of this size on larger scans.",
+    )
     args = parser.parse_args()
 
     # Optional bash tab completion support
@@ -44,43 +63,43 @@ if __name__ == "__main__":
     except ImportError:
         pass
 
-    if sys.argv[1] == "--image-face":
-        if len(sys.argv) < 3:
-            print("Specify an image path")
-            sys.exit(1)
+    # the detector keeps the aspect ratio of large scans when asked to
+    options = {"max_pixels": args.max_pixels, "tile_size": args.tile_size}
 
-        image_path = sys.argv[2]
+    if args.image_face is not None:
+        image_path = args.image_face
         file_name = os.path.basename(image_path)
         face = face_detection.detect_face(image_path)
         cv2.imshow("Found profile", face)
         cv2.imwrite("screenshots/profile_" + file_name, face)
-    elif sys.argv[1] == "--video-face":
-        if len(sys.argv) < 3:
-            print("Specify an video path")
-            sys.exit(1)
-
-        video_path = sys.argv[2]
+    elif args.video_face is not None:
+        video_path = args.video_face
         base = os.path.basename(video_path)
         file_name = os.path.splitext(base)[0]
         face = face_detection.detect_face_from_video(video_path)
         cv2.imshow("Found profile", face)
         print(file_name)
         cv2.imwrite("screenshots/profile_" + file_name + ".png", face)
+    elif args.video_text is not None:
+        if args.east is None:
+            print("Specify a video path and east path")
+            sys.exit(1)
+
+        results = video_text.VideoTextRecognizer(args.east, **options).recognize(
+            args.video_text
+        )
+        for result in results or []:
+            print(result.box, result.text)
     else:
-        if len(sys.argv) < 4:
+        if args.image is None or args.east is None:
             print("Specify an image path and east path")
             sys.exit(1)
 
-        image_path = sys.argv[2]
-        east_path = sys.argv[4]
-        text_recognizer = TextRecognizer(image_path, east_path)
+        image_path = args.image
+        text_recognizer = TextRecognizer(image_path, args.east, **options)
         file_name = os.path.basename(image_path)
 
         (image, _, _) = text_recognizer.load_image()
-        (resized_image, ratio_height, ratio_width, _, _) = text_recognizer.resize_image(
-            image, 320, 320
-        )
-        (scores, geometry) = text_recognizer.geometry_score(east_path, resized_image)
-        boxes = text_recognizer.boxes(scores, geometry)
+        (boxes, ratio_height, ratio_width) = text_recognizer.detect(image)
         results = text_recognizer.get_results(boxes, image, ratio_height, ratio_width)
         display_image(image, results, file_name)
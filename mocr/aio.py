@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import asyncio
+import weakref
+import cv2
+import pytesseract
+
+from concurrent.futures import ThreadPoolExecutor
+from mocr import face_detection, image_io, tesseract_engine
+from mocr.text_recognition import Results, TextRecognizer
+from typing import List, Optional
+
+# get_running_loop was added in Python 3.7, on 3.6 get_event_loop returns the
+# running loop when called from a coroutine
+_running_loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)
+
+
+class AsyncPipeline(object):
+    """AsyncPipeline runs the card pipeline from asyncio code without blocking
+    the event loop. Disk reads, the EAST forward pass and face detection run
+    on a bounded thread pool, regions are recognized by tesseract processes
+    started with `asyncio.create_subprocess_exec` or cards by the in-process
+    engine on the same pool, and the number of cards in flight is limited so
+    callers get backpressure instead of unbounded thread growth."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_workers: Optional[int] = None,
+        max_processes: Optional[int] = None,
+        ocr: str = "auto",
+    ):
+        """Returns an AsyncPipeline instance.
+        Args:
+          max_concurrency (int):
+            Maximum number of cards processed at the same time, further calls
+            wait until a card is finished.
+          max_workers (int):
+            Number of threads for the blocking stages, max_concurrency by default.
+          max_processes (int):
+            Maximum number of tesseract processes running at the same time,
+            max_workers by default.
+          ocr (str):
+            `subprocess` to recognize regions with asyncio subprocesses,
+            `engine` to use the recognizer's engine on the thread pool or
+            `auto` to use the engine when it runs in-process.
+        """
+
+        if ocr not in ("auto", "subprocess", "engine"):
+            raise ValueError("mocr:aio:AsyncPipeline Unknown ocr mode " + ocr)
+
+        self.max_concurrency = max_concurrency
+        self.max_workers = max_workers or max_concurrency
+        self.max_processes = max_processes or self.max_workers
+        self.ocr = ocr
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="mocr-aio"
+        )
+        # semaphores belong to the event loop they are first used on
+        self._semaphores = weakref.WeakKeyDictionary()
+        tesseract_engine.limit_threads()
+
+    def _semaphore(self, name: str, value: int) -> asyncio.Semaphore:
+        loop = _running_loop()
+        semaphores = self._semaphores.setdefault(loop, {})
+        if name not in semaphores:
+            semaphores[name] = asyncio.Semaphore(value)
+        return semaphores[name]
+
+    async def _run(self, function, *args):
+        loop = _running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def recognize_card(
+        self, image_path: image_io.ImageSource, east_path: str, **kwargs
+    ) -> List:
+        """Detects and recognizes the texts on given card.
+        Args:
+          image_path (str, bytes or numpy.ndarray):
+            Path to input image on file system, encoded image bytes or a decoded image.
+          east_path (str):
+            Path to input EAST text detector on file system.
+          kwargs:
+            Further TextRecognizer arguments such as min_confidence or lang.
+        Returns:
+          results (Results):
+            Texts with bounding box coordinates from top to bottom, None if
+            the image or detector could not be loaded. Regions left out by the
+            deadline or max_regions of the recognizer are counted in `skipped`.
+        """
+
+        async with self._semaphore("cards", self.max_concurrency):
+            started = time.monotonic()
+            text_recognizer = TextRecognizer(image_path, east_path, **kwargs)
+            engine = await self._run(text_recognizer.get_engine)
+            use_engine = self.ocr == "engine" or (
+                self.ocr == "auto"
+                and not isinstance(engine, tesseract_engine.PytesseractEngine)
+            )
+            if use_engine:
+                # the recognizer runs the whole card within its own budget
+                return await self._run(text_recognizer.recognize)
+
+            detection = await self._run(_detect, text_recognizer)
+            if detection is None:
+                return None
+
+            (image, regions, order) = detection
+            if text_recognizer.max_regions is not None:
+                order = order[: text_recognizer.max_regions]
+            texts = await self._recognize_within_budget(
+                text_recognizer, image, [regions[index] for index in order], started
+            )
+            return Results.from_texts(regions, order, texts)
+
+    async def _recognize_within_budget(
+        self, text_recognizer, image, regions, started
+    ) -> List:
+        tasks = [
+            asyncio.ensure_future(
+                self._recognize_region(text_recognizer.lang, image, region)
+            )
+            for region in regions
+        ]
+        if len(tasks) == 0:
+            return []
+        timeout = None
+        if text_recognizer.deadline is not None:
+            timeout = max(0, text_recognizer.deadline - (time.monotonic() - started))
+        (_, pending) = await asyncio.wait(tasks, timeout=timeout)
+        # regions not done by the deadline are cancelled, their processes killed
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return [None if task in pending else task.result() for task in tasks]
+
+    async def _recognize_region(self, lang, image, region) -> str:
+        (start_x, start_y, end_x, end_y) = region
+        roi = image[start_y:end_y, start_x:end_x]
+        async with self._semaphore("processes", self.max_processes):
+            return await image_to_string(roi, lang)
+
+    async def detect_face(
+        self, image_path: image_io.ImageSource, **kwargs
+    ) -> bytearray:
+        """Detects the face on given card off the event loop.
+        Args:
+          image_path (str, bytes or numpy.ndarray):
+            Path to input image on file system, encoded image bytes or a decoded image.
+          kwargs:
+            Further face_detection.detect_face arguments such as max_side.
+        Returns:
+          image (bytes array):
+            Bytes array for detected face image.
+        """
+
+        async with self._semaphore("cards", self.max_concurrency):
+            return await self._run(
+                lambda: face_detection.detect_face(image_path, **kwargs)
+            )
+
+    def close(self):
+        """Shuts the thread pool down."""
+
+        self.executor.shutdown(wait=False)
+
+
+def _detect(text_recognizer: TextRecognizer):
+    # blocking stages of the pipeline, run on the executor
+    (image, _, _) = text_recognizer.load_image()
+    if image is None:
+        return None
+    (boxes, confidences, ratio_height, ratio_width) = text_recognizer.detect_boxes(
+        image
+    )
+    if boxes is None:
+        return None
+    return (image,) + text_recognizer.prioritized_regions(
+        boxes, image, ratio_height, ratio_width, confidences
+    )
+
+
+async def image_to_string(
+    image: bytes, lang: str = "eng", psm: int = tesseract_engine.PSM_SINGLE_LINE
+) -> str:
+    """Recognizes the text on given image with a tesseract process that is
+    awaited instead of blocking the event loop. The image is piped to the
+    process so nothing is written to disk.
+    Args:
+      image (bytes):
+        Image data.
+      lang (str):
+        Language for tessaract.
+      psm (int):
+        Page segmentation mode.
+    Returns:
+      text (str):
+        Recognized text.
+    """
+
+    if image is None or image.size == 0:
+        return ""
+
+    (_, encoded) = cv2.imencode(".png", image)
+    process = await asyncio.create_subprocess_exec(
+        pytesseract.pytesseract.tesseract_cmd,
+        "stdin",
+        "stdout",
+        "-l",
+        lang,
+        "--oem",
+        str(tesseract_engine.OEM_LSTM_ONLY),
+        "--psm",
+        str(psm),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        (stdout, stderr) = await process.communicate(encoded.tobytes())
+    except asyncio.CancelledError:
+        # the process would outlive a cancelled caller otherwise
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        raise
+    if process.returncode != 0:
+        raise pytesseract.TesseractError(
+            process.returncode, stderr.decode("utf-8", "replace")
+        )
+    return stdout.decode("utf-8")
+
+
+_default_pipeline = None
+
+
+def _pipeline() -> AsyncPipeline:
+    global _default_pipeline
+    if _default_pipeline is None:
+        _default_pipeline = AsyncPipeline()
+    return _default_pipeline
+
+
+async def recognize_card(
+    image_path: image_io.ImageSource, east_path: str, **kwargs
+) -> List:
+    """Detects and recognizes the texts on given card with the default pipeline.
+    Args:
+      image_path (str, bytes or numpy.ndarray):
+        Path to input image on file system, encoded image bytes or a decoded image.
+      east_path (str):
+        Path to input EAST text detector on file system.
+      kwargs:
+        Further TextRecognizer arguments such as min_confidence or lang.
+    Returns:
+      results (Results):
+        Texts with bounding box coordinates from top to bottom.
+    """
+
+    return await _pipeline().recognize_card(image_path, east_path, **kwargs)
+
+
+async def detect_face_async(image_path: image_io.ImageSource, **kwargs) -> bytearray:
+    """Detects the face on given card with the default pipeline.
+    Args:
+      image_path (str, bytes or numpy.ndarray):
+        Path to input image on file system, encoded image bytes or a decoded image.
+      kwargs:
+        Further face_detection.detect_face arguments such as max_side.
+    Returns:
+      image (bytes array):
+        Bytes array for detected face image.
+    """
+
+    return await _pipeline().detect_face(image_path, **kwargs)
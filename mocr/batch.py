@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import glob
+import json
+import argparse
+import multiprocessing
+
+from mocr import (
+    face_backends,
+    face_detection,
+    instrumentation,
+    model_cache,
+    templates,
+)
+from mocr.text_recognition import TextRecognizer
+from typing import Dict, Iterable, List, TextIO
+
+IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp")
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    """Returns the image paths for given files, directories and glob patterns.
+    Args:
+      inputs (array):
+        Image files, directories searched recursively for images or glob patterns.
+    Returns:
+      paths (array):
+        Image paths in the given order, directories and patterns sorted.
+    """
+
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for (root, _, files) in sorted(os.walk(item)):
+                paths.extend(
+                    os.path.join(root, name)
+                    for name in sorted(files)
+                    if name.lower().endswith(IMAGE_EXTENSIONS)
+                )
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            paths.extend(
+                sorted(
+                    path
+                    for path in glob.glob(item, recursive=True)
+                    if os.path.isfile(path)
+                )
+            )
+    return paths
+
+
+def process_card(path: str, options: Dict) -> Dict:
+    """Runs text recognition and face detection on one card.
+    Args:
+      path (str):
+        Path to card image on file system.
+      options (dict):
+        east_path, min_confidence, width, height, padding, lang, engine,
+        max_pixels, tile_size, merge_lines, max_regions, templates, face,
+        face_max_side, face_backend, face_model and face_config settings.
+    Returns:
+      result (dict):
+        JSON serializable result with boxes, texts, face box and the seconds
+        spent in every traced stage, summed over the calls of the stage.
+        Cards matching a layout template have named fields instead of boxes
+        and texts.
+    """
+
+    tracer = instrumentation.RecordingTracer()
+
+    def timings():
+        return {
+            stage: round(seconds, 6) for (stage, seconds) in tracer.totals().items()
+        }
+
+    text_recognizer = TextRecognizer(
+        path,
+        options["east_path"],
+        min_confidence=options.get("min_confidence", 0.5),
+        width=options.get("width", 320),
+        height=options.get("height", 320),
+        padding=options.get("padding", 0.0),
+        lang=options.get("lang", "eng"),
+        engine=options.get("engine", "auto"),
+        max_pixels=options.get("max_pixels"),
+        tile_size=options.get("tile_size"),
+        merge_lines=options.get("merge_lines", False),
+        max_regions=options.get("max_regions"),
+        tracer=tracer,
+    )
+    (image, _, _) = text_recognizer.load_image()
+    if image is None:
+        return {"path": path, "error": "image could not be read", "timings": timings()}
+
+    (faces, face) = (None, None)
+    if options.get("templates", False):
+        # known layouts are read field by field without the text detector
+        with tracer.stage("face"):
+            faces = face_detection.detect_faces(
+                image,
+                max_side=options.get("face_max_side"),
+                backend=_face_backend(options),
+            )
+        face = list(faces[0]) if len(faces) == 1 else None
+        card_fields = None
+        if face is not None:
+            with tracer.stage("ocr"):
+                card_fields = templates.extract_fields(
+                    image,
+                    face_box=faces[0],
+                    engine=text_recognizer.get_engine(),
+                )
+        if card_fields is not None:
+            return {
+                "path": path,
+                "template": card_fields.template,
+                "fields": card_fields.fields,
+                "face": face,
+                "timings": timings(),
+            }
+
+    (boxes, confidences, ratio_height, ratio_width) = text_recognizer.detect_boxes(
+        image
+    )
+    if boxes is None:
+        return {
+            "path": path,
+            "error": "east detector could not be run",
+            "timings": timings(),
+        }
+
+    results = text_recognizer.get_results(
+        boxes, image, ratio_height, ratio_width, confidences
+    )
+
+    if options.get("face", True) and faces is None:
+        with tracer.stage("face"):
+            faces = face_detection.detect_faces(
+                image,
+                max_side=options.get("face_max_side"),
+                backend=_face_backend(options),
+            )
+        face = list(faces[0]) if len(faces) == 1 else None
+
+    return {
+        "path": path,
+        "results": [
+            {"box": [int(value) for value in box], "text": text.strip()}
+            for (box, text) in results
+        ],
+        "face": face,
+        "skipped": results.skipped,
+        "timings": timings(),
+    }
+
+
+def _face_backend(options: Dict) -> face_backends.FaceDetectorBackend:
+    return face_backends.get_backend(
+        options.get("face_backend", "haar"),
+        options.get("face_model"),
+        options.get("face_config"),
+    )
+
+
+def _init_worker(east_path: str):
+    # every worker loads the detector once, a model preloaded by the parent
+    # before forking is inherited and not read again
+    model_cache.preload(east_path)
+
+
+def _process_card_safely(arguments) -> Dict:
+    (path, options) = arguments
+    try:
+        return process_card(path, options)
+    except Exception as error:
+        return {"path": path, "error": repr(error)}
+
+
+def run_batch(paths: List[str], options: Dict, output: TextIO, workers: int = 1) -> int:
+    """Processes the cards and writes one JSON line per card as soon as it is done.
+    Args:
+      paths (array):
+        Paths to card images on file system.
+      options (dict):
+        Options passed to process_card.
+      output (file):
+        Stream the JSON lines are written to.
+      workers (int):
+        Number of worker processes, cards are processed in this process when 1.
+    Returns:
+      failures (int):
+        Number of cards that could not be processed.
+    """
+
+    failures = 0
+    tasks = [(path, options) for path in paths]
+    if workers <= 1:
+        model_cache.preload(options["east_path"])
+        results = map(_process_card_safely, tasks)
+        pool = None
+    else:
+        if multiprocessing.get_start_method() == "fork":
+            model_cache.preload(options["east_path"])
+        pool = multiprocessing.Pool(
+            workers, initializer=_init_worker, initargs=(options["east_path"],)
+        )
+        results = pool.imap_unordered(_process_card_safely, tasks, chunksize=4)
+    try:
+        for result in results:
+            failures += "error" in result
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return failures
+
+
+def main(argv: List[str] = None) -> int:
+    """Entry point of `python -m mocr batch`.
+    Args:
+      argv (array):
+        Command line arguments after `batch`.
+    Returns:
+      status (int):
+        Exit status, 1 if any card failed.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog="python -m mocr batch",
+        description="Recognize texts and faces on many identity cards and write one JSON line per card.",
+    )
+    parser.add_argument(
+        "inputs", nargs="*", help="Image files, directories or glob patterns."
+    )
+    parser.add_argument(
+        "--file-list", type=str, help="File with one image path per line, - for stdin."
+    )
+    parser.add_argument(
+        "--east",
+        type=str,
+        required=True,
+        help="Path to input EAST text detector on file system.",
+    )
+    parser.add_argument(
+        "--output", type=str, default="-", help="JSON lines output, - for stdout."
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-confidence", type=float, default=0.5)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument(
+        "--max-pixels",
+        type=int,
+        help="Keep the aspect ratio within this many pixels instead of width and height.",
+    )
+    parser.add_argument(
+        "--tile-size",
+        type=int,
+        help="Detect text on overlapping tiles of this size on larger scans.",
+    )
+    parser.add_argument(
+        "--merge-lines",
+        action="store_true",
+        help="Recognize every text line with one tesseract call instead of every word.",
+    )
+    parser.add_argument(
+        "--max-regions",
+        type=int,
+        help="Recognize at most this many regions, ranked by confidence times area.",
+    )
+    parser.add_argument(
+        "--templates",
+        action="store_true",
+        help="Read known card layouts field by field without the text detector.",
+    )
+    parser.add_argument("--padding", type=float, default=0.0)
+    parser.add_argument("--lang", type=str, default="eng")
+    parser.add_argument(
+        "--engine", type=str, default="auto", choices=("auto", "capi", "pytesseract")
+    )
+    parser.add_argument("--no-face", action="store_true", help="Skip face detection.")
+    parser.add_argument(
+        "--face-max-side", type=int, help="Detect faces on a downscaled copy."
+    )
+    parser.add_argument(
+        "--face-backend",
+        type=str,
+        default="haar",
+        choices=("haar", "lbp", "yunet", "ssd"),
+        help="Face detector, yunet and ssd need --face-model.",
+    )
+    parser.add_argument(
+        "--face-model",
+        type=str,
+        help="Cascade or model file of the face detector on file system.",
+    )
+    parser.add_argument(
+        "--face-config", type=str, help="Network description of the ssd model."
+    )
+    args = parser.parse_args(argv)
+
+    inputs = list(args.inputs)
+    if args.file_list:
+        list_file = sys.stdin if args.file_list == "-" else open(args.file_list)
+        inputs.extend(line.strip() for line in list_file if line.strip())
+        if list_file is not sys.stdin:
+            list_file.close()
+    paths = expand_inputs(inputs)
+    if not paths:
+        print("mocr:batch:main No images found on given inputs!", file=sys.stderr)
+        return 1
+
+    if not os.path.isfile(args.east):
+        print("mocr:batch:main No east detector found on given path!", file=sys.stderr)
+        return 1
+
+    try:
+        face_backends.get_backend(args.face_backend, args.face_model, args.face_config)
+    except ValueError as error:
+        print("mocr:batch:main {}".format(error), file=sys.stderr)
+        return 1
+
+    options = {
+        "east_path": args.east,
+        "min_confidence": args.min_confidence,
+        "width": args.width,
+        "height": args.height,
+        "padding": args.padding,
+        "max_pixels": args.max_pixels,
+        "tile_size": args.tile_size,
+        "merge_lines": args.merge_lines,
+        "max_regions": args.max_regions,
+        "templates": args.templates,
+        "lang": args.lang,
+        "engine": args.engine,
+        "face": not args.no_face,
+        "face_max_side": args.face_max_side,
+        "face_backend": args.face_backend,
+        "face_model": args.face_model,
+        "face_config": args.face_config,
+    }
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        failures = run_batch(paths, options, output, workers=args.workers)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failures else 0
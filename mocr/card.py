@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import cv2
+import numpy as np
+
+from mocr import face_backends, face_detection, image_io
+from mocr.text_recognition import TextRecognizer
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+CardAnalysis = namedtuple("CardAnalysis", ["image", "face", "face_box", "results"])
+CardAnalysis.__doc__ = """Face and texts found on one identity card.
+Args:
+  image (numpy.ndarray):
+    Decoded card image.
+  face (numpy.ndarray):
+    Cropped face, None unless exactly one face was found.
+  face_box (tuple):
+    (x, y, w, h) of the face in image coordinates, None unless exactly one
+    face was found.
+  results (Results):
+    Texts with bounding box coordinates from top to bottom, None if the
+    detector could not be run.
+"""
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _face_executor() -> ThreadPoolExecutor:
+    # face detection runs next to the forward pass of the text detector,
+    # both release the GIL inside OpenCV
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="mocr-face"
+            )
+        return _executor
+
+
+def portrait_mask(
+    boxes: np.ndarray,
+    face_box: tuple,
+    ratio_height: float,
+    ratio_width: float,
+    margin: float = 0.3,
+    max_overlap: float = 0.5,
+) -> np.ndarray:
+    """Returns which boxes lie outside of the portrait on a card. The portrait
+    is the face box grown by margin times its size on every side, a box is
+    inside when more than max_overlap of its area is covered.
+    Args:
+      boxes (array):
+        (N, 4) boxes in detector coordinates.
+      face_box (tuple):
+        (x, y, w, h) of the face in image coordinates.
+      ratio_height (float):
+        Resize ratio of height.
+      ratio_width (float):
+        Resize ratio of width.
+      margin (float):
+        Portrait margin around the face relative to the face size.
+      max_overlap (float):
+        Covered share of a box above which it is inside the portrait.
+    Returns:
+      mask (array):
+        True for every box outside of the portrait.
+    """
+
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    (x, y, w, h) = face_box
+    portrait = (x - margin * w, y - margin * h, x + w + margin * w, y + h + margin * h)
+    start_x = boxes[:, 0] * ratio_width
+    start_y = boxes[:, 1] * ratio_height
+    end_x = boxes[:, 2] * ratio_width
+    end_y = boxes[:, 3] * ratio_height
+    overlap_w = np.maximum(
+        0.0, np.minimum(end_x, portrait[2]) - np.maximum(start_x, portrait[0])
+    )
+    overlap_h = np.maximum(
+        0.0, np.minimum(end_y, portrait[3]) - np.maximum(start_y, portrait[1])
+    )
+    area = np.maximum(1.0, (end_x - start_x) * (end_y - start_y))
+    return (overlap_w * overlap_h) / area <= max_overlap
+
+
+def analyze_card(
+    image_path: image_io.ImageSource,
+    east_path: str,
+    parallel: bool = True,
+    skip_portrait: bool = True,
+    portrait_margin: float = 0.3,
+    face_max_side: Optional[int] = None,
+    face_backend: face_detection.FaceBackend = "haar",
+    copy: bool = False,
+    **options
+) -> CardAnalysis:
+    """Finds the face and the texts of an identity card in one pass. The card
+    is decoded and converted to grayscale once, face detection and tesseract
+    work on the shared grayscale image and the text detector on the color
+    one. Texts inside the portrait are not recognized.
+    Args:
+      image_path (str, bytes or numpy.ndarray):
+        Path to input image on file system, encoded image bytes or a decoded
+        image.
+      east_path (str):
+        Path to input EAST text detector on file system.
+      parallel (bool):
+        Detect the face while the text detector runs.
+      skip_portrait (bool):
+        Drop text boxes inside the portrait before recognizing them.
+      portrait_margin (float):
+        Portrait margin around the face relative to the face size.
+      face_max_side (int):
+        Detect the face on a copy downscaled to this longest side.
+      face_backend (str or FaceDetectorBackend):
+        `haar` or a backend of `face_backends`, DNN backends get the color
+        image.
+      copy (bool):
+        Copy a decoded image given as image_path before using it.
+      options:
+        Keyword arguments of TextRecognizer, e.g. min_confidence, padding,
+        merge_lines or max_workers.
+    Returns:
+      analysis (CardAnalysis):
+        Face and texts of the card, None if the image could not be read.
+    """
+
+    text_recognizer = TextRecognizer(image_path, east_path, copy=copy, **options)
+    (image, _, _) = text_recognizer.load_image()
+    if image is None:
+        print("mocr:card:analyze_card No image found on given image path!")
+        return None
+
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+    face_backend = face_backends.get_backend(face_backend)
+    face_image = gray if face_backend.grayscale else image
+    if parallel:
+        faces = _face_executor().submit(
+            face_detection.detect_faces,
+            face_image,
+            max_side=face_max_side,
+            backend=face_backend,
+        )
+        (boxes, confidences, ratio_height, ratio_width) = text_recognizer.detect_boxes(
+            image
+        )
+        faces = faces.result()
+    else:
+        faces = face_detection.detect_faces(
+            face_image, max_side=face_max_side, backend=face_backend
+        )
+        (boxes, confidences, ratio_height, ratio_width) = text_recognizer.detect_boxes(
+            image
+        )
+
+    (face, face_box) = (None, None)
+    if len(faces) == 1:
+        face_box = faces[0]
+        (x, y, w, h) = face_box
+        face = image[y : y + h, x : x + w]
+
+    results = None
+    if boxes is not None:
+        if skip_portrait and face_box is not None:
+            mask = portrait_mask(
+                boxes, face_box, ratio_height, ratio_width, portrait_margin
+            )
+            (boxes, confidences) = (boxes[mask], confidences[mask])
+        # confidences rank the regions when the recognizer has a budget
+        results = text_recognizer.get_results(
+            boxes, gray, ratio_height, ratio_width, confidences
+        )
+    return CardAnalysis(image, face, face_box, results)
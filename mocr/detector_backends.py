@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import cv2
+import numpy as np
+
+from mocr import model_cache
+from typing import Optional, Sequence, Tuple
+
+# output layers of the EAST detector with the probabilities and geometry
+EAST_LAYER_NAMES = ["feature_fusion/Conv_7/Sigmoid", "feature_fusion/concat_3"]
+
+OPENCV_BACKENDS = {
+    "default": cv2.dnn.DNN_BACKEND_DEFAULT,
+    "opencv": cv2.dnn.DNN_BACKEND_OPENCV,
+    "openvino": cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE,
+}
+
+OPENCV_TARGETS = {
+    "cpu": cv2.dnn.DNN_TARGET_CPU,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class DetectorBackend(object):
+    """DetectorBackend runs the EAST detector on a preprocessed NCHW blob.
+    Subclasses implement `load` and `forward`, models are loaded once per
+    path and kept in a model cache."""
+
+    name = "base"
+    # whether two threads may run a forward pass on the same model at once
+    thread_safe = False
+
+    def __init__(self):
+        self._cache = model_cache.ModelCache(loader=self.load)
+
+    @property
+    def key(self) -> str:
+        """Identifies the backend and its settings, e.g. in cache keys."""
+
+        return self.name
+
+    def get_model(self, path: str) -> model_cache.CachedModel:
+        """Returns the cached model for given path, loading it on first use.
+        Args:
+          path (str):
+            Path to model on file system.
+        Returns:
+          model (CachedModel):
+            Cached model, None if there is no file on given path.
+        """
+
+        return self._cache.get(path)
+
+    def load(self, path: str):
+        """Loads the model from given path.
+        Args:
+          path (str):
+            Path to model on file system.
+        """
+
+        raise NotImplementedError
+
+    def forward(self, net, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Runs the model on a blob.
+        Args:
+          net (object):
+            Model returned by `load`.
+          blob (array):
+            (N, 3, H, W) mean subtracted RGB images.
+        Returns:
+          (scores, geometry): (N, 1, H / 4, W / 4) probabilities and
+          (N, 5, H / 4, W / 4) geometrical data.
+        """
+
+        raise NotImplementedError
+
+
+class OpenCVBackend(DetectorBackend):
+    """Runs the frozen EAST graph with `cv2.dnn` on given backend and target,
+    e.g. `openvino` when OpenCV is built with the inference engine."""
+
+    name = "opencv"
+
+    def __init__(self, backend: str = "default", target: str = "cpu"):
+        """Returns an OpenCVBackend instance.
+        Args:
+          backend (str):
+            `default`, `opencv` or `openvino`.
+          target (str):
+            `cpu`, the only target mocr runs on.
+        """
+
+        if backend not in OPENCV_BACKENDS:
+            raise ValueError("Unknown opencv backend {!r}".format(backend))
+        if target not in OPENCV_TARGETS:
+            raise ValueError("Unknown opencv target {!r}".format(target))
+        super(OpenCVBackend, self).__init__()
+        self.backend = backend
+        self.target = target
+
+    @property
+    def key(self) -> str:
+        return "opencv/{}/{}".format(self.backend, self.target)
+
+    def get_model(self, path: str) -> model_cache.CachedModel:
+        # the default configuration shares the process-wide cache with
+        # preloading and forked batch workers
+        if (self.backend, self.target) == ("default", "cpu"):
+            return model_cache.get_model(path)
+        return self._cache.get(path)
+
+    def load(self, path: str):
+        net = cv2.dnn.readNet(path)
+        net.setPreferableBackend(OPENCV_BACKENDS[self.backend])
+        net.setPreferableTarget(OPENCV_TARGETS[self.target])
+        return net
+
+    def forward(self, net, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        net.setInput(blob)
+        (scores, geometry) = net.forward(EAST_LAYER_NAMES)
+        return (scores, geometry)
+
+
+class ONNXRuntimeBackend(DetectorBackend):
+    """Runs an EAST model exported to ONNX, e.g. with tf2onnx, or its INT8
+    variant from `quantize`, with ONNX Runtime on the CPU. NHWC inputs and
+    outputs of exported TensorFlow graphs are transposed as needed."""
+
+    name = "onnxruntime"
+    thread_safe = True
+
+    def __init__(self, threads: Optional[int] = None):
+        """Returns an ONNXRuntimeBackend instance.
+        Args:
+          threads (int):
+            Intra-op threads of every session, ONNX Runtime picks when not given.
+        """
+
+        super(ONNXRuntimeBackend, self).__init__()
+        self.threads = threads
+
+    @property
+    def key(self) -> str:
+        return "onnxruntime/{}".format(self.threads)
+
+    def load(self, path: str):
+        onnxruntime = _import_onnxruntime()
+        options = onnxruntime.SessionOptions()
+        if self.threads is not None:
+            options.intra_op_num_threads = self.threads
+        return onnxruntime.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def forward(self, net, blob: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        model_input = net.get_inputs()[0]
+        if model_input.shape[0] == 1 and len(blob) > 1:
+            # exported graphs often have a fixed batch size of one
+            outputs = [
+                self.forward(net, blob[index : index + 1]) for index in range(len(blob))
+            ]
+            return tuple(np.concatenate(output) for output in zip(*outputs))
+
+        channels_last = _channels_last(model_input.shape)
+        if channels_last:
+            blob = blob.transpose(0, 2, 3, 1)
+        outputs = net.run(None, {model_input.name: np.ascontiguousarray(blob)})
+        if channels_last:
+            outputs = [output.transpose(0, 3, 1, 2) for output in outputs]
+        # the probabilities have one channel and the geometry five
+        scores = next(output for output in outputs if output.shape[1] == 1)
+        geometry = next(output for output in outputs if output.shape[1] == 5)
+        return (np.ascontiguousarray(scores), np.ascontiguousarray(geometry))
+
+
+def _channels_last(shape: Sequence) -> bool:
+    return len(shape) == 4 and shape[3] == 3 and shape[1] != 3
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError(
+            "The onnxruntime backend needs the onnxruntime package, pip install onnxruntime"
+        )
+    return onnxruntime
+
+
+def quantize(model_path: str, output_path: str) -> str:
+    """Writes an INT8 variant of an ONNX model with dynamically quantized
+    weights, it is smaller and usually faster on the CPU at a small loss of
+    accuracy, see benchmarks/detector_backends.py.
+    Args:
+      model_path (str):
+        Path to the ONNX model.
+      output_path (str):
+        Path the quantized model is written to.
+    Returns:
+      output_path (str):
+        Path to the quantized model.
+    """
+
+    _import_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QUInt8)
+    return output_path
+
+
+def get_backend(backend="opencv", **options) -> DetectorBackend:
+    """Returns the detector backend for given name, backends with the same
+    settings are shared by the process so each model is loaded once.
+    Args:
+      backend (str or DetectorBackend):
+        `opencv`, `onnxruntime` or a backend instance which is returned as it is.
+      options:
+        Settings of the backend, e.g. backend and target of `OpenCVBackend`
+        given as `opencv_backend` and `target` or threads of `ONNXRuntimeBackend`.
+    Returns:
+      backend (DetectorBackend):
+        Shared backend instance.
+    """
+
+    if isinstance(backend, DetectorBackend):
+        return backend
+
+    key = (backend, tuple(sorted(options.items())))
+    with _backends_lock:
+        if key not in _backends:
+            if backend == "opencv":
+                _backends[key] = OpenCVBackend(
+                    options.get("opencv_backend", "default"),
+                    options.get("target", "cpu"),
+                )
+            elif backend == "onnxruntime":
+                _backends[key] = ONNXRuntimeBackend(options.get("threads"))
+            else:
+                raise ValueError("Unknown detector backend {!r}".format(backend))
+        return _backends[key]
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import cv2
+import numpy as np
+
+from mocr import model_cache
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+# bundled haar cascade for frontal faces
+CASCADE_PATH = os.path.join(
+    os.path.dirname(__file__), "haarcascades/haarcascade_frontalface_default.xml"
+)
+# bundled LBP cascade for frontal faces from the OpenCV sources
+LBP_CASCADE_PATH = os.path.join(
+    os.path.dirname(__file__), "lbpcascades/lbpcascade_frontalface_improved.xml"
+)
+
+# mean pixel values of the training set of the res10 SSD face detector
+_SSD_MEAN = (104.0, 177.0, 123.0)
+_SSD_SIZE = (300, 300)
+
+_local = threading.local()
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class FaceBox(namedtuple("FaceBox", ["x", "y", "w", "h"])):
+    """FaceBox is the (x, y, w, h) of a face found by any backend, it unpacks
+    and compares like the plain tuples cascades return. The confidence of
+    the backend is kept as `score`, the number of neighbors of a cascade
+    detection or the probability of a DNN detector."""
+
+    def __new__(cls, x: int, y: int, w: int, h: int, score: Optional[float] = None):
+        box = super(FaceBox, cls).__new__(
+            cls, *(int(round(value)) for value in (x, y, w, h))
+        )
+        box.score = score
+        return box
+
+    def scaled(self, scale: float) -> "FaceBox":
+        """Returns the box in the coordinates of an image resized by 1 / scale.
+        Args:
+          scale (float):
+            Factor the image the box was found on was resized with.
+        """
+
+        return FaceBox(*(value / scale for value in self), score=self.score)
+
+
+class FaceDetectorBackend(object):
+    """FaceDetectorBackend finds the faces of a BGR or grayscale image.
+    Subclasses implement `detect`, they are safe to use from several threads."""
+
+    name = "base"
+    # whether the backend works on grayscale images, color images are given
+    # to the others
+    grayscale = True
+
+    @property
+    def key(self) -> str:
+        """Identifies the backend and its settings."""
+
+        return self.name
+
+    def detect(self, image: np.ndarray, min_size: Tuple[int, int]) -> List[FaceBox]:
+        """Detects the faces of an image.
+        Args:
+          image (numpy.ndarray):
+            Grayscale image for `grayscale` backends, BGR image otherwise.
+          min_size (tuple):
+            Minimum possible face size in pixels.
+        Returns:
+          faces (array):
+            FaceBox of every face.
+        """
+
+        raise NotImplementedError
+
+
+class CascadeBackend(FaceDetectorBackend):
+    """Runs an OpenCV cascade classifier, the bundled haar cascade or the
+    bundled LBP cascade `lbpcascade_frontalface_improved.xml` from the OpenCV
+    sources, which is several times faster at a lower detection rate."""
+
+    name = "cascade"
+
+    def __init__(
+        self,
+        cascade_path: str = CASCADE_PATH,
+        scale_factor: float = 1.1,
+        min_neighbors: int = 5,
+    ):
+        """Returns a CascadeBackend instance.
+        Args:
+          cascade_path (str):
+            Path to cascade on file system, the bundled haar cascade by default.
+          scale_factor (float):
+            How much the image size is reduced at each image scale, larger
+            values are faster but may miss faces.
+          min_neighbors (int):
+            How many neighbors each candidate rectangle should have to retain it.
+        """
+
+        if not os.path.isfile(cascade_path):
+            raise ValueError("No cascade found on {!r}".format(cascade_path))
+        self.cascade_path = cascade_path
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    @property
+    def key(self) -> str:
+        return "cascade/{}/{}/{}".format(
+            os.path.basename(self.cascade_path), self.scale_factor, self.min_neighbors
+        )
+
+    def detect(self, image: np.ndarray, min_size: Tuple[int, int]) -> List[FaceBox]:
+        (faces, neighbors) = cascade(self.cascade_path).detectMultiScale2(
+            image,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+            flags=cv2.CASCADE_SCALE_IMAGE,
+        )
+        return [
+            FaceBox(*face, score=float(count))
+            for (face, count) in zip(faces, neighbors)
+        ]
+
+
+class YuNetBackend(FaceDetectorBackend):
+    """Runs the YuNet face detector of `cv2.FaceDetectorYN` from a local ONNX
+    model, e.g. `face_detection_yunet_2023mar.onnx` of the OpenCV model zoo.
+    It is more accurate than the cascades and ignores most card artwork."""
+
+    name = "yunet"
+    grayscale = False
+
+    def __init__(
+        self,
+        model_path: str,
+        score_threshold: float = 0.7,
+        nms_threshold: float = 0.3,
+        top_k: int = 50,
+    ):
+        """Returns a YuNetBackend instance.
+        Args:
+          model_path (str):
+            Path to the YuNet ONNX model on file system.
+          score_threshold (float):
+            Minimum score of a face.
+          nms_threshold (float):
+            Overlap above which the weaker of two faces is suppressed.
+          top_k (int):
+            Maximum number of candidates before non-maxima suppression.
+        """
+
+        if not os.path.isfile(model_path):
+            raise ValueError("No YuNet model found on {!r}".format(model_path))
+        self.model_path = model_path
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
+        self.top_k = top_k
+
+    @property
+    def key(self) -> str:
+        return "yunet/{}/{}".format(
+            os.path.basename(self.model_path), self.score_threshold
+        )
+
+    def _detector(self):
+        # a detector keeps its input size as state, so every thread has one
+        detectors = getattr(_local, "yunet", None)
+        if detectors is None:
+            detectors = _local.yunet = {}
+        key = (self.model_path, self.score_threshold, self.nms_threshold, self.top_k)
+        if key not in detectors:
+            detectors[key] = cv2.FaceDetectorYN.create(
+                self.model_path,
+                "",
+                (320, 320),
+                self.score_threshold,
+                self.nms_threshold,
+                self.top_k,
+            )
+        return detectors[key]
+
+    def detect(self, image: np.ndarray, min_size: Tuple[int, int]) -> List[FaceBox]:
+        detector = self._detector()
+        detector.setInputSize((image.shape[1], image.shape[0]))
+        (_, faces) = detector.detect(image)
+        if faces is None:
+            return []
+        (height, width) = image.shape[:2]
+        boxes = []
+        # every row holds the box, five landmarks and the score, boxes of
+        # faces cut by the image border reach past it and are clipped
+        for face in faces:
+            (x, y, w, h) = face[:4]
+            start_x = min(max(0.0, x), width)
+            start_y = min(max(0.0, y), height)
+            end_x = min(max(0.0, x + w), width)
+            end_y = min(max(0.0, y + h), height)
+            boxes.append(
+                FaceBox(
+                    start_x,
+                    start_y,
+                    end_x - start_x,
+                    end_y - start_y,
+                    score=float(face[-1]),
+                )
+            )
+        return _filter(boxes, min_size)
+
+
+class SSDBackend(FaceDetectorBackend):
+    """Runs the res10 300x300 SSD face detector with `cv2.dnn` from a local
+    model, e.g. `res10_300x300_ssd_iter_140000.caffemodel` with its
+    `deploy.prototxt`."""
+
+    name = "ssd"
+    grayscale = False
+
+    def __init__(
+        self,
+        model_path: str,
+        config_path: Optional[str] = None,
+        confidence: float = 0.5,
+    ):
+        """Returns an SSDBackend instance.
+        Args:
+          model_path (str):
+            Path to the model weights on file system.
+          config_path (str):
+            Path to the network description, e.g. the prototxt of a caffe model.
+          confidence (float):
+            Minimum probability of a face.
+        """
+
+        if not os.path.isfile(model_path):
+            raise ValueError("No SSD model found on {!r}".format(model_path))
+        self.model_path = model_path
+        self.config_path = config_path
+        self.confidence = confidence
+        self._cache = model_cache.ModelCache(
+            loader=lambda path: cv2.dnn.readNet(path, self.config_path or "")
+        )
+
+    @property
+    def key(self) -> str:
+        return "ssd/{}/{}".format(os.path.basename(self.model_path), self.confidence)
+
+    def detect(self, image: np.ndarray, min_size: Tuple[int, int]) -> List[FaceBox]:
+        (height, width) = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(
+            cv2.resize(image, _SSD_SIZE), 1.0, _SSD_SIZE, _SSD_MEAN
+        )
+        model = self._cache.get(self.model_path)
+        with model.lock:
+            model.net.setInput(blob)
+            detections = model.net.forward()
+
+        # every row holds the image id, class, probability and the relative
+        # corners of a face
+        faces = []
+        for detection in detections.reshape(-1, 7):
+            if detection[2] < self.confidence:
+                continue
+            start_x = max(0.0, detection[3]) * width
+            start_y = max(0.0, detection[4]) * height
+            end_x = min(1.0, detection[5]) * width
+            end_y = min(1.0, detection[6]) * height
+            faces.append(
+                FaceBox(
+                    start_x,
+                    start_y,
+                    end_x - start_x,
+                    end_y - start_y,
+                    score=float(detection[2]),
+                )
+            )
+        return _filter(faces, min_size)
+
+
+def _filter(faces: List[FaceBox], min_size: Tuple[int, int]) -> List[FaceBox]:
+    return [face for face in faces if face.w >= min_size[0] and face.h >= min_size[1]]
+
+
+def cascade(cascade_path: str = CASCADE_PATH) -> cv2.CascadeClassifier:
+    """Returns the cascade classifier for given path. A classifier can not be
+    used by two threads at the same time, so it is created once per thread
+    and then reused by every detection on that thread.
+    Args:
+      cascade_path (str):
+        Path to cascade on file system, the bundled haar cascade by default.
+    Returns:
+      classifier (cv2.CascadeClassifier):
+        Loaded cascade classifier.
+    """
+
+    cascades = getattr(_local, "cascades", None)
+    if cascades is None:
+        cascades = _local.cascades = {}
+    if cascade_path not in cascades:
+        cascades[cascade_path] = cv2.CascadeClassifier(cascade_path)
+    return cascades[cascade_path]
+
+
+def get_backend(
+    backend="haar",
+    model_path: Optional[str] = None,
+    config_path: Optional[str] = None,
+    **options
+) -> FaceDetectorBackend:
+    """Returns the face detector backend for given name, backends with the
+    same settings are shared by the process.
+    Args:
+      backend (str or FaceDetectorBackend):
+        `haar`, `lbp`, `yunet`, `ssd` or a backend instance which is returned
+        as it is.
+      model_path (str):
+        Cascade for `haar` and `lbp`, the bundled ones by default, the ONNX
+        model for `yunet` or the weights for `ssd`.
+      config_path (str):
+        Network description for `ssd`.
+      options:
+        Settings of the backend, e.g. scale_factor and min_neighbors of a
+        cascade or score_threshold of YuNet.
+    Returns:
+      backend (FaceDetectorBackend):
+        Shared backend instance.
+    Raises:
+      ValueError: If the backend is unknown or its model is missing.
+    """
+
+    if isinstance(backend, FaceDetectorBackend):
+        return backend
+
+    key = (backend, model_path, config_path, tuple(sorted(options.items())))
+    with _backends_lock:
+        if key not in _backends:
+            if backend == "haar":
+                _backends[key] = CascadeBackend(model_path or CASCADE_PATH, **options)
+            elif backend == "lbp":
+                _backends[key] = CascadeBackend(
+                    model_path or LBP_CASCADE_PATH, **options
+                )
+            elif backend in ("yunet", "ssd") and model_path is None:
+                raise ValueError("The {} backend needs a model_path".format(backend))
+            elif backend == "yunet":
+                _backends[key] = YuNetBackend(model_path, **options)
+            elif backend == "ssd":
+                _backends[key] = SSDBackend(model_path, config_path, **options)
+            else:
+                raise ValueError("Unknown face detector backend {!r}".format(backend))
+        return _backends[key]
@@ -2,38 +2,65 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
 import cv2
+import numpy as np
 
+from mocr import face_backends, image_io, nms
+from typing import Iterator, List, Optional, Tuple, Union
 
-def detect_face(image_path: str) -> bytearray:
+# bundled haar cascade for frontal faces
+CASCADE_PATH = face_backends.CASCADE_PATH
+
+FaceBackend = Union[str, face_backends.FaceDetectorBackend]
+
+
+def detect_face(
+    image_path: image_io.ImageSource,
+    copy: bool = False,
+    max_side: Optional[int] = None,
+    scale_factor: float = 1.1,
+    min_neighbors: int = 5,
+    min_size: Tuple[int, int] = (30, 30),
+    backend: FaceBackend = "haar",
+) -> bytearray:
     """Detect face from given image path.
     Args:
-      image_path (str):
-        Path to input image on file system.
+      image_path (str, bytes or numpy.ndarray):
+        Path to input image on file system, encoded image bytes or a decoded image.
+      copy (bool):
+        Copy a decoded image given as image_path before cropping the face.
+      max_side (int):
+        Detect on a grayscale copy downscaled to this longest side, the face
+        is cropped from the full resolution image.
+      scale_factor (float):
+        How much the image size is reduced at each image scale, larger
+        values are faster but may miss faces.
+      min_neighbors (int):
+        How many neighbors each candidate rectangle should have to retain it.
+      min_size (tuple):
+        Minimum possible face size in pixels of the full resolution image.
+      backend (str or FaceDetectorBackend):
+        `haar` or `lbp` for the bundled cascades or a backend of
+        `face_backends`, the cascade settings above only apply to those two.
+        `yunet` and `ssd` load a local model, so they are given as e.g.
+        `face_backends.get_backend("yunet", model_path)`.
     Returns:
       image (bytes array):
         Bytes array for detected face image.
     """
 
-    if not os.path.isfile(image_path):
+    backend = _backend(backend, scale_factor, min_neighbors)
+
+    # Read the image
+    image = image_io.read_image(image_path, copy=copy)
+    if image is None:
         print("mocr:face_detection:detect_face No image found on given image path!")
         return None
 
-    # Create the haar cascade
-    cascade_path = os.path.join(
-        os.path.dirname(__file__), "haarcascades/haarcascade_frontalface_default.xml"
-    )
-    face_cascade = cv2.CascadeClassifier(cascade_path)
-    # Read the image
-    image = cv2.imread(image_path)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     # Detect faces in the image
-    faces = face_cascade.detectMultiScale(
-        gray,
-        scaleFactor=1.1,
-        minNeighbors=5,
-        minSize=(30, 30),
-        flags=cv2.CASCADE_SCALE_IMAGE,
+    faces = _detect_faces(
+        image, max_side, scale_factor, min_neighbors, min_size, backend
     )
     if len(faces) == 0 or len(faces) > 1:
         print(
@@ -45,62 +72,344 @@ def detect_face(image_path: str) -> bytearray:
     return cropped_face_image
 
 
-def detect_face_from_video(video_path: str) -> bytearray:
-    """Detect face from given video path.
+def detect_face_from_video(
+    video_path: str,
+    frame_stride: int = 1,
+    stride_msec: Optional[float] = None,
+    start_msec: float = 0.0,
+    max_side: Optional[int] = None,
+    max_frames: Optional[int] = None,
+    deadline: Optional[float] = None,
+    scale_factor: float = 1.1,
+    min_neighbors: int = 5,
+    min_size: Tuple[int, int] = (30, 30),
+    best_frame: bool = False,
+    detect_interval: int = 5,
+    backend: FaceBackend = "haar",
+) -> bytearray:
+    """Detect face from given video path. Frames are read one after another
+    until a frame with exactly one face is found, the stream ends or the
+    frame and time budget is used up. With best_frame the whole budget is
+    used, the cascade runs on every detect_interval-th frame, the face is
+    followed with optical flow in between and the sharpest and largest crop
+    is returned.
     Args:
       video_path (str):
         Path to input video on file system.
+      frame_stride (int):
+        Run detection on every n-th frame, frames in between are skipped
+        without being retrieved.
+      stride_msec (float):
+        Seek this many milliseconds forward after every inspected frame
+        instead of using frame_stride.
+      start_msec (float):
+        Position in milliseconds to start reading from.
+      max_side (int):
+        Detect on a grayscale copy downscaled to this longest side, the face
+        is cropped from the full resolution frame.
+      max_frames (int):
+        Maximum number of frames to inspect.
+      deadline (float):
+        Maximum number of seconds to spend on inspecting frames.
+      scale_factor (float):
+        How much the image size is reduced at each image scale.
+      min_neighbors (int):
+        How many neighbors each candidate rectangle should have to retain it.
+      min_size (tuple):
+        Minimum possible face size in pixels of the full resolution frame.
+      best_frame (bool):
+        Return the best face of all inspected frames instead of the first.
+      detect_interval (int):
+        Run the cascade on every n-th inspected frame when best_frame is
+        set, earlier when the face is lost.
+      backend (str or FaceDetectorBackend):
+        `haar` or `lbp` for the bundled cascades or a backend of
+        `face_backends`, the cascade settings above only apply to those two.
+        `yunet` and `ssd` load a local model, so they are given as e.g.
+        `face_backends.get_backend("yunet", model_path)`.
     Returns:
       image (bytes array):
         Bytes array for detected face image.
     """
 
+    backend = _backend(backend, scale_factor, min_neighbors)
     if not os.path.isfile(video_path):
         print(
             "mocr:face_detection:detect_face_from_video No video found on given video path!"
         )
         return None
 
-    # Create the haar cascade
-    cascade_path = os.path.join(
-        os.path.dirname(__file__), "haarcascades/haarcascade_frontalface_default.xml"
-    )
-    face_cascade = cv2.CascadeClassifier(cascade_path)
-
     video_capture = cv2.VideoCapture(video_path)
-    faces = []
-    cropped_face_image = None
-    frame = None
-    while True:
-        # Capture frame-by-frame
-        ret, frame = video_capture.read()
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30),
-            flags=cv2.CASCADE_SCALE_IMAGE,
+    try:
+        frames = _read_frames(
+            video_capture, frame_stride, stride_msec, start_msec, max_frames, deadline
         )
-        # Draw a rectangle around the faces
-        for (x, y, w, h) in faces:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            break
-
-        if len(faces) == 1:
-            break
+        detection = (max_side, scale_factor, min_neighbors, min_size, backend)
+        if best_frame:
+            cropped_face_image = _best_face(frames, detect_interval, *detection)
+        else:
+            cropped_face_image = _first_face(frames, *detection)
+    finally:
+        # When everything is done, release the capture
+        video_capture.release()
 
-    if len(faces) == 0 or len(faces) > 1:
+    if cropped_face_image is None:
         print(
             "mocr:face_detection:detect_face_from_video Video should does not contain a face!"
         )
         return None
+    return cropped_face_image
 
-    (x, y, w, h) = faces[0]
-    cropped_face_image = frame[y : y + h, x : x + w]
 
-    # When everything is done, release the capture
-    video_capture.release()
-    cv2.destroyAllWindows()
+def _read_frames(
+    video_capture: cv2.VideoCapture,
+    frame_stride: int,
+    stride_msec: Optional[float],
+    start_msec: float,
+    max_frames: Optional[int],
+    deadline: Optional[float],
+) -> Iterator:
+    if start_msec:
+        video_capture.set(cv2.CAP_PROP_POS_MSEC, start_msec)
+    position_msec = start_msec
+    started = time.monotonic()
+    inspected_frames = 0
+    while max_frames is None or inspected_frames < max_frames:
+        if deadline is not None and time.monotonic() - started >= deadline:
+            break
 
-    return cropped_face_image
+        # Capture frame-by-frame, stop cleanly at the end of the stream
+        ret, frame = video_capture.read()
+        if not ret or frame is None:
+            break
+        inspected_frames += 1
+        yield frame
+
+        # Skip the frames we never inspect
+        if stride_msec:
+            position_msec += stride_msec
+            video_capture.set(cv2.CAP_PROP_POS_MSEC, position_msec)
+        else:
+            for _ in range(frame_stride - 1):
+                if not video_capture.grab():
+                    break
+
+
+def _first_face(frames: Iterator, *detection) -> Optional[np.ndarray]:
+    for frame in frames:
+        faces = _detect_faces(frame, *detection)
+        if len(faces) == 1:
+            (x, y, w, h) = faces[0]
+            return frame[y : y + h, x : x + w]
+    return None
+
+
+def _best_face(
+    frames: Iterator,
+    detect_interval: int,
+    max_side: Optional[int] = None,
+    scale_factor: float = 1.1,
+    min_neighbors: int = 5,
+    min_size: Tuple[int, int] = (30, 30),
+    backend: FaceBackend = "haar",
+) -> Optional[np.ndarray]:
+    # crops of tracked frames are only candidates once the next detection
+    # finds the face where it was tracked to, so a drifting track can not
+    # win. Only the best confirmed and the best pending crop are kept.
+    backend = _backend(backend, scale_factor, min_neighbors)
+    (best, pending) = (None, None)
+    (box, points, previous) = (None, None, None)
+    since_detection = 0
+    for frame in frames:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if box is None or since_detection >= detect_interval:
+            # the grayscale frame is reused instead of converted again
+            faces = _detect_faces(
+                gray if backend.grayscale else frame,
+                max_side,
+                scale_factor,
+                min_neighbors,
+                min_size,
+                backend,
+            )
+            detected = faces[0] if len(faces) == 1 else None
+            if (
+                pending is not None
+                and detected is not None
+                and box is not None
+                and nms.iou(detected, box, xywh=True) >= 0.5
+            ):
+                best = max(best, pending, key=_score) if best else pending
+            (box, pending) = (detected, None)
+            points = None if box is None else _face_points(gray, box)
+            since_detection = 0
+            tracked = False
+        else:
+            (box, points) = _follow_face(previous, gray, box, points)
+            if box is None:
+                # a lost track can not be confirmed by the next detection
+                pending = None
+            tracked = True
+        since_detection += 1
+        previous = gray
+        if box is None:
+            continue
+
+        candidate = _face_candidate(frame, gray, box)
+        if candidate is None:
+            continue
+        if tracked:
+            pending = max(pending, candidate, key=_score) if pending else candidate
+        else:
+            best = max(best, candidate, key=_score) if best else candidate
+    return None if best is None else best[1]
+
+
+def _face_candidate(frame: np.ndarray, gray: np.ndarray, box: Tuple) -> Optional[Tuple]:
+    # scores a crop by its sharpness, the variance of the laplacian, times
+    # its share of the frame and copies it so the frame can be released
+    (height, width) = gray.shape[:2]
+    (x, y, w, h) = box
+    (start_x, start_y) = (max(0, x), max(0, y))
+    (end_x, end_y) = (min(width, x + w), min(height, y + h))
+    if end_x - start_x < 2 or end_y - start_y < 2:
+        return None
+    sharpness = cv2.Laplacian(gray[start_y:end_y, start_x:end_x], cv2.CV_64F).var()
+    size = (end_x - start_x) * (end_y - start_y) / float(height * width)
+    return (sharpness * size, frame[start_y:end_y, start_x:end_x].copy())
+
+
+def _score(candidate: Tuple) -> float:
+    return candidate[0]
+
+
+def _face_points(gray: np.ndarray, box: Tuple) -> Optional[np.ndarray]:
+    (x, y, w, h) = box
+    corners = cv2.goodFeaturesToTrack(
+        gray[max(0, y) : y + h, max(0, x) : x + w],
+        maxCorners=30,
+        qualityLevel=0.01,
+        minDistance=5,
+    )
+    if corners is None:
+        return None
+    return corners + np.float32((max(0, x), max(0, y)))
+
+
+def _follow_face(
+    previous: np.ndarray, gray: np.ndarray, box: Tuple, points: Optional[np.ndarray]
+) -> Tuple:
+    # moves the face box by the median optical flow of its corners, the face
+    # is lost when fewer than four corners are found again
+    if points is None or len(points) < 4:
+        return (None, None)
+    (moved, status, _) = cv2.calcOpticalFlowPyrLK(
+        previous, gray, points, None, winSize=(15, 15), maxLevel=2
+    )
+    found = status.reshape(-1).astype(bool)
+    if found.sum() < 4:
+        return (None, None)
+    (shift_x, shift_y) = np.median(moved[found] - points[found], axis=0).reshape(-1)
+    (x, y, w, h) = box
+    return ((int(round(x + shift_x)), int(round(y + shift_y)), w, h), moved[found])
+
+
+def detect_faces(
+    image_path: image_io.ImageSource,
+    max_side: Optional[int] = None,
+    scale_factor: float = 1.1,
+    min_neighbors: int = 5,
+    min_size: Tuple[int, int] = (30, 30),
+    backend: FaceBackend = "haar",
+) -> List[face_backends.FaceBox]:
+    """Detect all faces on given image and return their boxes.
+    Args:
+      image_path (str, bytes or numpy.ndarray):
+        Path to input image on file system, encoded image bytes or a decoded
+        BGR or grayscale image.
+      max_side (int):
+        Detect on a grayscale copy downscaled to this longest side.
+      scale_factor (float):
+        How much the image size is reduced at each image scale.
+      min_neighbors (int):
+        How many neighbors each candidate rectangle should have to retain it.
+      min_size (tuple):
+        Minimum possible face size in pixels of the full resolution image.
+      backend (str or FaceDetectorBackend):
+        `haar` or `lbp` for the bundled cascades or a backend of
+        `face_backends`, the cascade settings above only apply to those two.
+        `yunet` and `ssd` load a local model, so they are given as e.g.
+        `face_backends.get_backend("yunet", model_path)`.
+    Returns:
+      faces (array):
+        FaceBox (x, y, w, h) of every face in full resolution image
+        coordinates with the score of the backend.
+    """
+
+    backend = _backend(backend, scale_factor, min_neighbors)
+    image = image_io.read_image(image_path)
+    if image is None:
+        print("mocr:face_detection:detect_faces No image found on given image path!")
+        return None
+    return _detect_faces(
+        image, max_side, scale_factor, min_neighbors, min_size, backend
+    )
+
+
+def face_cascade(cascade_path: str = CASCADE_PATH) -> cv2.CascadeClassifier:
+    """Returns the cascade classifier for given path. A classifier can not be
+    used by two threads at the same time, so it is created once per thread
+    and then reused by every detection on that thread.
+    Args:
+      cascade_path (str):
+        Path to cascade on file system, the bundled haar cascade by default.
+    Returns:
+      classifier (cv2.CascadeClassifier):
+        Loaded cascade classifier.
+    """
+
+    return face_backends.cascade(cascade_path)
+
+
+def _backend(
+    backend: FaceBackend, scale_factor: float, min_neighbors: int
+) -> face_backends.FaceDetectorBackend:
+    # the bundled cascades are chosen by name with the cascade settings, the
+    # DNN detectors need a local model and are given as a backend instance
+    if not isinstance(backend, str):
+        return backend
+    if backend in ("yunet", "ssd"):
+        raise ValueError(
+            "The {0} backend needs a model, pass "
+            "face_backends.get_backend({0!r}, model_path)".format(backend)
+        )
+    return face_backends.get_backend(
+        backend, scale_factor=scale_factor, min_neighbors=min_neighbors
+    )
+
+
+def _detect_faces(
+    image: bytes,
+    max_side: Optional[int] = None,
+    scale_factor: float = 1.1,
+    min_neighbors: int = 5,
+    min_size: Tuple[int, int] = (30, 30),
+    backend: FaceBackend = "haar",
+) -> List[face_backends.FaceBox]:
+    # detect on a downscaled copy, grayscale for the cascades, and map the
+    # boxes back to the coordinates of the given image
+    backend = _backend(backend, scale_factor, min_neighbors)
+    if backend.grayscale and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    elif not backend.grayscale and image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    scale = 1.0
+    if max_side is not None and max(image.shape[:2]) > max_side:
+        scale = max_side / float(max(image.shape[:2]))
+        image = cv2.resize(
+            image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+    faces = backend.detect(
+        image, tuple(max(1, int(value * scale)) for value in min_size)
+    )
+    return [face.scaled(scale) for face in faces]
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import cv2
+import numpy as np
+
+from typing import Union
+
+# an image given as a path on file system, encoded bytes (e.g. an upload) or
+# an already decoded BGR array
+ImageSource = Union[str, bytes, bytearray, memoryview, np.ndarray]
+
+
+def read_image(source: ImageSource, copy: bool = False) -> np.ndarray:
+    """Returns the decoded image from given source without a disk round-trip
+    for in-memory data.
+    Args:
+      source (str, bytes, bytearray, memoryview or numpy.ndarray):
+        Path to image on file system, encoded image bytes or decoded image.
+      copy (bool):
+        Copy a decoded image given as array instead of using it as it is.
+    Returns:
+      image (numpy.ndarray):
+        Decoded BGR image, None if it could not be found or decoded.
+    """
+
+    if source is None:
+        return None
+
+    if isinstance(source, np.ndarray):
+        return source.copy() if copy else source
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # frombuffer wraps the given memory without copying it
+        buffer = np.frombuffer(memoryview(source).cast("B"), dtype=np.uint8)
+        if buffer.size == 0:
+            return None
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+    if not os.path.isfile(source):
+        return None
+    return cv2.imread(os.fspath(source))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+
+class _NullStage(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    __slots__ = ("_tracer", "_name", "_started")
+
+    def __init__(self, tracer, name: str):
+        self._tracer = tracer
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._tracer.timing(self._name, time.perf_counter() - self._started)
+        return False
+
+
+class Tracer(object):
+    """Tracer receives the timings and counters of the pipeline stages. The
+    base class ignores them and costs close to nothing, subclasses override
+    `timing` and `count` to record or export them. Methods may be called from
+    several threads at the same time when regions are recognized in parallel.
+
+    Stages: `load_image`, `resize_image`, `model_load`, `forward`,
+    `decode_predictions`, `nms`, `ocr` (every tesseract call) and `get_results`.
+    Counters: `candidates` (cells above min_confidence), `boxes` (boxes kept
+    after non-maxima suppression), `regions` (regions sent to tesseract),
+    `batch_size` (images in one batched forward pass), `tiles` (tiles of a
+    scan detected on their own), `skipped` (regions left out when the
+    latency budget ran out) and `keyframes` (video frames the detector ran
+    on).
+    """
+
+    enabled = False
+
+    def stage(self, name: str):
+        """Returns a context manager timing the enclosed block as given stage.
+        Args:
+          name (str):
+            Stage name.
+        """
+
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timing(self, name: str, seconds: float):
+        """Called with the duration of a stage.
+        Args:
+          name (str):
+            Stage name.
+          seconds (float):
+            Duration in seconds.
+        """
+
+    def count(self, name: str, value: int):
+        """Called with a counter value.
+        Args:
+          name (str):
+            Counter name.
+          value (int):
+            Counter value.
+        """
+
+
+NULL_TRACER = Tracer()
+
+
+class CallbackTracer(Tracer):
+    """CallbackTracer hands timings and counters to given callables, e.g. to
+    export them to a metrics system."""
+
+    enabled = True
+
+    def __init__(
+        self,
+        on_timing: Optional[Callable[[str, float], None]] = None,
+        on_count: Optional[Callable[[str, int], None]] = None,
+    ):
+        """Returns a CallbackTracer instance.
+        Args:
+          on_timing (callable):
+            Called with stage name and duration in seconds.
+          on_count (callable):
+            Called with counter name and value.
+        """
+
+        self.on_timing = on_timing
+        self.on_count = on_count
+
+    def timing(self, name: str, seconds: float):
+        if self.on_timing is not None:
+            self.on_timing(name, seconds)
+
+    def count(self, name: str, value: int):
+        if self.on_count is not None:
+            self.on_count(name, value)
+
+
+class RecordingTracer(Tracer):
+    """RecordingTracer keeps every timing and the sum of every counter in memory."""
+
+    enabled = True
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def timing(self, name: str, seconds: float):
+        with self._lock:
+            self.timings[name].append(seconds)
+
+    def count(self, name: str, value: int):
+        with self._lock:
+            self.counters[name] += value
+
+    def totals(self) -> Dict[str, float]:
+        """Returns the summed duration of every stage in seconds."""
+
+        with self._lock:
+            return {name: sum(values) for (name, values) in self.timings.items()}
+
+    def reset(self):
+        """Removes all recorded timings and counters."""
+
+        with self._lock:
+            self.timings.clear()
+            self.counters.clear()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import weakref
+import cv2
+
+from collections import OrderedDict, namedtuple
+from typing import Callable, Optional
+
+CachedModel = namedtuple("CachedModel", ["net", "lock", "path", "mtime"])
+CachedModel.__doc__ = """A loaded network together with the lock that guards its forward pass.
+Args:
+  net (cv2.dnn.Net):
+    Loaded network.
+  lock (threading.Lock):
+    Lock to hold around `setInput` and `forward`, a network keeps its input
+    as state so it can not run two forward passes at the same time.
+  path (str):
+    Absolute path the network was loaded from.
+  mtime (int):
+    Modification time of the file in nanoseconds when it was loaded.
+"""
+
+_caches = weakref.WeakSet()
+
+
+class ModelCache(object):
+    """ModelCache keeps loaded EAST detectors in memory and evicts the least
+    recently used one when more than `max_size` models are in use."""
+
+    def __init__(self, max_size: int = 4, loader: Optional[Callable] = None):
+        """Returns a ModelCache instance.
+        Args:
+          max_size (int):
+            Maximum number of models kept in memory.
+          loader (callable):
+            Function that loads a model from a path, `cv2.dnn.readNet` by default.
+        """
+
+        self.max_size = max_size
+        self.loader = loader if loader is not None else cv2.dnn.readNet
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def get(self, path: str) -> CachedModel:
+        """Returns the model for given path, loading it on first use or when
+        the file has changed on disk since it was loaded.
+        Args:
+          path (str):
+            Path to model on file system.
+        Returns:
+          model (CachedModel):
+            Cached model, None if there is no file on given path.
+        """
+
+        if not os.path.isfile(path):
+            print("mocr:model_cache:get No model found on given path!")
+            return None
+
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        key = (path, mtime)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+
+            # drop models loaded from an older version of the same file
+            for stale_key in [k for k in self._models if k[0] == path]:
+                del self._models[stale_key]
+
+            model = CachedModel(self.loader(path), threading.Lock(), path, mtime)
+            self._models[key] = model
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            return model
+
+    def preload(self, *paths: str):
+        """Loads given models ahead of time, e.g. at service startup.
+        Calling this in a parent process before forking workers lets every
+        worker share the loaded weights through copy-on-write memory.
+        Args:
+          paths (str):
+            Paths to models on file system.
+        """
+
+        for path in paths:
+            self.get(path)
+
+    def clear(self):
+        """Removes all models from the cache."""
+
+        with self._lock:
+            self._models.clear()
+
+    def _after_fork_in_child(self):
+        # a lock held by another thread while forking stays locked forever
+        # in the child, so give the child fresh locks and keep the inherited
+        # (copy-on-write shared) networks
+        self._lock = threading.Lock()
+        for key, model in self._models.items():
+            self._models[key] = model._replace(lock=threading.Lock())
+
+
+def _reinit_caches_after_fork():
+    for cache in list(_caches):
+        cache._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_caches_after_fork)
+
+_default_cache = ModelCache()
+
+
+def get_model(path: str) -> CachedModel:
+    """Returns the model for given path from the process-wide cache.
+    Args:
+      path (str):
+        Path to model on file system.
+    Returns:
+      model (CachedModel):
+        Cached model, None if there is no file on given path.
+    """
+
+    return _default_cache.get(path)
+
+
+def preload(*paths: str):
+    """Loads given models into the process-wide cache ahead of time.
+    Args:
+      paths (str):
+        Paths to models on file system.
+    """
+
+    _default_cache.preload(*paths)
+
+
+def clear():
+    """Removes all models from the process-wide cache."""
+
+    _default_cache.clear()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import cv2
+import numpy as np
+
+from typing import List, Optional, Sequence
+
+
+def iou(first: Sequence, second: Sequence, xywh: bool = False) -> float:
+    """Returns the intersection over union of two axis aligned boxes.
+    Args:
+      first (tuple):
+        start_x, start_y, end_x, end_y of the first box.
+      second (tuple):
+        start_x, start_y, end_x, end_y of the second box.
+      xywh (bool):
+        The boxes are given as x, y, width, height instead, like the faces
+        of `face_detection`.
+    Returns:
+      iou (float):
+        Overlap between 0 and 1, 0 when both boxes are empty.
+    """
+
+    if xywh:
+        first = (first[0], first[1], first[0] + first[2], first[1] + first[3])
+        second = (second[0], second[1], second[0] + second[2], second[1] + second[3])
+    width = min(first[2], second[2]) - max(first[0], second[0])
+    height = min(first[3], second[3]) - max(first[1], second[1])
+    intersection = max(0, width) * max(0, height)
+    union = (
+        (first[2] - first[0]) * (first[3] - first[1])
+        + (second[2] - second[0]) * (second[3] - second[1])
+        - intersection
+    )
+    return intersection / float(union) if union > 0 else 0.0
+
+
+def non_max_suppression_indices(
+    boxes: np.ndarray,
+    probs: Optional[np.ndarray] = None,
+    overlap_thresh: float = 0.3,
+    top_k: Optional[int] = None,
+) -> np.ndarray:
+    """Returns the indices of the boxes kept by greedy non-maxima suppression.
+    A box is suppressed when its overlap with a kept box, relative to its own
+    area, is greater than the threshold. This is the criterion of
+    `imutils.object_detection.non_max_suppression` so the same boxes are kept.
+    Args:
+      boxes (array):
+        (N, 4) array of start_x, start_y, end_x, end_y.
+      probs (array):
+        Confidence of every box, boxes are ordered by their end_y when not given.
+      overlap_thresh (float):
+        Overlap ratio above which a box is suppressed.
+      top_k (int):
+        Only consider the top_k most confident boxes.
+    Returns:
+      indices (array):
+        Indices of the kept boxes from the most to the least confident.
+    """
+
+    if len(boxes) == 0:
+        return np.empty((0,), dtype=np.int64)
+
+    boxes = np.asarray(boxes, dtype=np.float64)
+    (x1, y1, x2, y2) = (boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3])
+    # sort ascending and walk from the end, like imutils, so ties resolve the same
+    order = np.argsort(y2 if probs is None else np.asarray(probs))[::-1]
+    if top_k is not None:
+        order = order[:top_k]
+
+    (x1, y1, x2, y2) = (x1[order], y1[order], x2[order], y2[order])
+    area = (x2 - x1 + 1) * (y2 - y1 + 1)
+
+    # only boxes whose start_x lies within the widest box width before the
+    # kept box's end_x can intersect it, sorting by start_x turns these into
+    # one contiguous window per box
+    by_x = np.argsort(x1, kind="stable")
+    max_width = max(0.0, float(np.max(x2 - x1)))
+    window_start = np.searchsorted(x1[by_x], x1 - max_width, side="left")
+    window_end = np.searchsorted(x1[by_x], x2, side="right")
+
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        # less confident candidates in the window that are still alive
+        candidates = by_x[window_start[i] : window_end[i]]
+        candidates = candidates[(candidates > i) & ~suppressed[candidates]]
+        if len(candidates) == 0:
+            continue
+        # overlap of the kept box with all of them at once
+        w = np.maximum(
+            0, np.minimum(x2[i], x2[candidates]) - np.maximum(x1[i], x1[candidates]) + 1
+        )
+        h = np.maximum(
+            0, np.minimum(y2[i], y2[candidates]) - np.maximum(y1[i], y1[candidates]) + 1
+        )
+        overlap = (w * h) / area[candidates]
+        suppressed[candidates[overlap > overlap_thresh]] = True
+    return order[keep]
+
+
+def non_max_suppression(
+    boxes: np.ndarray,
+    probs: Optional[np.ndarray] = None,
+    overlap_thresh: float = 0.3,
+    top_k: Optional[int] = None,
+) -> np.ndarray:
+    """Applies non-maxima suppression to axis aligned boxes.
+    Args:
+      boxes (array):
+        (N, 4) array of start_x, start_y, end_x, end_y.
+      probs (array):
+        Confidence of every box.
+      overlap_thresh (float):
+        Overlap ratio above which a box is suppressed.
+      top_k (int):
+        Only consider the top_k most confident boxes.
+    Returns:
+      boxes (array):
+        Kept boxes as integers from the most to the least confident.
+    """
+
+    if len(boxes) == 0:
+        return np.empty((0, 4), dtype=np.int64)
+
+    indices = non_max_suppression_indices(boxes, probs, overlap_thresh, top_k)
+    return np.asarray(boxes)[indices].astype(np.int64)
+
+
+def rotated_non_max_suppression_indices(
+    rotated_rects: List,
+    probs: np.ndarray,
+    overlap_thresh: float = 0.3,
+    top_k: Optional[int] = None,
+) -> np.ndarray:
+    """Returns the indices of the rotated boxes kept by non-maxima suppression
+    with their rotated intersection over union, see `cv2.dnn.NMSBoxesRotated`.
+    Args:
+      rotated_rects (array):
+        ((center_x, center_y), (width, height), angle in degrees) of every box.
+      probs (array):
+        Confidence of every box.
+      overlap_thresh (float):
+        Intersection over union above which a box is suppressed.
+      top_k (int):
+        Only consider the top_k most confident boxes.
+    Returns:
+      indices (array):
+        Indices of the kept boxes from the most to the least confident.
+    """
+
+    if len(rotated_rects) == 0:
+        return np.empty((0,), dtype=np.int64)
+
+    # opencv only keeps scores strictly above the score threshold, take the
+    # next float32 below the lowest one so no box is dropped before suppression
+    score_threshold = np.nextafter(np.float32(np.min(probs)), np.float32(0))
+    indices = cv2.dnn.NMSBoxesRotated(
+        rotated_rects,
+        [float(prob) for prob in probs],
+        float(score_threshold),
+        overlap_thresh,
+        1.0,
+        top_k or 0,
+    )
+    return np.asarray(indices, dtype=np.int64).reshape(-1)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import numpy as np
+
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# digests of model files by (path, size, mtime) so a model is hashed once
+_model_digests = {}
+_model_digests_lock = threading.Lock()
+
+
+def image_digest(source) -> str:
+    """Returns the SHA-256 hex digest identifying an image.
+    Args:
+      source (bytes or numpy.ndarray):
+        Encoded image bytes or a decoded image, the digest of a decoded image
+        covers its shape and type as well as its pixels.
+    Returns:
+      digest (str):
+        Hex digest.
+    """
+
+    digest = hashlib.sha256()
+    if isinstance(source, np.ndarray):
+        digest.update(str((source.shape, source.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(source).data)
+    else:
+        digest.update(memoryview(source).cast("B"))
+    return digest.hexdigest()
+
+
+def model_digest(path: str) -> str:
+    """Returns the SHA-256 hex digest of a model file, a file is read again
+    only when its size or modification time changes.
+    Args:
+      path (str):
+        Path to model on file system.
+    Returns:
+      digest (str):
+        Hex digest, None if there is no file on given path.
+    """
+
+    if path is None or not os.path.isfile(path):
+        return None
+
+    stat = os.stat(path)
+    identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _model_digests_lock:
+        digest = _model_digests.get(identity)
+    if digest is None:
+        hasher = hashlib.sha256()
+        with open(path, "rb") as model_file:
+            for chunk in iter(lambda: model_file.read(1 << 20), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        with _model_digests_lock:
+            _model_digests[identity] = digest
+    return digest
+
+
+def result_key(image_digest: str, parameters: Dict) -> str:
+    """Returns the cache key of the results of an image recognized with given
+    parameters.
+    Args:
+      image_digest (str):
+        Digest of the image, see `image_digest`.
+      parameters (dict):
+        JSON serializable recognizer parameters that change the results.
+    Returns:
+      key (str):
+        Hex digest.
+    """
+
+    payload = json.dumps([image_digest, parameters], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache(object):
+    """ResultCache keeps recognition results by content, so the same card
+    submitted again is answered without running the detector and tesseract.
+    Results are kept in memory up to `max_entries` and, when a directory is
+    given, on disk up to `max_disk_bytes`. The least recently used entries
+    of both tiers are evicted first. Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ):
+        """Returns a ResultCache instance.
+        Args:
+          max_entries (int):
+            Maximum number of results kept in memory.
+          directory (str):
+            Directory of the disk tier, results are kept in memory only when
+            not given.
+          max_disk_bytes (int):
+            Maximum size of the result files in the directory.
+        """
+
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for (_, _, size) in self._disk_files())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[List]:
+        """Returns the results stored for given key.
+        Args:
+          key (str):
+            Cache key, see `result_key`.
+        Returns:
+          results (array):
+            Texts with bounding box coordinates, None on a miss.
+        """
+
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(results)
+
+        results = self._read(key)
+        with self._lock:
+            if results is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, results)
+        return results
+
+    def put(self, key: str, results: List):
+        """Stores the results for given key in memory and on disk.
+        Args:
+          key (str):
+            Cache key, see `result_key`.
+          results (array):
+            Texts with bounding box coordinates as returned by `get_results`.
+        """
+
+        results = [
+            (tuple(int(value) for value in box), str(text)) for (box, text) in results
+        ]
+        with self._lock:
+            self._remember(key, results)
+        if self.directory is not None:
+            self._write(key, results)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hits, disk_hits (hits served from disk), misses, entries in
+        memory and disk_bytes of the cache."""
+
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def clear(self):
+        """Removes all results from memory and disk and resets the statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if self.directory is not None:
+                for (path, _, _) in self._disk_files():
+                    _remove(path)
+                self._disk_bytes = 0
+
+    def _remember(self, key: str, results: List):
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def _read(self, key: str) -> Optional[List]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as result_file:
+                results = json.load(result_file)
+            # the modification time orders the files for eviction
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return [(tuple(box), text) for (box, text) in results]
+
+    def _write(self, key: str, results: List):
+        data = json.dumps([[list(box), text] for (box, text) in results]).encode()
+        # write to a temporary file and rename it so readers, also in other
+        # processes sharing the directory, never see a partial result
+        (handle, temporary_path) = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as result_file:
+            result_file.write(data)
+        path = self._path(key)
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.isfile(path) else 0
+            os.replace(temporary_path, path)
+            self._disk_bytes += len(data) - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        # the directory may be shared, recount before removing the least
+        # recently used files until the tier is back within its budget
+        files = sorted(self._disk_files(), key=lambda item: item[1])
+        self._disk_bytes = sum(size for (_, _, size) in files)
+        for (path, _, size) in files:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            if _remove(path):
+                self._disk_bytes -= size
+
+    def _disk_files(self) -> List:
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((entry.path, stat.st_mtime_ns, stat.st_size))
+        return files
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import numpy as np
+
+from collections import namedtuple
+from multiprocessing import shared_memory
+from typing import List, Tuple
+
+ImageDescriptor = namedtuple("ImageDescriptor", ["name", "shape", "dtype"])
+ImageDescriptor.__doc__ = """What a worker process needs to find a shared image.
+Args:
+  name (str):
+    Name of the shared memory segment.
+  shape (tuple):
+    Shape of the image.
+  dtype (str):
+    Type of the image pixels, e.g. `|u1`.
+"""
+
+
+class SharedImage(object):
+    """SharedImage copies a decoded image into shared memory once so worker
+    processes read it without pickling the pixels. The process that creates
+    it owns the segment and unlinks it on `close`, also when a worker died.
+    Use it as a context manager."""
+
+    def __init__(self, image: np.ndarray):
+        """Returns a SharedImage instance.
+        Args:
+          image (numpy.ndarray):
+            Decoded image.
+        """
+
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=max(1, image.nbytes)
+        )
+        self.array = np.ndarray(image.shape, dtype=image.dtype, buffer=self._memory.buf)
+        self.array[...] = image
+        self.descriptor = ImageDescriptor(
+            self._memory.name, image.shape, image.dtype.str
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """Releases and removes the shared memory segment."""
+
+        if self._memory is None:
+            return
+        # views on the buffer must be gone before the segment can be closed
+        self.array = None
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+
+
+def _open(name: str) -> shared_memory.SharedMemory:
+    # only the owner may unlink the segment. Before python 3.13 attaching
+    # registers the name with the resource tracker again, pool workers share
+    # the tracker of the process that started them so this is a no-op and
+    # the owner's unlink unregisters it once
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def recognize_regions(
+    descriptor: ImageDescriptor,
+    regions: List[Tuple[int, int, int, int]],
+    engine: str,
+    lang: str,
+    psm: int,
+) -> List[str]:
+    """Recognizes regions of a shared image, runs in a worker process.
+    Args:
+      descriptor (ImageDescriptor):
+        Shared image to read the regions from.
+      regions (array):
+        (start_x, start_y, end_x, end_y) of every region.
+      engine (str):
+        Tesseract engine name, see `tesseract_engine.get_engine`.
+      lang (str):
+        Language for tesseract.
+      psm (int):
+        Page segmentation mode.
+    Returns:
+      texts (array):
+        Text of every region in the given order.
+    """
+
+    from mocr import tesseract_engine
+
+    tesseract = tesseract_engine.get_engine(engine, lang)
+    memory = _open(descriptor.name)
+    try:
+        return _recognize(memory.buf, descriptor, regions, tesseract, psm)
+    finally:
+        try:
+            memory.close()
+        except BufferError:
+            # a traceback still holds a view, the mapping goes with the worker
+            pass
+
+
+def _recognize(buffer, descriptor, regions, tesseract, psm) -> List[str]:
+    # the view on the shared memory must not outlive this call so the
+    # segment can be closed afterwards
+    image = np.ndarray(
+        descriptor.shape, dtype=np.dtype(descriptor.dtype), buffer=buffer
+    )
+    return [
+        tesseract.image_to_string(image[start_y:end_y, start_x:end_x], psm=psm)
+        for (start_x, start_y, end_x, end_y) in regions
+    ]
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import string
+import cv2
+
+from mocr import face_detection, image_io, nms, tesseract_engine
+from mocr.text_recognition import shared_executor
+from collections import namedtuple
+from typing import List, Optional, Sequence, Tuple
+
+Field = namedtuple("Field", ["name", "box", "psm", "variables"])
+Field.__new__.__defaults__ = (tesseract_engine.PSM_SINGLE_LINE, None)
+Field.__doc__ = """Named text field at a fixed position of a card layout.
+Args:
+  name (str):
+    Name of the field, e.g. `surname`.
+  box (tuple):
+    (start_x, start_y, end_x, end_y) relative to the card width and height.
+  psm (int):
+    Page segmentation mode, a single line by default.
+  variables (dict):
+    Tesseract variables for the field, e.g. `tessedit_char_whitelist`.
+"""
+
+CardTemplate = namedtuple("CardTemplate", ["name", "aspect_ratio", "face", "fields"])
+CardTemplate.__doc__ = """Layout of a known identity card.
+Args:
+  name (str):
+    Name of the layout.
+  aspect_ratio (float):
+    Width divided by height of the card.
+  face (tuple):
+    (x, y, w, h) of the portrait face relative to the card width and height.
+  fields (tuple):
+    Fields of the card.
+"""
+
+CardFields = namedtuple("CardFields", ["template", "fields", "boxes", "face_box"])
+CardFields.__doc__ = """Named texts read from a card with a known layout.
+Args:
+  template (str):
+    Name of the matched layout.
+  fields (dict):
+    Text of every field by name in the order of the layout.
+  boxes (dict):
+    (start_x, start_y, end_x, end_y) of every field by name in image
+    coordinates.
+  face_box (tuple):
+    (x, y, w, h) of the face the layout was matched with.
+"""
+
+# whitelists keep tesseract from reading background patterns as letters,
+# names and places keep their hyphens, apostrophes and spaces
+_DIGITS = {"tessedit_char_whitelist": string.digits}
+_LETTERS = {"tessedit_char_whitelist": string.ascii_letters + "-' "}
+_UPPERCASE = {"tessedit_char_whitelist": string.ascii_uppercase + "-' "}
+_UPPERCASE_DIGITS = {"tessedit_char_whitelist": string.ascii_uppercase + string.digits}
+
+UK_IDENTITY_CARD = CardTemplate(
+    "uk_identity_card",
+    1.552,
+    (0.051, 0.483, 0.256, 0.398),
+    (
+        Field("document_number", (0.71, 0.02, 0.99, 0.12), variables=_DIGITS),
+        Field("surname", (0.16, 0.19, 0.45, 0.28), variables=_LETTERS),
+        Field("given_names", (0.16, 0.27, 0.45, 0.36), variables=_LETTERS),
+        Field(
+            "sex",
+            (0.35, 0.535, 0.43, 0.6),
+            tesseract_engine.PSM_SINGLE_CHAR,
+            {"tessedit_char_whitelist": "FMX"},
+        ),
+        Field("nationality", (0.44, 0.535, 0.75, 0.6), variables=_LETTERS),
+        Field(
+            "date_of_birth",
+            (0.35, 0.625, 0.62, 0.7),
+            variables={"tessedit_char_whitelist": string.digits + "-"},
+        ),
+        Field("place_of_birth", (0.64, 0.625, 0.85, 0.7), variables=_LETTERS),
+        Field(
+            "date_of_issue",
+            (0.35, 0.735, 0.62, 0.8),
+            variables={"tessedit_char_whitelist": string.digits + "-"},
+        ),
+        Field(
+            "date_of_expiry",
+            (0.35, 0.845, 0.62, 0.93),
+            variables={"tessedit_char_whitelist": string.digits + "-"},
+        ),
+    ),
+)
+
+DE_IDENTITY_CARD = CardTemplate(
+    "de_identity_card",
+    1.585,
+    (0.078, 0.35, 0.284, 0.45),
+    (
+        Field("document_number", (0.69, 0.02, 0.96, 0.1), variables=_UPPERCASE_DIGITS),
+        Field("surname", (0.43, 0.14, 0.66, 0.205), variables=_UPPERCASE),
+        Field("birth_name", (0.43, 0.205, 0.67, 0.27)),
+        Field("given_names", (0.43, 0.315, 0.62, 0.38), variables=_UPPERCASE),
+        Field(
+            "date_of_birth",
+            (0.43, 0.455, 0.645, 0.52),
+            variables={"tessedit_char_whitelist": string.digits + "."},
+        ),
+        Field("nationality", (0.655, 0.455, 0.82, 0.52), variables=_UPPERCASE),
+        Field("place_of_birth", (0.43, 0.565, 0.62, 0.63), variables=_UPPERCASE),
+        Field(
+            "date_of_expiry",
+            (0.43, 0.695, 0.645, 0.76),
+            variables={"tessedit_char_whitelist": string.digits + "."},
+        ),
+        Field("card_access_number", (0.78, 0.67, 0.97, 0.75), variables=_DIGITS),
+    ),
+)
+
+TEMPLATES = (UK_IDENTITY_CARD, DE_IDENTITY_CARD)
+
+
+def match_template(
+    height: int,
+    width: int,
+    face_box: Tuple[int, int, int, int],
+    templates: Sequence[CardTemplate] = TEMPLATES,
+    aspect_tolerance: float = 0.05,
+    min_overlap: float = 0.6,
+) -> Optional[CardTemplate]:
+    """Returns the layout of a card from its aspect ratio and where its face
+    is. Cards of the same format have the same aspect ratio, so the layout
+    whose portrait overlaps the face the most is picked.
+    Args:
+      height (int):
+        Height of the card image.
+      width (int):
+        Width of the card image.
+      face_box (tuple):
+        (x, y, w, h) of the face in image coordinates.
+      templates (array):
+        Layouts to choose from.
+      aspect_tolerance (float):
+        Maximum relative difference of the aspect ratios.
+      min_overlap (float):
+        Minimum intersection over union of the face and the portrait of the
+        layout.
+    Returns:
+      template (CardTemplate):
+        Matching layout, None if no layout matches.
+    """
+
+    if height <= 0 or width <= 0 or face_box is None:
+        return None
+    aspect_ratio = width / float(height)
+    (x, y, w, h) = face_box
+    face = (x / float(width), y / float(height), w / float(width), h / float(height))
+
+    best = (min_overlap, None)
+    for template in templates:
+        if abs(aspect_ratio / template.aspect_ratio - 1.0) > aspect_tolerance:
+            continue
+        overlap = nms.iou(face, template.face, xywh=True)
+        if overlap >= best[0]:
+            best = (overlap, template)
+    return best[1]
+
+
+def field_boxes(
+    template: CardTemplate, height: int, width: int
+) -> List[Tuple[int, int, int, int]]:
+    """Returns the boxes of the fields of a layout on a card of given size.
+    Args:
+      template (CardTemplate):
+        Layout of the card.
+      height (int):
+        Height of the card image.
+      width (int):
+        Width of the card image.
+    Returns:
+      boxes (array):
+        (start_x, start_y, end_x, end_y) of every field in image coordinates.
+    """
+
+    return [
+        (
+            int(round(start_x * width)),
+            int(round(start_y * height)),
+            int(round(end_x * width)),
+            int(round(end_y * height)),
+        )
+        for (start_x, start_y, end_x, end_y) in (field.box for field in template.fields)
+    ]
+
+
+def extract_fields(
+    image_path: image_io.ImageSource,
+    templates: Sequence[CardTemplate] = TEMPLATES,
+    face_box: Optional[Tuple[int, int, int, int]] = None,
+    engine="auto",
+    lang: str = "eng",
+    max_workers: int = 1,
+    face_max_side: Optional[int] = None,
+    copy: bool = False,
+) -> CardFields:
+    """Reads the named fields of a card with a known layout. The layout is
+    matched from the aspect ratio and the face, then only the fields are
+    recognized, the EAST detector is not run. The image is expected to be
+    cropped to the card like the samples in `tests/data`.
+    Args:
+      image_path (str, bytes or numpy.ndarray):
+        Path to input image on file system, encoded image bytes or a decoded
+        image.
+      templates (array):
+        Layouts to choose from.
+      face_box (tuple):
+        (x, y, w, h) of the face when it is already known, it is detected
+        otherwise.
+      engine (str or object):
+        Tesseract engine name, see `tesseract_engine.get_engine`, or an engine
+        instance with an `image_to_string` method.
+      lang (str):
+        Language for tesseract.
+      max_workers (int):
+        Number of threads recognizing fields in parallel.
+      face_max_side (int):
+        Detect the face on a copy downscaled to this longest side.
+      copy (bool):
+        Copy a decoded image given as image_path before using it.
+    Returns:
+      fields (CardFields):
+        Named texts of the card, None if the image could not be read or no
+        layout matches, e.g. to fall back to `TextRecognizer`.
+    """
+
+    image = image_io.read_image(image_path, copy=copy)
+    if image is None:
+        print("mocr:templates:extract_fields No image found on given image path!")
+        return None
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    if face_box is None:
+        faces = face_detection.detect_faces(gray, max_side=face_max_side)
+        if len(faces) != 1:
+            print("mocr:templates:extract_fields Identity cards should have a face!")
+            return None
+        face_box = faces[0]
+
+    (height, width) = gray.shape[:2]
+    template = match_template(height, width, face_box, templates)
+    if template is None:
+        print("mocr:templates:extract_fields No template matches the card!")
+        return None
+
+    if isinstance(engine, str):
+        engine = tesseract_engine.get_engine(engine, lang)
+    boxes = field_boxes(template, height, width)
+
+    def recognize(index):
+        field = template.fields[index]
+        (start_x, start_y, end_x, end_y) = boxes[index]
+        roi = gray[start_y:end_y, start_x:end_x]
+        return engine.image_to_string(roi, psm=field.psm, variables=field.variables)
+
+    indices = range(len(template.fields))
+    if max_workers > 1:
+        texts = list(shared_executor(max_workers).map(recognize, indices))
+    else:
+        texts = [recognize(index) for index in indices]
+
+    names = [field.name for field in template.fields]
+    return CardFields(
+        template.name,
+        dict(zip(names, (text.strip() for text in texts))),
+        dict(zip(names, boxes)),
+        tuple(face_box),
+    )
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shlex
+import ctypes
+import ctypes.util
+import threading
+import numpy as np
+import pytesseract
+
+from typing import Dict, Optional
+
+# Tesseract page segmentation mode treating the image as a single text line
+PSM_SINGLE_LINE = 7
+# Tesseract page segmentation mode treating the image as a single character
+PSM_SINGLE_CHAR = 10
+# Tesseract OCR engine mode using only the LSTM neural net model
+OEM_LSTM_ONLY = 1
+
+_LIBRARY_NAMES = ("tesseract", "libtesseract.so.5", "libtesseract.so.4", "tesseract50")
+
+
+class PytesseractEngine(object):
+    """PytesseractEngine runs the `tesseract` executable through pytesseract,
+    it starts one process per call and is used when libtesseract can not be loaded."""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = "eng", oem: int = OEM_LSTM_ONLY):
+        """Returns a PytesseractEngine instance.
+        Args:
+          lang (str):
+            Language for tessaract.
+          oem (int):
+            OCR engine mode.
+        """
+
+        self.lang = lang
+        self.oem = oem
+
+    @property
+    def key(self) -> str:
+        """Identifies the engine and its settings."""
+
+        return "pytesseract/{}/{}".format(self.lang, self.oem)
+
+    def config(self, psm: int, variables: Optional[Dict[str, str]] = None) -> str:
+        """Returns the command line configuration for given settings.
+        Args:
+          psm (int):
+            Page segmentation mode.
+          variables (dict):
+            Tesseract variables such as `tessedit_char_whitelist`.
+        Returns:
+          config (str):
+            Command line arguments for tesseract.
+        """
+
+        config = str.format("-l {0} --oem {1} --psm {2}", self.lang, self.oem, psm)
+        for key, value in sorted((variables or {}).items()):
+            # pytesseract splits the configuration like a shell, so values
+            # with spaces or quotes are quoted
+            config += " -c " + shlex.quote(str.format("{0}={1}", key, value))
+        return config
+
+    def image_to_string(
+        self,
+        image: bytes,
+        psm: int = PSM_SINGLE_LINE,
+        variables: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Recognizes the text on given image.
+        Args:
+          image (bytes):
+            Image data.
+          psm (int):
+            Page segmentation mode.
+          variables (dict):
+            Tesseract variables such as `tessedit_char_whitelist`.
+        Returns:
+          text (str):
+            Recognized text.
+        """
+
+        return pytesseract.image_to_string(image, config=self.config(psm, variables))
+
+    def close(self):
+        pass
+
+
+class CAPIEngine(object):
+    """CAPIEngine calls libtesseract in-process through its C API. Every thread
+    keeps one initialized API handle, so the traineddata is loaded once per
+    worker and images are handed over as in-memory buffers."""
+
+    name = "capi"
+
+    def __init__(
+        self,
+        lang: str = "eng",
+        oem: int = OEM_LSTM_ONLY,
+        library: Optional[str] = None,
+        datapath: Optional[str] = None,
+    ):
+        """Returns a CAPIEngine instance.
+        Args:
+          lang (str):
+            Language for tessaract.
+          oem (int):
+            OCR engine mode.
+          library (str):
+            Path or name of the tesseract shared library, looked up on the
+            system when not given.
+          datapath (str):
+            Parent directory of tessdata, `TESSDATA_PREFIX` is used when not given.
+        Raises:
+          OSError: If the tesseract shared library can not be loaded.
+        """
+
+        self.lang = lang
+        self.oem = oem
+        self.datapath = datapath
+        self._lib = _load_library(library)
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+
+    @property
+    def key(self) -> str:
+        """Identifies the engine and its settings."""
+
+        return "capi/{}/{}/{}".format(self.lang, self.oem, self.datapath or "")
+
+    def _api(self, psm: int, variables: Optional[Dict[str, str]]) -> int:
+        # variables stay set on a handle, so every thread keeps one handle per
+        # distinct set of variables instead of resetting them on each call
+        key = tuple(sorted((variables or {}).items()))
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(key)
+        if api is None:
+            api = self._lib.TessBaseAPICreate()
+            datapath = self.datapath.encode("utf-8") if self.datapath else None
+            if self._lib.TessBaseAPIInit2(
+                api, datapath, self.lang.encode("utf-8"), self.oem
+            ):
+                self._lib.TessBaseAPIDelete(api)
+                raise RuntimeError(
+                    "mocr:tesseract_engine:CAPIEngine Could not initialize tesseract for "
+                    + self.lang
+                )
+            for name, value in key:
+                self._lib.TessBaseAPISetVariable(
+                    api, name.encode("utf-8"), str(value).encode("utf-8")
+                )
+            apis[key] = api
+            with self._handles_lock:
+                self._handles.append(api)
+        self._lib.TessBaseAPISetPageSegMode(api, psm)
+        return api
+
+    def image_to_string(
+        self,
+        image: bytes,
+        psm: int = PSM_SINGLE_LINE,
+        variables: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """Recognizes the text on given image.
+        Args:
+          image (bytes):
+            Image data with 1, 3 or 4 channels.
+          psm (int):
+            Page segmentation mode.
+          variables (dict):
+            Tesseract variables such as `tessedit_char_whitelist`.
+        Returns:
+          text (str):
+            Recognized text.
+        """
+
+        if image is None or image.size == 0:
+            return ""
+
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        (height, width) = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        api = self._api(psm, variables)
+        self._lib.TessBaseAPISetImage(
+            api, image.ctypes.data, width, height, bytes_per_pixel, image.strides[0]
+        )
+        text_pointer = self._lib.TessBaseAPIGetUTF8Text(api)
+        try:
+            text = (
+                ctypes.string_at(text_pointer).decode("utf-8") if text_pointer else ""
+            )
+        finally:
+            if text_pointer:
+                self._lib.TessDeleteText(text_pointer)
+            self._lib.TessBaseAPIClear(api)
+        return text
+
+    def close(self):
+        """Releases the API handles of all threads."""
+
+        with self._handles_lock:
+            handles, self._handles = self._handles, []
+        for api in handles:
+            self._lib.TessBaseAPIEnd(api)
+            self._lib.TessBaseAPIDelete(api)
+        self._local = threading.local()
+
+
+# OMP_THREAD_LIMIT when libtesseract was loaded, None until then
+_loaded_thread_limit = None
+
+
+def _load_library(library: Optional[str] = None):
+    global _loaded_thread_limit
+    names = (library,) if library else _LIBRARY_NAMES
+    for name in names:
+        path = ctypes.util.find_library(name) or name
+        try:
+            lib = ctypes.CDLL(path)
+        except OSError:
+            continue
+        lib.TessBaseAPICreate.restype = ctypes.c_void_p
+        lib.TessBaseAPIInit2.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_int,
+        ]
+        lib.TessBaseAPIInit2.restype = ctypes.c_int
+        lib.TessBaseAPISetVariable.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+        ]
+        lib.TessBaseAPISetVariable.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [
+            ctypes.c_void_p,
+            ctypes.c_void_p,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_int,
+        ]
+        lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIClear.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIEnd.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+        # OpenMP read the thread limit when the library was loaded
+        _loaded_thread_limit = os.environ.get("OMP_THREAD_LIMIT", "")
+        return lib
+    raise OSError("mocr:tesseract_engine No tesseract shared library found!")
+
+
+def limit_threads(threads: int = 1) -> bool:
+    """Limits the OpenMP threads tesseract starts for every recognition. The
+    tesseract executable inherits the limit on every call, but libtesseract
+    only reads it when it is loaded by the first CAPIEngine, so it has to be
+    called before the first in-process recognition. A limit that was set in
+    the environment by the user is kept.
+    Args:
+      threads (int):
+        Maximum number of OpenMP threads per recognition.
+    Returns:
+      limited (bool):
+        Whether the in-process engine follows the limit, False when
+        libtesseract was loaded before with another one.
+    """
+
+    limit = os.environ.setdefault("OMP_THREAD_LIMIT", str(threads))
+    return _loaded_thread_limit is None or _loaded_thread_limit == limit
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(engine: str = "auto", lang: str = "eng"):
+    """Returns a process-wide shared recognizer engine.
+    Args:
+      engine (str):
+        `capi` for in-process libtesseract, `pytesseract` for the tesseract
+        executable or `auto` to use libtesseract when it can be loaded and
+        fall back to pytesseract otherwise.
+      lang (str):
+        Language for tessaract.
+    Returns:
+      engine (CAPIEngine or PytesseractEngine):
+        Engine to recognize texts with.
+    Raises:
+      ValueError: If the engine name is unknown.
+    """
+
+    if engine not in ("auto", CAPIEngine.name, PytesseractEngine.name):
+        raise ValueError("mocr:tesseract_engine:get_engine Unknown engine " + engine)
+
+    with _engines_lock:
+        key = (engine, lang)
+        if key not in _engines:
+            if engine == PytesseractEngine.name:
+                _engines[key] = PytesseractEngine(lang)
+            elif engine == CAPIEngine.name:
+                _engines[key] = CAPIEngine(lang)
+            else:
+                try:
+                    _engines[key] = CAPIEngine(lang)
+                except OSError:
+                    _engines[key] = PytesseractEngine(lang)
+        return _engines[key]
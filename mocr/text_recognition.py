@@ -3,12 +3,207 @@
 
 import os
 import sys
+import time
+import threading
 import cv2
 import numpy as np
-import pytesseract
 
-from imutils.object_detection import non_max_suppression
-from typing import List, Tuple
+from collections import namedtuple
+from mocr import (
+    detector_backends,
+    image_io,
+    instrumentation,
+    model_cache,
+    nms,
+    result_cache,
+    tesseract_engine,
+)
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import List, Optional, Tuple, Union
+
+# mean pixel values of the ImageNet training set subtracted from the input
+_EAST_MEAN = (123.68, 116.78, 103.94)
+
+Detection = namedtuple(
+    "Detection", ["boxes", "confidences", "ratio_height", "ratio_width"]
+)
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def shared_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Returns the process-wide thread pool with given number of workers.
+    Worker threads outlive a single card so the tesseract handles they
+    initialized are reused by the next recognizer with the same pool size.
+    Args:
+      max_workers (int):
+        Number of threads of the pool.
+    Returns:
+      executor (ThreadPoolExecutor):
+        Pool shared by every caller asking for the same number of workers.
+    """
+
+    with _executors_lock:
+        if max_workers not in _executors:
+            _executors[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="mocr-ocr"
+            )
+        return _executors[max_workers]
+
+
+def fit_input_size(height: int, width: int, max_pixels: int) -> Tuple[int, int]:
+    """Returns the input size for the EAST detector closest to the aspect ratio
+    of an image with both sides a multiple of 32 and at most max_pixels pixels.
+    Images within the budget are not scaled up.
+    Args:
+      height (int):
+        Image height.
+      width (int):
+        Image width.
+      max_pixels (int):
+        Pixel budget of the forward pass, e.g. 640 * 640.
+    Returns:
+      (width, height): Input size, multiples of 32.
+    """
+
+    scale = min(1.0, (max_pixels / float(height * width)) ** 0.5)
+    new_width = max(32, int(round(width * scale / 32.0)) * 32)
+    new_height = max(32, int(round(height * scale / 32.0)) * 32)
+    # rounding to the nearest multiple may exceed the budget, shrink the side
+    # that was rounded up the most until it fits
+    while new_width * new_height > max_pixels and max(new_width, new_height) > 32:
+        if new_width / (width * scale) >= new_height / (height * scale):
+            new_width = max(32, new_width - 32)
+        else:
+            new_height = max(32, new_height - 32)
+    return (new_width, new_height)
+
+
+def group_lines(
+    boxes: List, min_overlap: float = 0.5, max_gap: float = 1.0
+) -> List[Tuple[int, int, int, int]]:
+    """Groups word boxes into text lines. Going from left to right, a box
+    joins the line it overlaps most vertically when the overlap is at least
+    min_overlap of the lower of the two and the horizontal gap to the end of
+    the line is at most max_gap times the taller of the two.
+    Args:
+      boxes (array):
+        (start_x, start_y, end_x, end_y) of every word box.
+      min_overlap (float):
+        Minimum vertical overlap relative to the lower height.
+      max_gap (float):
+        Maximum horizontal gap relative to the taller height.
+    Returns:
+      lines (array):
+        (start_x, start_y, end_x, end_y) of every line, the union of its boxes.
+    """
+
+    return _group_lines(boxes, min_overlap, max_gap)[0]
+
+
+def _group_lines(boxes: List, min_overlap: float, max_gap: float) -> Tuple:
+    # returns the lines and the indices of the boxes on every line
+    (lines, members) = ([], [])
+    order = sorted(range(len(boxes)), key=lambda index: boxes[index][0])
+    for box_index in order:
+        (start_x, start_y, end_x, end_y) = boxes[box_index]
+        height = end_y - start_y
+        best = None
+        best_overlap = 0.0
+        for (index, line) in enumerate(lines):
+            line_height = line[3] - line[1]
+            overlap = min(end_y, line[3]) - max(start_y, line[1])
+            overlap /= float(max(1, min(height, line_height)))
+            gap = start_x - line[2]
+            if (
+                overlap >= min_overlap
+                and overlap > best_overlap
+                and gap <= max_gap * max(height, line_height)
+            ):
+                (best, best_overlap) = (index, overlap)
+        if best is None:
+            lines.append([start_x, start_y, end_x, end_y])
+            members.append([box_index])
+        else:
+            line = lines[best]
+            lines[best] = [
+                min(line[0], start_x),
+                min(line[1], start_y),
+                max(line[2], end_x),
+                max(line[3], end_y),
+            ]
+            members[best].append(box_index)
+    return ([tuple(int(value) for value in line) for line in lines], members)
+
+
+def _tile_origins(height: int, width: int, tile_size: int, overlap: int) -> List:
+    # the last tile of a row or column is aligned with the image border so
+    # no tile is smaller than necessary
+    stride = max(32, tile_size - overlap)
+
+    def starts(side):
+        last = max(0, side - tile_size)
+        return sorted(set(list(range(0, last, stride)) + [last]))
+
+    return [(top, left) for top in starts(height) for left in starts(width)]
+
+
+class Results(list):
+    """Texts with bounding box coordinates from top to bottom. When the
+    latency budget of the recognizer runs out only part of the regions is
+    recognized, `skipped` is the number of regions left out."""
+
+    skipped = 0
+
+    @property
+    def complete(self) -> bool:
+        """Whether every region was recognized."""
+
+        return self.skipped == 0
+
+    @classmethod
+    def from_texts(cls, regions: List, order: List, texts: List) -> "Results":
+        """Pairs the regions with their texts from top to bottom.
+        Args:
+          regions (array):
+            Regions in the order they were detected.
+          order (array):
+            Indices of the regions in the order they were recognized.
+          texts (array):
+            Text of every region in that order, None for skipped regions.
+        Returns:
+          results (Results):
+            Texts with bounding box coordinates from top to bottom.
+        """
+
+        # regions starting on the same row keep the order they were detected in
+        results = cls(
+            (regions[index], text)
+            for (index, text) in sorted(zip(order, texts))
+            if text is not None
+        )
+        results.sort(key=lambda r: r[0][1])
+        results.skipped = len(regions) - len(results)
+        return results
+
+
+def _by_priority(regions: List, confidences: Optional[List]) -> List:
+    # the most confident and largest regions carry the most text, they are
+    # recognized first when the budget may not cover every region, returns
+    # the indices of the regions in that order
+    def priority(index):
+        (start_x, start_y, end_x, end_y) = regions[index]
+        area = max(0, end_x - start_x) * max(0, end_y - start_y)
+        confidence = 1.0 if confidences is None else float(confidences[index])
+        return confidence * area
+
+    return sorted(range(len(regions)), key=priority, reverse=True)
 
 
 class TextRecognizer(object):
@@ -16,18 +211,36 @@ class TextRecognizer(object):
 
     def __init__(
         self,
-        image_path: str,
+        image_path: image_io.ImageSource,
         east_path: str,
         min_confidence: float = 0.5,
         width: int = 320,
         height: int = 320,
         padding: float = 0.0,
         lang: str = "eng",
+        engine: str = "auto",
+        max_workers: int = 1,
+        executor: Optional[Executor] = None,
+        copy: bool = False,
+        tracer: Optional[instrumentation.Tracer] = None,
+        nms_mode: str = "axis",
+        nms_threshold: float = 0.3,
+        nms_top_k: Optional[int] = None,
+        max_pixels: Optional[int] = None,
+        tile_size: Optional[int] = None,
+        tile_overlap: int = 128,
+        merge_lines: bool = False,
+        line_overlap: float = 0.5,
+        line_gap: float = 1.0,
+        deadline: Optional[float] = None,
+        max_regions: Optional[int] = None,
+        backend: Union[str, detector_backends.DetectorBackend] = "opencv",
     ):
         """Returns a TextRecognizer instance.
         Args:
-          image_path (str):
-            Path to input image on file system.
+          image_path (str, bytes or numpy.ndarray):
+            Path to input image on file system, encoded image bytes or a
+            decoded image.
           east_path (str):
             Path to input EAST text detector on file system.
           min_confidence (float):
@@ -40,8 +253,74 @@ class TextRecognizer(object):
             Amount of padding to add to each border of ROI.
           lang (str):
             Language for tessaract.
+          engine (str or object):
+            Tesseract engine, `auto`, `capi`, `pytesseract` or an engine
+            instance with an `image_to_string` method. Results of an engine
+            instance are cached under its `key` when it has one, so engines
+            with different settings do not share them.
+          max_workers (int):
+            Number of threads recognizing regions in parallel, pools are
+            shared by recognizers with the same number of workers. Tesseract
+            is limited to one OpenMP thread per region, which only applies to
+            libtesseract when this recognizer is created before the first
+            in-process recognition, see `tesseract_engine.limit_threads`.
+          executor (Executor):
+            Thread pool to recognize regions with instead of max_workers. A
+            ProcessPoolExecutor reads the image from shared memory, the
+            engine must be given by name then and Python 3.8 is required.
+          copy (bool):
+            Copy a decoded image given as image_path before using it.
+          tracer (Tracer):
+            Receives the timings and counters of every stage, nothing is
+            recorded when not given.
+          nms_mode (str):
+            `axis` suppresses overlapping axis aligned boxes, `rotated`
+            suppresses by the intersection over union of the rotated boxes
+            predicted by EAST which keeps skewed lines apart.
+          nms_threshold (float):
+            Overlap above which a less confident box is suppressed.
+          nms_top_k (int):
+            Only the top_k most confident candidates go through non-maxima
+            suppression, all of them when not given.
+          max_pixels (int):
+            Resize to the aspect preserving multiple of 32 with at most this
+            many pixels instead of width and height, see `fit_input_size`.
+          tile_size (int):
+            Detect on overlapping tiles of this size at full resolution when
+            the image is larger, see `detect_tiled`.
+          tile_overlap (int):
+            Overlap of neighbouring tiles in pixels. It should exceed the
+            widest text box, since tiles side by side must both hold a whole
+            word, and the height of a text line for tiles above each other.
+          merge_lines (bool):
+            Group the word boxes into text lines and recognize every line
+            with one tesseract call, see `group_lines`.
+          line_overlap (float):
+            Vertical overlap of two boxes on the same line relative to the
+            lower box.
+          line_gap (float):
+            Horizontal gap between two boxes on the same line relative to
+            the line height.
+          deadline (float):
+            Seconds after which no more regions are recognized, counted from
+            the start of `recognize` or `get_results`. Regions are recognized
+            by confidence and area and the results are partial, see `Results`.
+          max_regions (int):
+            Maximum number of regions recognized, the most confident and
+            largest ones.
+          backend (str or DetectorBackend):
+            Runtime of the EAST detector, `opencv`, `onnxruntime` for an
+            exported model given as east_path or a backend instance, e.g.
+            `OpenCVBackend("openvino")`, see `detector_backends`.
         """
 
+        if nms_mode not in ("axis", "rotated"):
+            raise ValueError("Unknown nms mode {!r}".format(nms_mode))
+        if isinstance(executor, ProcessPoolExecutor) and not isinstance(engine, str):
+            raise ValueError("Worker processes need the engine by name")
+        if isinstance(executor, ProcessPoolExecutor) and sys.version_info < (3, 8):
+            raise ValueError("Worker processes need Python 3.8 for shared memory")
+
         self.image_path = image_path
         self.east_path = east_path
         self.min_confidence = min_confidence
@@ -49,6 +328,38 @@ class TextRecognizer(object):
         self.height = height
         self.padding = padding
         self.lang = lang
+        self.engine = engine
+        self.max_workers = max_workers
+        self.executor = executor
+        self.copy = copy
+        self.tracer = tracer if tracer is not None else instrumentation.NULL_TRACER
+        self.nms_mode = nms_mode
+        self.nms_threshold = nms_threshold
+        self.nms_top_k = nms_top_k
+        self.max_pixels = max_pixels
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.merge_lines = merge_lines
+        self.line_overlap = line_overlap
+        self.line_gap = line_gap
+        self.deadline = deadline
+        self.max_regions = max_regions
+        self.backend = backend
+        self.detector = detector_backends.get_backend(backend)
+        if executor is not None or max_workers > 1:
+            # parallel OCR jobs should not each start an OpenMP thread per core
+            tesseract_engine.limit_threads()
+
+    def get_engine(self):
+        """Returns the tesseract engine used to recognize regions.
+        Returns:
+          engine (CAPIEngine or PytesseractEngine):
+            The engine instance, shared by recognizers with the same settings.
+        """
+
+        if isinstance(self.engine, str):
+            return tesseract_engine.get_engine(self.engine, self.lang)
+        return self.engine
 
     def load_image(self) -> Tuple[bytearray, int, int]:
         """Load the input image and grab the image dimensions.
@@ -56,16 +367,19 @@ class TextRecognizer(object):
           (original, original_height, original_width): Tuple of image, it's height and width.
         """
 
-        if not os.path.isfile(self.image_path):
+        image = self._read(self.image_path)
+        if image is None:
             print(
                 "mocr:text_recognition:load_image No image found on given image path!"
             )
             return (None, 0, 0)
 
-        image = cv2.imread(self.image_path)
-        original = image.copy()
         (original_height, original_width) = image.shape[:2]
-        return (original, original_height, original_width)
+        return (image, original_height, original_width)
+
+    def _read(self, source: image_io.ImageSource) -> np.ndarray:
+        with self.tracer.stage("load_image"):
+            return image_io.read_image(source, copy=self.copy)
 
     def resize_image(
         self, image: bytes, new_width: int, new_height: int
@@ -92,10 +406,27 @@ class TextRecognizer(object):
         ratio_height = original_height / float(new_height)
         ratio_width = original_width / float(new_width)
 
-        resized_image = cv2.resize(image, (new_width, new_height))
+        with self.tracer.stage("resize_image"):
+            resized_image = cv2.resize(image, (new_width, new_height))
         (resized_height, resized_width) = resized_image.shape[:2]
         return (resized_image, ratio_height, ratio_width, resized_height, resized_width)
 
+    def input_size(self, image: np.ndarray) -> Tuple[int, int]:
+        """Returns the size the image is resized to before the forward pass,
+        the fixed width and height or an aspect preserving size when a pixel
+        budget is set.
+        Args:
+          image (array):
+            Loaded image data.
+        Returns:
+          (width, height): Input size, multiples of 32.
+        """
+
+        if self.max_pixels is None:
+            return (self.width, self.height)
+        (height, width) = image.shape[:2]
+        return fit_input_size(height, width, self.max_pixels)
+
     def geometry_score(
         self, east_path: str, resized_image: List[bytes]
     ) -> Tuple[List, List]:
@@ -123,25 +454,98 @@ class TextRecognizer(object):
             return (None, None)
 
         (resized_height, resized_width) = resized_image.shape[:2]
-        layer_names = ["feature_fusion/Conv_7/Sigmoid", "feature_fusion/concat_3"]
 
-        # load the pre-trained EAST text detector
-        net = cv2.dnn.readNet(east_path)
+        # load the pre-trained EAST text detector, it is read from disk only
+        # once per process and then shared through the model cache
+        with self.tracer.stage("model_load"):
+            model = self.detector.get_model(east_path)
 
         # construct a blob from the image and then perform a forward pass of
         # the model to obtain the two output layer sets
-        blob = cv2.dnn.blobFromImage(
-            resized_image,
-            1.0,
-            (resized_width, resized_height),
-            (123.68, 116.78, 103.94),
-            swapRB=True,
-            crop=False,
-        )
-        net.setInput(blob)
-        (scores, geometry) = net.forward(layer_names)
+        with self.tracer.stage("forward"):
+            blob = cv2.dnn.blobFromImage(
+                resized_image,
+                1.0,
+                (resized_width, resized_height),
+                _EAST_MEAN,
+                swapRB=True,
+                crop=False,
+            )
+            (scores, geometry) = self._forward(model, blob)
         return (scores, geometry)
 
+    def _forward(self, model: model_cache.CachedModel, blob: np.ndarray) -> Tuple:
+        if self.detector.thread_safe:
+            return self.detector.forward(model.net, blob)
+        with model.lock:
+            return self.detector.forward(model.net, blob)
+
+    def detect_batch(
+        self,
+        images: List[bytes],
+        east_path: Optional[str] = None,
+        batch_size: int = 16,
+    ) -> List[Tuple]:
+        """Creates scores and geometry for many images at once. Every image is
+        resized to the recognizer's width and height, the images are stacked
+        into one NCHW blob and a single forward pass runs per batch.
+        Args:
+          images (list):
+            Loaded image data.
+          east_path (str):
+            EAST text detector path, the recognizer's east_path when not given.
+          batch_size (int):
+            Maximum number of images in one forward pass.
+        Returns:
+          detections (list):
+            (scores, geometry, ratio_height, ratio_width) for every image in
+            the given order, (None, None, 0, 0) for images that are none.
+            None when no EAST detector is found on the given path.
+        """
+
+        east_path = east_path if east_path is not None else self.east_path
+        if not os.path.isfile(east_path):
+            print(
+                "mocr:text_recognition:detect_batch No east detector found on given path!"
+            )
+            return None
+
+        with self.tracer.stage("model_load"):
+            model = self.detector.get_model(east_path)
+        detections = [(None, None, 0, 0)] * len(images)
+        resized = []
+        for (index, image) in enumerate(images):
+            (resized_image, ratio_height, ratio_width, _, _) = self.resize_image(
+                image, self.width, self.height
+            )
+            if resized_image is not None:
+                resized.append((index, resized_image, ratio_height, ratio_width))
+
+        for start in range(0, len(resized), batch_size):
+            batch = resized[start : start + batch_size]
+            self.tracer.count("batch_size", len(batch))
+            with self.tracer.stage("forward"):
+                blob = cv2.dnn.blobFromImages(
+                    [resized_image for (_, resized_image, _, _) in batch],
+                    1.0,
+                    (self.width, self.height),
+                    _EAST_MEAN,
+                    swapRB=True,
+                    crop=False,
+                )
+                (scores, geometry) = self._forward(model, blob)
+
+            # split the batched output volumes back into one (1, C, H, W)
+            # pair per image so they can be decoded like a single forward pass
+            for (offset, (index, _, ratio_height, ratio_width)) in enumerate(batch):
+                detections[index] = (
+                    scores[offset : offset + 1],
+                    geometry[offset : offset + 1],
+                    ratio_height,
+                    ratio_width,
+                )
+        return detections
+
     def decode_predictions(self, scores: List, geometry: List) -> Tuple[List, List]:
         """Grab the number of rows and columns from the scores volume, then
         initialize our set of bounding box rectangles and corresponding
@@ -153,9 +557,9 @@ class TextRecognizer(object):
             Geometrical data.
         Returns:
           rects (array):
-            Bounding boxes.
+            Bounding boxes as an (N, 4) array of start_x, start_y, end_x, end_y.
           confidences (array):
-            Associated confidences.
+            Associated confidences as an (N,) array.
         """
 
         if scores is None or geometry is None:
@@ -164,59 +568,79 @@ class TextRecognizer(object):
             )
             return (None, None)
 
-        (num_rows, num_cols) = scores.shape[2:4]
-        rects = []
-        confidences = []
-
-        # loop over the number of rows
-        for y in range(0, num_rows):
-            # extract the scores (probabilities), followed by the
-            # geometrical data used to derive potential bounding box
-            # coordinates that surround text
-            scores_data = scores[0, 0, y]
-            xdata0 = geometry[0, 0, y]
-            xdata1 = geometry[0, 1, y]
-            xdata2 = geometry[0, 2, y]
-            xdata3 = geometry[0, 3, y]
-            angles_data = geometry[0, 4, y]
-
-            # loop over the number of columns
-            for x in range(0, num_cols):
-                # if our score does not have sufficient probability,
-                # ignore it
-                if scores_data[x] < self.min_confidence:
-                    continue
-
-                # compute the offset factor as our resulting feature
-                # maps will be 4x smaller than the input image
-                (offset_x, offset_y) = (x * 4.0, y * 4.0)
-
-                # extract the rotation angle for the prediction and
-                # then compute the sin and cosine
-                angle = angles_data[x]
-                cos = np.cos(angle)
-                sin = np.sin(angle)
-
-                # use the geometry volume to derive the width and height
-                # of the bounding box
-                h = xdata0[x] + xdata2[x]
-                w = xdata1[x] + xdata3[x]
-
-                # compute both the starting and ending (x, y)-coordinates
-                # for the text prediction bounding box
-                end_x = int(offset_x + (cos * xdata1[x]) + (sin * xdata2[x]))
-                end_y = int(offset_y - (sin * xdata1[x]) + (cos * xdata2[x]))
-                start_x = int(end_x - w)
-                start_y = int(end_y - h)
-
-                # add the bounding box coordinates and probability score
-                # to our respective lists
-                rects.append((start_x, start_y, end_x, end_y))
-                confidences.append(scores_data[x])
+        with self.tracer.stage("decode_predictions"):
+            (rects, confidences, _) = self._decode(scores, geometry)
+        self.tracer.count("candidates", len(rects))
 
         # return a tuple of the bounding boxes and associated confidences
         return (rects, confidences)
 
+    def _decode(
+        self, scores: np.ndarray, geometry: np.ndarray, rotated: bool = False
+    ) -> Tuple:
+        # keep only the cells whose score has sufficient probability, the
+        # indices come back in the same row-major order the score map is
+        # laid out in
+        scores_data = scores[0, 0]
+        (ys, xs) = np.nonzero(scores_data >= self.min_confidence)
+
+        # extract the geometrical data used to derive potential bounding
+        # box coordinates that surround text for the selected cells only
+        xdata0 = geometry[0, 0, ys, xs]
+        xdata1 = geometry[0, 1, ys, xs]
+        xdata2 = geometry[0, 2, ys, xs]
+        xdata3 = geometry[0, 3, ys, xs]
+        angles_data = geometry[0, 4, ys, xs]
+
+        # compute the offset factor as our resulting feature maps will be
+        # 4x smaller than the input image
+        offset_x = (xs * 4.0).astype(geometry.dtype)
+        offset_y = (ys * 4.0).astype(geometry.dtype)
+
+        # compute the sin and cosine of the rotation angles
+        cos = np.cos(angles_data)
+        sin = np.sin(angles_data)
+
+        # use the geometry volume to derive the width and height of the
+        # bounding boxes
+        h = xdata0 + xdata2
+        w = xdata1 + xdata3
+
+        # compute both the starting and ending (x, y)-coordinates for the
+        # text prediction bounding boxes, truncating towards zero like int()
+        end_x = np.trunc(offset_x + (cos * xdata1) + (sin * xdata2))
+        end_y = np.trunc(offset_y - (sin * xdata1) + (cos * xdata2))
+        start_x = np.trunc(end_x - w)
+        start_y = np.trunc(end_y - h)
+
+        rects = np.ascontiguousarray(
+            np.stack((start_x, start_y, end_x, end_y), axis=1), dtype=np.int64
+        )
+        confidences = np.ascontiguousarray(scores_data[ys, xs])
+
+        rotated_rects = None
+        if rotated:
+            # the rotated box has its corner at the offset point, p1 and p3
+            # are the opposite corners along its height and width
+            offset_x = offset_x + (cos * xdata1) + (sin * xdata2)
+            offset_y = offset_y - (sin * xdata1) + (cos * xdata2)
+            p1_x = -sin * h + offset_x
+            p1_y = -cos * h + offset_y
+            p3_x = -cos * w + offset_x
+            p3_y = sin * w + offset_y
+            rotated_rects = [
+                ((float(cx), float(cy)), (float(width), float(height)), float(angle))
+                for (cx, cy, width, height, angle) in zip(
+                    (p1_x + p3_x) * 0.5,
+                    (p1_y + p3_y) * 0.5,
+                    w,
+                    h,
+                    -np.degrees(angles_data),
+                )
+            ]
+
+        return (rects, confidences, rotated_rects)
+
     def boxes(self, scores: List, geometry: List) -> List:
         """Returns boxes after decoding predictions and then applying
         non-maxima suppression.
@@ -227,24 +651,161 @@ class TextRecognizer(object):
             Geometrical data.
         Returns:
           boxes (array):
-            Overlapping bounding boxes.
+            Bounding boxes kept after non-maxima suppression.
         """
 
         if scores is None or geometry is None:
             print("mocr:text_recognition:boxes Given scores or geometry is none!")
             return None
 
-        (rects, confidences) = self.decode_predictions(scores, geometry)
-        boxes = non_max_suppression(np.array(rects), probs=confidences)
-        return boxes
+        return self._boxes(scores, geometry)[0]
 
-    def get_results(
+    def _boxes(self, scores: np.ndarray, geometry: np.ndarray) -> Tuple:
+        with self.tracer.stage("decode_predictions"):
+            (rects, confidences, rotated_rects) = self._decode(
+                scores, geometry, rotated=self.nms_mode == "rotated"
+            )
+        self.tracer.count("candidates", len(rects))
+        with self.tracer.stage("nms"):
+            keep = self._suppress(rects, confidences, rotated_rects)
+        self.tracer.count("boxes", len(keep))
+        return (rects[keep], confidences[keep])
+
+    def _suppress(
+        self, rects: np.ndarray, confidences: np.ndarray, rotated_rects: List
+    ) -> np.ndarray:
+        if self.nms_mode == "rotated":
+            return nms.rotated_non_max_suppression_indices(
+                rotated_rects, confidences, self.nms_threshold, self.nms_top_k
+            )
+        return nms.non_max_suppression_indices(
+            rects, confidences, self.nms_threshold, self.nms_top_k
+        )
+
+    def detect(self, image: np.ndarray) -> Tuple[np.ndarray, float, float]:
+        """Detects the text boxes of an image with the configured input size,
+        tiles are used instead when a tile size is set and the image is larger.
+        Args:
+          image (array):
+            Loaded image data.
+        Returns:
+          (boxes, ratio_height, ratio_width): Boxes kept after non-maxima
+          suppression and the ratios to scale them to the image.
+        """
+
+        if image is None:
+            print("mocr:text_recognition:detect Given image is none!")
+            return (None, 0, 0)
+
+        (boxes, _, ratio_height, ratio_width) = self.detect_boxes(image)
+        return (boxes, ratio_height, ratio_width)
+
+    def detect_boxes(self, image: np.ndarray) -> Detection:
+        """Detects the text boxes of an image together with their confidences,
+        the single detection path of the resized input and of the tiles.
+        Args:
+          image (array):
+            Loaded image data.
+        Returns:
+          detection (Detection):
+            Boxes, confidences and the ratios to scale the boxes to the image,
+            boxes and confidences are None when the model can't be loaded.
+        """
+
+        (height, width) = image.shape[:2]
+        if self.tile_size is not None and max(height, width) > self.tile_size:
+            # tiles are detected at full resolution, nothing is resized
+            return Detection(*self._detect_tiled(image), 1.0, 1.0)
+
+        (new_width, new_height) = self.input_size(image)
+        (resized_image, ratio_height, ratio_width, _, _) = self.resize_image(
+            image, new_width, new_height
+        )
+        (scores, geometry) = self.geometry_score(self.east_path, resized_image)
+        if scores is None:
+            return Detection(None, None, 0, 0)
+        return Detection(*self._boxes(scores, geometry), ratio_height, ratio_width)
+
+    def detect_tiled(self, image: np.ndarray) -> np.ndarray:
+        """Detects text on overlapping tiles of the image at its own resolution
+        so small print on large scans is kept and the cost of one forward pass
+        stays bounded. Boxes of every tile go through non-maxima suppression
+        and then once more together to merge the boxes found on two tiles.
+        Args:
+          image (array):
+            Loaded image data.
+        Returns:
+          boxes (array):
+            Bounding boxes in image coordinates.
+        """
+
+        if image is None:
+            print("mocr:text_recognition:detect_tiled Given image is none!")
+            return None
+
+        return self._detect_tiled(image)[0]
+
+    def _detect_tiled(self, image: np.ndarray) -> Tuple:
+        tile_size = max(32, self.tile_size - self.tile_size % 32)
+        rotated = self.nms_mode == "rotated"
+        (height, width) = image.shape[:2]
+        (all_rects, all_confidences, all_rotated_rects) = ([], [], [])
+        for (top, left) in _tile_origins(height, width, tile_size, self.tile_overlap):
+            tile = image[top : top + tile_size, left : left + tile_size]
+            (tile_height, tile_width) = tile.shape[:2]
+            # tiles on the border of a small side are padded to a multiple of 32
+            tile = cv2.copyMakeBorder(
+                tile,
+                0,
+                -tile_height % 32,
+                0,
+                -tile_width % 32,
+                cv2.BORDER_REPLICATE,
+            )
+            self.tracer.count("tiles", 1)
+            (scores, geometry) = self.geometry_score(self.east_path, tile)
+            if scores is None:
+                return (None, None)
+
+            with self.tracer.stage("decode_predictions"):
+                (rects, confidences, rotated_rects) = self._decode(
+                    scores, geometry, rotated=rotated
+                )
+            self.tracer.count("candidates", len(rects))
+            with self.tracer.stage("nms"):
+                keep = self._suppress(rects, confidences, rotated_rects)
+            # boxes found on the replicated border of a padded tile lie
+            # outside the image and would only give empty regions
+            tile_rects = rects[keep] + (left, top, left, top)
+            inside = (
+                (tile_rects[:, 0] < width)
+                & (tile_rects[:, 1] < height)
+                & (tile_rects[:, 2] > 0)
+                & (tile_rects[:, 3] > 0)
+            )
+            keep = keep[inside]
+            all_rects.append(tile_rects[inside])
+            all_confidences.append(confidences[keep])
+            if rotated:
+                all_rotated_rects.extend(
+                    ((cx + left, cy + top), size, angle)
+                    for ((cx, cy), size, angle) in (rotated_rects[i] for i in keep)
+                )
+
+        rects = np.concatenate(all_rects)
+        confidences = np.concatenate(all_confidences)
+        with self.tracer.stage("nms"):
+            keep = self._suppress(rects, confidences, all_rotated_rects)
+        self.tracer.count("boxes", len(keep))
+        return (rects[keep], confidences[keep])
+
+    def regions(
         self, boxes: List, image: bytes, ratio_height: float, ratio_width: float
     ) -> List:
-        """Returns the list of sorted boxes.
+        """Returns the padded regions of the boxes in original image coordinates.
         Args:
           boxes (array):
-            Overlapping bounding boxes.
+            Bounding boxes kept after non-maxima suppression.
           image (bytes):
             Loaded image data.
           ratio_height (float):
@@ -252,26 +813,79 @@ class TextRecognizer(object):
           ratio_width (float):
             Resize ratio of width.
         Returns:
-          results (array):
-            Texts with bounding box coordinates from top to bottom.
+          regions (array):
+            (start_x, start_y, end_x, end_y) of every box in the given order,
+            of every text line when lines are merged.
         """
 
-        if boxes is None or image is None:
-            print("mocr:text_recognition:get_results Given boxes or image is none!")
-            return None
+        return self._regions(boxes, image, ratio_height, ratio_width)[0]
 
+    def prioritized_regions(
+        self,
+        boxes: List,
+        image: np.ndarray,
+        ratio_height: float,
+        ratio_width: float,
+        confidences: Optional[List] = None,
+    ) -> Tuple[List, List]:
+        """Returns the padded regions and the order to recognize them in, the
+        most confident and largest first when the recognizer has a deadline
+        or max_regions, the detection order otherwise.
+        Args:
+          boxes (array):
+            Bounding boxes kept after non-maxima suppression.
+          image (bytes):
+            Loaded image data.
+          ratio_height (float):
+            Resize ratio of height.
+          ratio_width (float):
+            Resize ratio of width.
+          confidences (array):
+            Confidence of every box, regions are ranked by area only when
+            not given.
+        Returns:
+          (regions, order): Regions in image coordinates and their indices
+          in recognition order.
+        """
+
+        (regions, confidences) = self._regions(
+            boxes, image, ratio_height, ratio_width, confidences
+        )
+        if self.deadline is None and self.max_regions is None:
+            return (regions, list(range(len(regions))))
+        return (regions, _by_priority(regions, confidences))
+
+    def _regions(
+        self,
+        boxes: List,
+        image: np.ndarray,
+        ratio_height: float,
+        ratio_width: float,
+        confidences: Optional[List] = None,
+    ) -> Tuple:
         (original_height, original_width) = image.shape[:2]
-        # initialize the list of results
-        results = []
-        # loop over the bounding boxes
-        for (start_x, start_y, end_x, end_y) in boxes:
-            # scale the bounding box coordinates based on the respective
-            # ratios
-            start_x = int(start_x * ratio_width)
-            start_y = int(start_y * ratio_height)
-            end_x = int(end_x * ratio_width)
-            end_y = int(end_y * ratio_height)
+        # scale the bounding box coordinates based on the respective ratios
+        scaled = [
+            (
+                int(start_x * ratio_width),
+                int(start_y * ratio_height),
+                int(end_x * ratio_width),
+                int(end_y * ratio_height),
+            )
+            for (start_x, start_y, end_x, end_y) in boxes
+        ]
+        if self.merge_lines:
+            (scaled, members) = _group_lines(scaled, self.line_overlap, self.line_gap)
+            if confidences is not None:
+                # a line is as confident as its most confident word
+                confidences = [
+                    max(confidences[index] for index in indices) for indices in members
+                ]
 
+        # initialize the list of region coordinates
+        regions = []
+        # loop over the bounding boxes
+        for (start_x, start_y, end_x, end_y) in scaled:
             # in order to obtain a better OCR of the text we can potentially
             # apply a bit of padding surrounding the bounding box -- here we
             # are computing the deltas in both the x and y directions
@@ -283,22 +897,247 @@ class TextRecognizer(object):
             start_y = max(0, start_y - dY)
             end_x = min(original_width, end_x + (dX * 2))
             end_y = min(original_height, end_y + (dY * 2))
+            regions.append((start_x, start_y, end_x, end_y))
+        return (regions, confidences)
+
+    def get_results(
+        self,
+        boxes: List,
+        image: bytes,
+        ratio_height: float,
+        ratio_width: float,
+        confidences: Optional[List] = None,
+    ) -> List:
+        """Returns the list of sorted boxes.
+        Args:
+          boxes (array):
+            Bounding boxes kept after non-maxima suppression.
+          image (bytes):
+            Loaded image data.
+          ratio_height (float):
+            Resize ratio of height.
+          ratio_width (float):
+            Resize ratio of width.
+          confidences (array):
+            Confidence of every box, regions are recognized by confidence
+            and area when the recognizer has a deadline or max_regions, by
+            area only when not given.
+        Returns:
+          results (Results):
+            Texts with bounding box coordinates from top to bottom.
+        """
+
+        if boxes is None or image is None:
+            print("mocr:text_recognition:get_results Given boxes or image is none!")
+            return None
+
+        return self._get_results(
+            boxes, image, ratio_height, ratio_width, confidences, time.monotonic()
+        )
+
+    def _get_results(
+        self,
+        boxes: List,
+        image: np.ndarray,
+        ratio_height: float,
+        ratio_width: float,
+        confidences: Optional[List],
+        started: float,
+    ) -> "Results":
+        (regions, order) = self.prioritized_regions(
+            boxes, image, ratio_height, ratio_width, confidences
+        )
+        self.tracer.count("regions", len(regions))
+
+        executor = self.executor
+        if executor is None and self.max_workers > 1 and len(regions) > 1:
+            executor = shared_executor(self.max_workers)
+        # worker processes load their own engine
+        if not isinstance(executor, ProcessPoolExecutor):
+            engine = self.get_engine()
 
+        def recognize(region):
+            (start_x, start_y, end_x, end_y) = region
             # extract the actual padded ROI
             roi = image[start_y:end_y, start_x:end_x]
+            # the engine applies Tesseract v4 with the LSTM neural net model
+            # for OCR and a page segmentation mode of 7 which implies that we
+            # are treating the ROI as a single line of text
+            with self.tracer.stage("ocr"):
+                return engine.image_to_string(roi, psm=tesseract_engine.PSM_SINGLE_LINE)
+
+        # recognize the regions one after another or fan them out to the
+        # worker pool, map keeps the texts in the order of the regions
+        with self.tracer.stage("get_results"):
+            budgeted = self.deadline is not None or self.max_regions is not None
+            ordered = [regions[index] for index in order]
+            if isinstance(executor, ProcessPoolExecutor):
+                texts = self._recognize_in_processes(image, ordered, executor, started)
+            elif not budgeted:
+                if executor is not None:
+                    texts = list(executor.map(recognize, ordered))
+                else:
+                    texts = [recognize(region) for region in ordered]
+            else:
+                texts = self._recognize_within_budget(
+                    recognize, ordered, executor, started
+                )
 
-            # in order to apply Tesseract v4 to OCR text we must supply
-            # (1) a language, (2) an OEM flag of 4, indicating that the we
-            # wish to use the LSTM neural net model for OCR, and finally
-            # (3) an OEM value, in this case, 7 which implies that we are
-            # treating the ROI as a single line of text
-            config = str.format("-l {0} --oem 1 --psm 7", self.lang)
-            text = pytesseract.image_to_string(roi, config=config)
+        # pair the bounding box coordinates with the OCR'd texts and sort
+        # the results from top to bottom
+        results = Results.from_texts(regions, order, texts)
+        self.tracer.count("skipped", results.skipped)
+        return results
+
+    def _recognize_in_processes(
+        self,
+        image: np.ndarray,
+        regions: List,
+        executor: ProcessPoolExecutor,
+        started: float,
+    ) -> List:
+        # the image is copied into shared memory once and the workers get
+        # its name with a chunk of regions instead of pickled pixels, the
+        # segment is removed when done even if a worker died, shared memory
+        # needs Python 3.8 so it is only imported here
+        from mocr import shared_image
+
+        texts = [None] * len(regions)
+        allowed = regions if self.max_regions is None else regions[: self.max_regions]
+        if len(allowed) == 0:
+            return texts
+        chunk_size = -(-len(allowed) // (4 * (os.cpu_count() or 1)))
+        with shared_image.SharedImage(image) as shared:
+            futures = [
+                executor.submit(
+                    shared_image.recognize_regions,
+                    shared.descriptor,
+                    allowed[start : start + chunk_size],
+                    self.engine,
+                    self.lang,
+                    tesseract_engine.PSM_SINGLE_LINE,
+                )
+                for start in range(0, len(allowed), chunk_size)
+            ]
+            timeout = None
+            if self.deadline is not None:
+                timeout = max(0, self.deadline - (time.monotonic() - started))
+            (done, _) = wait(futures, timeout=timeout)
+            for (index, future) in enumerate(futures):
+                if future in done:
+                    start = index * chunk_size
+                    texts[start : start + chunk_size] = future.result()
+                else:
+                    future.cancel()
+        return texts
+
+    def _recognize_within_budget(
+        self,
+        recognize,
+        regions: List,
+        executor: Optional[Executor],
+        started: float,
+    ) -> List:
+        # returns the text of every region, None for the regions skipped
+        # because max_regions or the deadline was reached
+        texts = [None] * len(regions)
+        allowed = regions if self.max_regions is None else regions[: self.max_regions]
+
+        def remaining():
+            if self.deadline is None:
+                return None
+            return self.deadline - (time.monotonic() - started)
+
+        if executor is None:
+            for (index, region) in enumerate(allowed):
+                if remaining() is not None and remaining() <= 0:
+                    break
+                texts[index] = recognize(region)
+            return texts
+
+        # the pool works in submission order, the most important regions
+        # first, regions not done by the deadline are cancelled or ignored
+        futures = [executor.submit(recognize, region) for region in allowed]
+        timeout = remaining()
+        (done, _) = wait(futures, timeout=None if timeout is None else max(0, timeout))
+        for (index, future) in enumerate(futures):
+            if future in done:
+                texts[index] = future.result()
+            else:
+                future.cancel()
+        return texts
+
+    def cache_key(self, source: image_io.ImageSource) -> str:
+        """Returns the result cache key of an image recognized with the
+        settings of this recognizer.
+        Args:
+          source (bytes or numpy.ndarray):
+            Encoded image bytes or a decoded image.
+        Returns:
+          key (str):
+            Cache key, see `result_cache.result_key`.
+        """
+
+        engine = self.engine
+        if not isinstance(engine, str):
+            # instances identify their language and mode with a key
+            engine = getattr(engine, "key", None) or type(engine)
+        parameters = {
+            "min_confidence": self.min_confidence,
+            "width": self.width,
+            "height": self.height,
+            "padding": self.padding,
+            "lang": self.lang,
+            "engine": str(engine),
+            "model": result_cache.model_digest(self.east_path),
+            "backend": self.detector.key,
+            "nms": [self.nms_mode, self.nms_threshold, self.nms_top_k],
+            "max_pixels": self.max_pixels,
+            "tiles": [self.tile_size, self.tile_overlap],
+            "lines": [self.merge_lines, self.line_overlap, self.line_gap],
+        }
+        return result_cache.result_key(result_cache.image_digest(source), parameters)
+
+    def recognize(self, cache: Optional[result_cache.ResultCache] = None) -> List:
+        """Loads the image, detects its text boxes and recognizes them.
+        Args:
+          cache (ResultCache):
+            Results of an image seen before with the same settings are taken
+            from this cache instead of being recognized again.
+        Returns:
+          results (Results):
+            Texts with bounding box coordinates from top to bottom, None if
+            the image or detector could not be loaded.
+        """
 
-            # add the bounding box coordinates and OCR'd text to the list
-            # of results
-            results.append(((start_x, start_y, end_x, end_y), text))
+        started = time.monotonic()
+        source = self.image_path
+        key = None
+        if cache is not None:
+            if isinstance(source, (str, os.PathLike)):
+                # read the file once, it is both hashed and decoded from memory
+                if not os.path.isfile(source):
+                    source = None
+                else:
+                    with open(source, "rb") as image_file:
+                        source = image_file.read()
+            if source is not None:
+                key = self.cache_key(source)
+                results = cache.get(key)
+                if results is not None:
+                    return Results(results)
 
-        # sort the results bounding box coordinates from top to bottom
-        results = sorted(results, key=lambda r: r[0][1])
+        image = self._read(source)
+        if image is None:
+            print("mocr:text_recognition:recognize No image found on given image path!")
+            return None
+        (boxes, confidences, ratio_height, ratio_width) = self.detect_boxes(image)
+        if boxes is None:
+            return None
+        results = self._get_results(
+            boxes, image, ratio_height, ratio_width, confidences, started
+        )
+        # partial results depend on timing, only complete ones are reused
+        if key is not None and results.complete:
+            cache.put(key, results)
         return results
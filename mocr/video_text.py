@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import cv2
+import numpy as np
+
+from mocr import nms, tesseract_engine
+from mocr.text_recognition import TextRecognizer, shared_executor
+from collections import Counter, namedtuple
+from typing import Iterable, Iterator, List, Optional, Union
+
+TrackedText = namedtuple("TrackedText", ["box", "text", "readings", "frames"])
+TrackedText.__doc__ = """Text of one region followed through a video.
+Args:
+  box (tuple):
+    (start_x, start_y, end_x, end_y) of the region on the last frame it was
+    tracked on.
+  text (str):
+    Reading that stood for the most frames.
+  readings (dict):
+    Number of frames every distinct reading stood for.
+  frames (int):
+    Number of frames the region was tracked on.
+"""
+
+# size regions are compared at to decide whether they changed
+_SNAPSHOT_SIZE = (64, 16)
+
+
+class _Track(object):
+    def __init__(self, box: np.ndarray):
+        self.box = box
+        self.points = None
+        self.snapshot = None
+        self.reading = None
+        self.readings = Counter()
+        self.frames = 0
+        self.active = True
+
+
+class VideoTextRecognizer(object):
+    """VideoTextRecognizer reads the texts of a card held to the camera. The
+    EAST detector runs on keyframes only, the regions it finds are followed
+    to the next keyframe with sparse optical flow and a region is recognized
+    again only when its content changed, so a video costs about as much as
+    its keyframes. Readings of a region are combined across frames."""
+
+    def __init__(
+        self,
+        east_path: str,
+        keyframe_interval: int = 10,
+        change_threshold: float = 12.0,
+        min_overlap: float = 0.5,
+        min_points: int = 4,
+        frame_stride: int = 1,
+        max_frames: Optional[int] = None,
+        **options
+    ):
+        """Returns a VideoTextRecognizer instance.
+        Args:
+          east_path (str):
+            Path to input EAST text detector on file system.
+          keyframe_interval (int):
+            Run the detector on every n-th inspected frame, earlier when a
+            region can not be tracked any more.
+          change_threshold (float):
+            Mean absolute gray level difference of a region to the one last
+            recognized above which it is recognized again.
+          min_overlap (float):
+            Minimum intersection over union of a detected region and a
+            tracked one to continue the track.
+          min_points (int):
+            Minimum number of flow points a region is tracked with.
+          frame_stride (int):
+            Inspect every n-th frame, frames in between are skipped.
+          max_frames (int):
+            Maximum number of frames to inspect.
+          options:
+            Keyword arguments of TextRecognizer, e.g. min_confidence,
+            padding, merge_lines, engine or max_workers.
+        """
+
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be at least 1")
+        self.text_recognizer = TextRecognizer(None, east_path, **options)
+        self.keyframe_interval = keyframe_interval
+        self.change_threshold = change_threshold
+        self.min_overlap = min_overlap
+        self.min_points = min_points
+        self.frame_stride = frame_stride
+        self.max_frames = max_frames
+
+    def recognize(
+        self, video_path: Union[str, Iterable[np.ndarray]]
+    ) -> List[TrackedText]:
+        """Recognizes the texts of a video.
+        Args:
+          video_path (str or array):
+            Path to input video on file system or decoded BGR frames.
+        Returns:
+          results (array):
+            TrackedText of every region from top to bottom, None if there is
+            no video on given path or the detector could not be run.
+        """
+
+        if isinstance(video_path, str) and not os.path.isfile(video_path):
+            print("mocr:video_text:recognize No video found on given video path!")
+            return None
+
+        tracer = self.text_recognizer.tracer
+        tracks = []
+        previous = None
+        since_keyframe = 0
+        lost = False
+        for frame in self._frames(video_path):
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if previous is None or lost or since_keyframe >= self.keyframe_interval:
+                if not self._keyframe(frame, gray, tracks):
+                    return None
+                tracer.count("keyframes", 1)
+                (since_keyframe, lost) = (0, False)
+            else:
+                lost = self._follow(previous, gray, tracks)
+            since_keyframe += 1
+            self._read(gray, [track for track in tracks if track.active])
+            previous = gray
+
+        results = [
+            TrackedText(
+                tuple(int(round(value)) for value in track.box),
+                track.readings.most_common(1)[0][0],
+                dict(track.readings),
+                track.frames,
+            )
+            for track in tracks
+            if track.readings
+        ]
+        results.sort(key=lambda result: result.box[1])
+        return results
+
+    def _frames(self, video_path) -> Iterator[np.ndarray]:
+        inspected_frames = 0
+        if not isinstance(video_path, str):
+            for (index, frame) in enumerate(video_path):
+                if self.max_frames is not None and inspected_frames >= self.max_frames:
+                    return
+                if index % self.frame_stride == 0:
+                    inspected_frames += 1
+                    yield frame
+            return
+
+        video_capture = cv2.VideoCapture(video_path)
+        try:
+            while self.max_frames is None or inspected_frames < self.max_frames:
+                ret, frame = video_capture.read()
+                if not ret or frame is None:
+                    break
+                inspected_frames += 1
+                yield frame
+                # skip the frames we never inspect without decoding them
+                for _ in range(self.frame_stride - 1):
+                    if not video_capture.grab():
+                        break
+        finally:
+            video_capture.release()
+
+    def _keyframe(self, frame: np.ndarray, gray: np.ndarray, tracks: List) -> bool:
+        # detect the regions and continue the tracks they overlap, tracks
+        # without a detection end and new detections start a track
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        (boxes, ratio_height, ratio_width) = self.text_recognizer.detect(frame)
+        if boxes is None:
+            return False
+        regions = self.text_recognizer.regions(boxes, frame, ratio_height, ratio_width)
+
+        active = [track for track in tracks if track.active]
+        for track in active:
+            track.active = False
+        for region in regions:
+            box = np.asarray(region, dtype=np.float64)
+            overlaps = [nms.iou(box, track.box) for track in active]
+            if overlaps and max(overlaps) >= self.min_overlap:
+                track = active.pop(int(np.argmax(overlaps)))
+                track.box = box
+                track.active = True
+            else:
+                track = _Track(box)
+                tracks.append(track)
+            track.points = _features(gray, track.box)
+        return True
+
+    def _follow(self, previous: np.ndarray, gray: np.ndarray, tracks: List) -> bool:
+        # moves every region by the median flow of its points, returns
+        # whether a region lost too many points to be followed, regions that
+        # had too few points to begin with count as lost as well
+        active = [track for track in tracks if track.active]
+        followed = [
+            track
+            for track in active
+            if track.points is not None and len(track.points) >= self.min_points
+        ]
+        lost = len(followed) < len(active)
+        if not followed:
+            return lost
+        points = np.concatenate([track.points for track in followed])
+        (moved, status, _) = cv2.calcOpticalFlowPyrLK(
+            previous, gray, points, None, winSize=(15, 15), maxLevel=2
+        )
+        status = status.reshape(-1).astype(bool)
+
+        start = 0
+        for track in followed:
+            end = start + len(track.points)
+            found = status[start:end]
+            if found.sum() < self.min_points:
+                lost = True
+            else:
+                shift = np.median(
+                    moved[start:end][found] - points[start:end][found], axis=0
+                ).reshape(-1)
+                track.box = track.box + np.tile(shift, 2)
+                track.points = moved[start:end][found]
+            start = end
+        return lost
+
+    def _read(self, gray: np.ndarray, tracks: List):
+        # recognizes the regions whose content changed since they were last
+        # recognized, every frame votes for the reading standing on it
+        (height, width) = gray.shape[:2]
+        pending = []
+        for track in tracks:
+            track.frames += 1
+            (start_x, start_y, end_x, end_y) = _clip(track.box, height, width)
+            if end_x - start_x < 2 or end_y - start_y < 2:
+                continue
+            roi = gray[start_y:end_y, start_x:end_x]
+            snapshot = cv2.resize(roi, _SNAPSHOT_SIZE, interpolation=cv2.INTER_AREA)
+            snapshot = snapshot.astype(np.float32)
+            if (
+                track.snapshot is None
+                or np.abs(snapshot - track.snapshot).mean() > self.change_threshold
+            ):
+                track.snapshot = snapshot
+                pending.append((track, roi))
+
+        if pending:
+            self.text_recognizer.tracer.count("regions", len(pending))
+            engine = self.text_recognizer.get_engine()
+
+            def recognize(item):
+                with self.text_recognizer.tracer.stage("ocr"):
+                    return engine.image_to_string(
+                        item[1], psm=tesseract_engine.PSM_SINGLE_LINE
+                    )
+
+            max_workers = self.text_recognizer.max_workers
+            if max_workers > 1 and len(pending) > 1:
+                texts = list(shared_executor(max_workers).map(recognize, pending))
+            else:
+                texts = [recognize(item) for item in pending]
+            for ((track, _), text) in zip(pending, texts):
+                track.reading = text.strip() or None
+
+        for track in tracks:
+            if track.reading is not None:
+                track.readings[track.reading] += 1
+
+
+def _features(gray: np.ndarray, box: np.ndarray) -> Optional[np.ndarray]:
+    # corners inside the region in frame coordinates
+    (start_x, start_y, end_x, end_y) = _clip(box, *gray.shape[:2])
+    if end_x - start_x < 2 or end_y - start_y < 2:
+        return None
+    corners = cv2.goodFeaturesToTrack(
+        gray[start_y:end_y, start_x:end_x],
+        maxCorners=20,
+        qualityLevel=0.01,
+        minDistance=3,
+    )
+    if corners is None:
+        return None
+    return (corners + np.float32((start_x, start_y))).astype(np.float32)
+
+
+def _clip(box: np.ndarray, height: int, width: int) -> tuple:
+    (start_x, start_y, end_x, end_y) = (int(round(value)) for value in box)
+    return (
+        max(0, start_x),
+        max(0, start_y),
+        min(width, end_x),
+        min(height, end_y),
+    )
@@ -43,6 +43,7 @@ setup(
     download_url=extract_metaitem('download_url'),
     packages=find_packages(exclude=('tests', 'docs')),
     include_package_data=True,
+    package_data={'mocr': ['haarcascades/*.xml', 'lbpcascades/*.xml']},
     platforms=['Any'],
     install_requires=requirements,
     setup_requires=['pytest-runner'],
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+import numpy as np
+
+from unittest import mock
+from mocr import model_cache
+
+
+class FakeNet(object):
+    """Stands in for the EAST detector and predicts a box on every given cell
+    of the score map, whose cells are 4x4 pixels of the input. Subclasses
+    predict from the input blob by overriding `predict`."""
+
+    def __init__(self, cells=(((10, 10), 0.9, (4, 10, 4, 10)),)):
+        # position, score and top, right, bottom and left distances of every box
+        self.cells = cells
+        self.calls = 0
+
+    def setInput(self, blob):
+        self.blob = blob
+
+    def forward(self, layer_names):
+        self.calls += 1
+        (_, _, height, width) = self.blob.shape
+        scores = np.zeros((1, 1, height // 4, width // 4), np.float32)
+        geometry = np.zeros((1, 5, height // 4, width // 4), np.float32)
+        for ((y, x), score, distances) in self.predict(self.blob):
+            scores[0, 0, y, x] = score
+            geometry[0, 0:4, y, x] = distances
+        return (scores, geometry)
+
+    def predict(self, blob):
+        return self.cells
+
+
+class FakeEngine(object):
+    """Stands in for a tesseract engine. It returns the text with the number
+    of the call formatted in, records the shape of every image and how many
+    calls ran at the same time."""
+
+    def __init__(self, text="text", delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.shapes = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return len(self.shapes)
+
+    def image_to_string(self, image, psm=7, variables=None):
+        with self._lock:
+            self.shapes.append(image.shape)
+            call = len(self.shapes)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return self.text.format(call=call)
+
+
+def patch_model(net):
+    """Returns a patch of the default model cache loading `net` for every
+    EAST path."""
+
+    return mock.patch.object(
+        model_cache, "_default_cache", model_cache.ModelCache(loader=lambda path: net)
+    )
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import asyncio
+import shutil
+import tempfile
+import unittest
+import pytest
+import numpy as np
+import pytesseract
+
+from unittest import mock
+from mocr import aio, text_recognition
+from fakes import FakeEngine, FakeNet, patch_model
+
+
+def _run_until_complete(coroutine):
+    # asyncio.run was added in Python 3.7
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+run = getattr(asyncio, "run", _run_until_complete)
+
+
+class AsyncPipelineTest(unittest.TestCase):
+    def setUp(self):
+        self._image_path = os.path.join(
+            os.path.dirname(__file__), "data/sample_uk_identity_card.png"
+        )
+        # one box on each of two lines
+        self._net = FakeNet(
+            (((10, 10), 0.9, (5, 20, 5, 20)), ((30, 10), 0.9, (5, 20, 5, 20)))
+        )
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_recognize_card(self):
+        pipeline = aio.AsyncPipeline(max_concurrency=2, ocr="engine")
+        engine = FakeEngine(delay=0.01)
+
+        async def recognize():
+            return await asyncio.gather(
+                *[
+                    pipeline.recognize_card(
+                        self._image_path, __file__, engine=engine, padding=0.1
+                    )
+                    for _ in range(6)
+                ]
+            )
+
+        with patch_model(self._net):
+            results = run(recognize())
+        pipeline.close()
+        self.assertEqual(len(results), 6)
+        for result in results:
+            self.assertEqual(len(result), 2)
+            self.assertLess(result[0][0][1], result[1][0][1])
+        self.assertLessEqual(engine.max_running, pipeline.max_workers)
+
+    def test_recognize_card_max_regions(self):
+        pipeline = aio.AsyncPipeline(ocr="engine")
+        with patch_model(self._net):
+            results = run(
+                pipeline.recognize_card(
+                    self._image_path,
+                    __file__,
+                    engine=FakeEngine(),
+                    max_pixels=640 * 640,
+                    max_regions=1,
+                )
+            )
+        pipeline.close()
+        self.assertIsInstance(results, text_recognition.Results)
+        self.assertEqual((len(results), results.skipped), (1, 1))
+
+    def test_recognize_card_subprocess_deadline(self):
+        pipeline = aio.AsyncPipeline(ocr="subprocess")
+
+        async def image_to_string(image, lang="eng"):
+            # the second line is not read before the deadline
+            if len(calls) > 0:
+                await asyncio.sleep(30)
+            calls.append(image.shape)
+            return "text"
+
+        calls = []
+        with patch_model(self._net), mock.patch.object(
+            aio, "image_to_string", image_to_string
+        ):
+            results = run(
+                pipeline.recognize_card(self._image_path, __file__, deadline=1.0)
+            )
+        pipeline.close()
+        self.assertIsInstance(results, text_recognition.Results)
+        self.assertEqual([text for (_, text) in results], ["text"])
+        self.assertEqual(results.skipped, 1)
+
+    def test_recognize_card_fails(self):
+        pipeline = aio.AsyncPipeline(ocr="engine")
+        results = run(
+            pipeline.recognize_card(
+                os.path.join(os.path.dirname(__file__), "data/unavailable.png"),
+                __file__,
+            )
+        )
+        pipeline.close()
+        self.assertIsNone(results)
+
+    def test_image_to_string_subprocess(self):
+        tesseract_cmd = os.path.join(self._directory, "tesseract")
+        with open(tesseract_cmd, "w") as script:
+            script.write(
+                "#!" + sys.executable + "\n"
+                "import sys\n"
+                "data = sys.stdin.buffer.read()\n"
+                "sys.stdout.write(' '.join(sys.argv[1:]) + ' ' + str(len(data) > 0))\n"
+            )
+        os.chmod(tesseract_cmd, 0o755)
+        image = np.zeros((20, 40, 3), np.uint8)
+        with mock.patch.object(pytesseract.pytesseract, "tesseract_cmd", tesseract_cmd):
+            text = run(aio.image_to_string(image, "deu"))
+        self.assertEqual(text, "stdin stdout -l deu --oem 1 --psm 7 True")
+        self.assertEqual(run(aio.image_to_string(image[:0], "deu")), "")
+
+    def test_image_to_string_cancelled(self):
+        tesseract_cmd = os.path.join(self._directory, "tesseract")
+        pid_path = os.path.join(self._directory, "pid")
+        with open(tesseract_cmd, "w") as script:
+            script.write(
+                "#!" + sys.executable + "\n"
+                "import os, time\n"
+                "with open({!r}, 'w') as pid_file:\n"
+                "    pid_file.write(str(os.getpid()))\n"
+                "time.sleep(30)\n".format(pid_path)
+            )
+        os.chmod(tesseract_cmd, 0o755)
+
+        async def cancel():
+            task = asyncio.ensure_future(
+                aio.image_to_string(np.zeros((20, 40, 3), np.uint8))
+            )
+            while not os.path.isfile(pid_path) or os.path.getsize(pid_path) == 0:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with mock.patch.object(pytesseract.pytesseract, "tesseract_cmd", tesseract_cmd):
+            run(asyncio.wait_for(cancel(), 10))
+        with open(pid_path) as pid_file:
+            pid = int(pid_file.read())
+        # the process was killed and reaped
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test_detect_face_async(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "data/sample_de_identity_card.jpg"
+        )
+        face_image = run(aio.detect_face_async(image_path, max_side=400))
+        self.assertIsNotNone(face_image)
+
+    def test_unknown_ocr_mode(self):
+        with self.assertRaises(ValueError):
+            aio.AsyncPipeline(ocr="unavailable")
+
+    def main(self):
+        for test in (
+            self.test_recognize_card,
+            self.test_recognize_card_max_regions,
+            self.test_recognize_card_subprocess_deadline,
+            self.test_recognize_card_fails,
+            self.test_image_to_string_subprocess,
+            self.test_image_to_string_cancelled,
+            self.test_detect_face_async,
+            self.test_unknown_ocr_mode,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    async_pipeline_tests = AsyncPipelineTest()
+    async_pipeline_tests.main()
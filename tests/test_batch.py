@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import json
+import multiprocessing
+import shutil
+import tempfile
+import unittest
+import pytest
+
+from unittest import mock
+from mocr import batch, tesseract_engine
+from fakes import FakeEngine, FakeNet, patch_model
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._data = os.path.join(os.path.dirname(__file__), "data")
+        os.makedirs(os.path.join(self._directory, "nested"))
+        for name in ("sample_de_identity_card.jpg", "sample_uk_identity_card.png"):
+            shutil.copy(os.path.join(self._data, name), self._directory)
+        shutil.copy(
+            os.path.join(self._data, "test.png"),
+            os.path.join(self._directory, "nested"),
+        )
+        with open(os.path.join(self._directory, "notes.txt"), "w") as notes:
+            notes.write("not an image")
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_expand_inputs(self):
+        paths = batch.expand_inputs([self._directory])
+        self.assertEqual(
+            [os.path.relpath(path, self._directory) for path in paths],
+            [
+                "sample_de_identity_card.jpg",
+                "sample_uk_identity_card.png",
+                os.path.join("nested", "test.png"),
+            ],
+        )
+        paths = batch.expand_inputs(
+            [
+                os.path.join(self._directory, "*.png"),
+                os.path.join(self._data, "test.png"),
+            ]
+        )
+        self.assertEqual(len(paths), 2)
+        self.assertEqual(
+            batch.expand_inputs([os.path.join(self._directory, "*.bmp")]), []
+        )
+
+    def test_run_batch(self):
+        paths = batch.expand_inputs([self._directory]) + ["unavailable.png"]
+        output = io.StringIO()
+        with patch_model(FakeNet()), mock.patch.object(
+            tesseract_engine, "get_engine", return_value=FakeEngine(" text\n")
+        ):
+            failures = batch.run_batch(paths, {"east_path": __file__}, output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(failures, 1)
+        self.assertEqual([line["path"] for line in lines], paths)
+        self.assertEqual(lines[0]["results"][0]["text"], "text")
+        self.assertEqual(len(lines[0]["face"]), 4)
+        self.assertEqual(
+            set(lines[0]["timings"]),
+            {
+                "load_image",
+                "resize_image",
+                "model_load",
+                "forward",
+                "decode_predictions",
+                "nms",
+                "ocr",
+                "get_results",
+                "face",
+            },
+        )
+        self.assertIn("error", lines[-1])
+
+    @pytest.mark.skipif(
+        multiprocessing.get_start_method() != "fork",
+        reason="workers inherit the patched detector and engine when forked",
+    )
+    def test_run_batch_workers(self):
+        paths = batch.expand_inputs([self._directory]) + ["unavailable.png"]
+        (serial, pooled) = (io.StringIO(), io.StringIO())
+        with patch_model(FakeNet()), mock.patch.object(
+            tesseract_engine, "get_engine", return_value=FakeEngine(" text\n")
+        ):
+            batch.run_batch(paths, {"east_path": __file__}, serial)
+            failures = batch.run_batch(paths, {"east_path": __file__}, pooled, 2)
+        self.assertEqual(failures, 1)
+        # the workers finish in any order
+        lines = sorted(
+            (json.loads(line) for line in pooled.getvalue().splitlines()),
+            key=lambda line: paths.index(line["path"]),
+        )
+        expected = [json.loads(line) for line in serial.getvalue().splitlines()]
+        self.assertEqual([line["path"] for line in lines], paths)
+        for (line, expected_line) in zip(lines, expected):
+            line.pop("timings", None)
+            expected_line.pop("timings", None)
+            self.assertEqual(line, expected_line)
+
+    def test_run_batch_templates(self):
+        paths = batch.expand_inputs([self._directory])
+        output = io.StringIO()
+        with patch_model(FakeNet()), mock.patch.object(
+            tesseract_engine, "get_engine", return_value=FakeEngine(" text\n")
+        ):
+            batch.run_batch(paths, {"east_path": __file__, "templates": True}, output)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        # the sample cards are read by their layouts, the other image by EAST
+        self.assertEqual(lines[0]["template"], "de_identity_card")
+        self.assertEqual(lines[0]["fields"]["surname"], "text")
+        self.assertEqual(set(lines[0]["timings"]), {"load_image", "face", "ocr"})
+        self.assertEqual(lines[1]["template"], "uk_identity_card")
+        self.assertNotIn("template", lines[2])
+        self.assertIn("results", lines[2])
+
+    def test_main_fails(self):
+        self.assertEqual(
+            batch.main([os.path.join(self._directory, "*.bmp"), "--east", __file__]), 1
+        )
+        self.assertEqual(
+            batch.main(
+                [self._directory, "--east", os.path.join(self._data, "unavailable.pb")]
+            ),
+            1,
+        )
+
+    def main(self):
+        for test in (
+            self.test_expand_inputs,
+            self.test_run_batch,
+            self.test_run_batch_workers,
+            self.test_run_batch_templates,
+            self.test_main_fails,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    batch_tests = BatchTest()
+    batch_tests.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+import pytest
+import cv2
+import numpy as np
+
+from mocr import card
+from fakes import FakeEngine, FakeNet, patch_model
+
+
+class CardTest(unittest.TestCase):
+    def setUp(self):
+        self._image_path = os.path.join("tests", "data/sample_uk_identity_card.png")
+        # a box on a cell inside the portrait of the UK sample card and one
+        # on a cell in the text area
+        self._net = FakeNet(
+            (((54, 14), 0.9, (4, 10, 4, 10)), ((25, 62), 0.9, (4, 10, 4, 10)))
+        )
+
+    def test_analyze_card(self):
+        for parallel in (True, False):
+            engine = FakeEngine("SURNAME")
+            with patch_model(self._net):
+                analysis = card.analyze_card(
+                    self._image_path, __file__, parallel=parallel, engine=engine
+                )
+            self.assertEqual(analysis.image.shape, (201, 312, 3))
+            self.assertEqual(analysis.face_box, (16, 97, 80, 80))
+            self.assertEqual(analysis.face.shape, (80, 80, 3))
+            # the box on the portrait is not recognized, tesseract gets gray
+            self.assertEqual(len(analysis.results), 1)
+            self.assertEqual(analysis.results[0][1], "SURNAME")
+            self.assertEqual([len(shape) for shape in engine.shapes], [2])
+
+    def test_analyze_card_keeps_portrait(self):
+        with patch_model(self._net):
+            analysis = card.analyze_card(
+                cv2.imread(self._image_path),
+                __file__,
+                skip_portrait=False,
+                engine=FakeEngine("SURNAME"),
+            )
+        self.assertEqual(len(analysis.results), 2)
+
+    def test_analyze_card_budget(self):
+        # the box on the portrait is smaller but much more confident
+        net = FakeNet(
+            (((54, 14), 0.99, (4, 10, 4, 10)), ((25, 62), 0.55, (4, 12, 4, 12)))
+        )
+        with patch_model(net):
+            analysis = card.analyze_card(
+                self._image_path,
+                __file__,
+                skip_portrait=False,
+                max_regions=1,
+                engine=FakeEngine("SURNAME"),
+            )
+        self.assertEqual(analysis.results.skipped, 1)
+        self.assertLess(analysis.results[0][0][0], 80)
+
+    def test_analyze_card_fail(self):
+        self.assertIsNone(card.analyze_card("unavailable.png", __file__))
+
+    def test_portrait_mask(self):
+        boxes = np.array([[20, 100, 60, 120], [100, 100, 140, 120], [0, 0, 10, 10]])
+        mask = card.portrait_mask(boxes, (10, 90, 60, 60), 1.0, 1.0, margin=0.0)
+        self.assertEqual(mask.tolist(), [False, True, True])
+        mask = card.portrait_mask(boxes, (10, 90, 60, 60), 1.0, 0.5, margin=0.0)
+        self.assertEqual(mask.tolist(), [False, False, True])
+
+    def main(self):
+        self.setUp()
+        self.test_analyze_card()
+        self.test_analyze_card_keeps_portrait()
+        self.test_analyze_card_budget()
+        self.test_analyze_card_fail()
+        self.test_portrait_mask()
+
+
+if __name__ == "__main__":
+    card_tests = CardTest()
+    card_tests.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import pytest
+import cv2
+import numpy as np
+
+from unittest import mock
+from mocr import TextRecognizer, detector_backends, model_cache
+
+
+class _RecordingNet(object):
+    def __init__(self):
+        self.calls = []
+
+    def setPreferableBackend(self, backend):
+        self.calls.append(("backend", backend))
+
+    def setPreferableTarget(self, target):
+        self.calls.append(("target", target))
+
+
+def _write_east_onnx(path):
+    """Writes a tiny model with the inputs and outputs of an EAST graph
+    exported from TensorFlow, NHWC and with the output stride of 4."""
+
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+
+    random = np.random.RandomState(0)
+    scores_weights = (random.randn(1, 3, 4, 4) * 0.01).astype(np.float32)
+    geometry_weights = random.randn(5, 3, 4, 4).astype(np.float32)
+    nodes = [
+        helper.make_node("Transpose", ["input_images"], ["nchw"], perm=[0, 3, 1, 2]),
+        helper.make_node("Conv", ["nchw", "w1"], ["c1"], strides=[4, 4]),
+        helper.make_node("Sigmoid", ["c1"], ["s"]),
+        helper.make_node("Conv", ["nchw", "w5"], ["g"], strides=[4, 4]),
+        helper.make_node("Transpose", ["s"], ["scores"], perm=[0, 2, 3, 1]),
+        helper.make_node("Transpose", ["g"], ["geometry"], perm=[0, 2, 3, 1]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "east",
+        [
+            helper.make_tensor_value_info(
+                "input_images", TensorProto.FLOAT, [1, "h", "w", 3]
+            )
+        ],
+        [
+            helper.make_tensor_value_info("scores", TensorProto.FLOAT, None),
+            helper.make_tensor_value_info("geometry", TensorProto.FLOAT, None),
+        ],
+        [
+            numpy_helper.from_array(scores_weights, "w1"),
+            numpy_helper.from_array(geometry_weights, "w5"),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+class DetectorBackendsTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_get_backend(self):
+        backend = detector_backends.get_backend("opencv")
+        self.assertIs(backend, detector_backends.get_backend("opencv"))
+        self.assertIsNot(
+            backend, detector_backends.get_backend("opencv", opencv_backend="opencv")
+        )
+        self.assertIs(detector_backends.get_backend(backend), backend)
+        with pytest.raises(ValueError):
+            detector_backends.get_backend("unknown")
+        with pytest.raises(ValueError):
+            detector_backends.OpenCVBackend(target="cuda")
+
+    def test_opencv_backend(self):
+        net = _RecordingNet()
+        backend = detector_backends.OpenCVBackend("opencv", "cpu")
+        with mock.patch.object(cv2.dnn, "readNet", lambda path: net):
+            model = backend.get_model(__file__)
+        self.assertIs(model.net, net)
+        self.assertEqual(
+            net.calls,
+            [
+                ("backend", cv2.dnn.DNN_BACKEND_OPENCV),
+                ("target", cv2.dnn.DNN_TARGET_CPU),
+            ],
+        )
+        self.assertEqual(backend.key, "opencv/opencv/cpu")
+
+        # the default configuration uses the process-wide cache
+        cache = model_cache.ModelCache(loader=lambda path: net)
+        with mock.patch.object(model_cache, "_default_cache", cache):
+            detector_backends.get_backend("opencv").get_model(__file__)
+        self.assertEqual(len(cache), 1)
+
+    def test_onnxruntime_backend(self):
+        pytest.importorskip("onnxruntime")
+        model_path = os.path.join(self._directory, "east.onnx")
+        _write_east_onnx(model_path)
+        text_recognizer = TextRecognizer(
+            None, model_path, width=96, height=64, backend="onnxruntime"
+        )
+        image = np.random.RandomState(1).randint(0, 255, (100, 150, 3), np.uint8)
+        (resized_image, _, _, _, _) = text_recognizer.resize_image(image, 96, 64)
+        (scores, geometry) = text_recognizer.geometry_score(model_path, resized_image)
+        self.assertEqual(scores.shape, (1, 1, 16, 24))
+        self.assertEqual(geometry.shape, (1, 5, 16, 24))
+        detections = text_recognizer.detect_batch([image, image])
+        np.testing.assert_allclose(detections[1][1], geometry, rtol=1e-4, atol=1e-3)
+
+        int8_path = detector_backends.quantize(
+            model_path, os.path.join(self._directory, "east.int8.onnx")
+        )
+        (_, int8_geometry) = text_recognizer.geometry_score(int8_path, resized_image)
+        error = np.abs(int8_geometry - geometry).max() / np.abs(geometry).max()
+        self.assertLess(error, 0.05)
+
+    def main(self):
+        for test in (
+            self.test_get_backend,
+            self.test_opencv_backend,
+            self.test_onnxruntime_backend,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    detector_backends_tests = DetectorBackendsTest()
+    detector_backends_tests.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import pytest
+import cv2
+import numpy as np
+
+from unittest import mock
+from mocr import face_backends, face_detection, model_cache, nms
+
+
+class _SSDNet(object):
+    """Predicts the face of the UK sample card and a weak detection."""
+
+    def setInput(self, blob):
+        self.shape = blob.shape
+
+    def forward(self):
+        detections = np.zeros((1, 1, 2, 7), np.float32)
+        detections[0, 0, 0] = (0, 1, 0.98, 0.05, 0.48, 0.31, 0.88)
+        detections[0, 0, 1] = (0, 1, 0.2, 0.5, 0.5, 0.9, 0.9)
+        return detections
+
+
+class _YuNet(object):
+    def __init__(self, box=(16, 40, 40, 40)):
+        self.box = box
+        self.sizes = []
+
+    def setInputSize(self, size):
+        self.sizes.append(size)
+
+    def detect(self, image):
+        face = np.zeros((1, 15), np.float32)
+        face[0, :4] = self.box
+        face[0, -1] = 0.9
+        return (1, face)
+
+
+class FaceBackendsTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._image_path = os.path.join(
+            os.path.dirname(__file__), "data/sample_uk_identity_card.png"
+        )
+        self._model_path = os.path.join(self._directory, "model")
+        with open(self._model_path, "wb") as model_file:
+            model_file.write(b"model")
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_face_box(self):
+        face = face_backends.FaceBox(16.4, 97, 80, 80, score=3.0)
+        self.assertEqual(face, (16, 97, 80, 80))
+        (x, y, w, h) = face
+        self.assertEqual(face.score, 3.0)
+        self.assertEqual(face.scaled(0.5), (32, 194, 160, 160))
+        self.assertEqual(face.scaled(0.5).score, 3.0)
+        self.assertEqual(pickle.loads(pickle.dumps(face)).score, 3.0)
+
+    def test_get_backend(self):
+        backend = face_backends.get_backend("haar")
+        self.assertIs(backend, face_backends.get_backend("haar"))
+        self.assertIs(face_backends.get_backend(backend), backend)
+        self.assertIsNot(backend, face_backends.get_backend("haar", scale_factor=1.2))
+        self.assertEqual(
+            backend.key, "cascade/haarcascade_frontalface_default.xml/1.1/5"
+        )
+        self.assertEqual(
+            face_backends.get_backend("lbp").key,
+            "cascade/lbpcascade_frontalface_improved.xml/1.1/5",
+        )
+        for name in ("yunet", "ssd"):
+            with pytest.raises(ValueError):
+                face_backends.get_backend(name)
+        with pytest.raises(ValueError):
+            face_backends.get_backend("yunet", os.path.join(self._directory, "none"))
+        with pytest.raises(ValueError):
+            face_backends.get_backend("unknown")
+
+    def test_cascade_backend(self):
+        image = cv2.imread(self._image_path)
+        faces = face_detection.detect_faces(image)
+        self.assertEqual(faces, [(16, 97, 80, 80)])
+        self.assertGreater(faces[0].score, 0)
+        # the bundled lbp cascade is chosen by name
+        faces = face_detection.detect_faces(image, backend="lbp", min_neighbors=3)
+        self.assertEqual(len(faces), 1)
+        self.assertGreater(nms.iou(faces[0], (16, 97, 80, 80), xywh=True), 0.3)
+        # any cascade file works
+        backend = face_backends.get_backend(
+            "lbp", face_backends.CASCADE_PATH, min_neighbors=3
+        )
+        faces = face_detection.detect_faces(image, max_side=200, backend=backend)
+        self.assertEqual(len(faces), 1)
+        # the dnn backends need a model and are given as an instance
+        for name in ("yunet", "ssd"):
+            with pytest.raises(ValueError):
+                face_detection.detect_faces(image, backend=name)
+            with pytest.raises(ValueError):
+                face_detection.detect_face(self._image_path, backend=name)
+
+    def test_ssd_backend(self):
+        backend = face_backends.SSDBackend(self._model_path, confidence=0.5)
+        net = _SSDNet()
+        backend._cache = model_cache.ModelCache(loader=lambda path: net)
+        image = cv2.imread(self._image_path)
+        faces = face_detection.detect_faces(image, backend=backend)
+        self.assertEqual(net.shape, (1, 3, 300, 300))
+        self.assertEqual(len(faces), 1)
+        (x, y, w, h) = faces[0]
+        self.assertEqual((x, y), (16, 96))
+        self.assertAlmostEqual(w, 80, delta=2)
+        self.assertAlmostEqual(faces[0].score, 0.98, places=5)
+        # grayscale images are converted for the dnn backends
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.assertEqual(face_detection.detect_faces(gray, backend=backend), faces)
+        self.assertEqual(
+            face_detection.detect_faces(image, min_size=(100, 100), backend=backend),
+            [],
+        )
+
+    def test_yunet_backend(self):
+        detector = _YuNet()
+        backend = face_backends.YuNetBackend(self._model_path)
+        with mock.patch.object(
+            cv2, "FaceDetectorYN", mock.Mock(create=lambda *args: detector)
+        ):
+            face = face_detection.detect_face(self._image_path, backend=backend)
+            faces = face_detection.detect_faces(
+                self._image_path, max_side=156, backend=backend
+            )
+        self.assertEqual(face.shape, (40, 40, 3))
+        self.assertEqual(detector.sizes, [(312, 201), (156, 100)])
+        self.assertEqual(faces, [(32, 80, 80, 80)])
+
+    def test_yunet_backend_image_edge(self):
+        # the face is cut by the top left corner of the image
+        detector = _YuNet(box=(-12, -20, 80, 80))
+        backend = face_backends.YuNetBackend(self._model_path)
+        image = np.zeros((100, 150, 3), np.uint8)
+        with mock.patch.object(
+            cv2, "FaceDetectorYN", mock.Mock(create=lambda *args: detector)
+        ):
+            faces = backend.detect(image, (30, 30))
+        self.assertEqual(faces, [(0, 0, 68, 60)])
+        (x, y, w, h) = faces[0]
+        self.assertEqual(image[y : y + h, x : x + w].shape, (60, 68, 3))
+
+    def main(self):
+        for test in (
+            self.test_face_box,
+            self.test_get_backend,
+            self.test_cascade_backend,
+            self.test_ssd_backend,
+            self.test_yunet_backend,
+            self.test_yunet_backend_image_edge,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    face_backends_tests = FaceBackendsTest()
+    face_backends_tests.main()
@@ -2,13 +2,46 @@
 # -*- coding: utf-8 -*-
 
 import os
+import shutil
+import tempfile
+import threading
 import unittest
 import pytest
+import cv2
+import numpy as np
 
+from unittest import mock
 from mocr import face_detection
 
 
+def _write_video(video_path, blank_frames, card_frames, fps=10, blurred_frames=0):
+    card = cv2.imread(
+        os.path.join(os.path.dirname(__file__), "data/sample_de_identity_card.jpg")
+    )
+    card = cv2.resize(card, (500, 316))
+    writer = cv2.VideoWriter(
+        video_path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (500, 316)
+    )
+    for _ in range(blank_frames):
+        writer.write(np.full(card.shape, 127, np.uint8))
+    for _ in range(blurred_frames):
+        writer.write(cv2.GaussianBlur(card, (7, 7), 0))
+    for _ in range(card_frames):
+        writer.write(card)
+    writer.release()
+
+
+def _sharpness(image):
+    return cv2.Laplacian(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+
+
 class FaceDetectionTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
     def test_detect_face_success(self):
         image_path = os.path.join(
             os.path.dirname(__file__), "data/sample_de_identity_card.jpg"
@@ -16,6 +49,43 @@ class FaceDetectionTest(unittest.TestCase):
         face_image = face_detection.detect_face(image_path)
         self.assertIsNotNone(face_image)
 
+    def test_detect_face_in_memory(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "data/sample_de_identity_card.jpg"
+        )
+        with open(image_path, "rb") as image_file:
+            data = image_file.read()
+        face_image = face_detection.detect_face(data)
+        self.assertIsNotNone(face_image)
+        self.assertEqual(face_image.shape, face_detection.detect_face(image_path).shape)
+
+    def test_detect_face_downscaled(self):
+        image_path = os.path.join(
+            os.path.dirname(__file__), "data/sample_de_identity_card.jpg"
+        )
+        face_image = face_detection.detect_face(image_path)
+        downscaled_face_image = face_detection.detect_face(image_path, max_side=320)
+        self.assertIsNotNone(downscaled_face_image)
+        self.assertLess(
+            abs(downscaled_face_image.shape[0] - face_image.shape[0]),
+            face_image.shape[0] * 0.1,
+        )
+        self.assertIsNone(face_detection.detect_face(image_path, min_size=(400, 400)))
+        self.assertIsNotNone(
+            face_detection.detect_face(image_path, scale_factor=1.3, min_neighbors=3)
+        )
+
+    def test_face_cascade_cached_per_thread(self):
+        cascade = face_detection.face_cascade()
+        self.assertIs(cascade, face_detection.face_cascade())
+        cascades = []
+        thread = threading.Thread(
+            target=lambda: cascades.append(face_detection.face_cascade())
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(cascades[0], cascade)
+
     def test_detect_face_fails(self):
         image_path = os.path.join(os.path.dirname(__file__), "data/test.png")
         face_image = face_detection.detect_face(image_path)
@@ -36,11 +106,105 @@ class FaceDetectionTest(unittest.TestCase):
         face_image = face_detection.detect_face_from_video(video_path)
         self.assertIsNone(face_image)
 
+    def test_detect_face_from_video_end_of_stream(self):
+        video_path = os.path.join(self._directory, "blank.avi")
+        _write_video(video_path, 5, 0)
+        face_image = face_detection.detect_face_from_video(video_path)
+        self.assertIsNone(face_image)
+
+    def test_detect_face_from_video_streaming(self):
+        video_path = os.path.join(self._directory, "card.avi")
+        _write_video(video_path, 12, 4)
+        self.assertIsNotNone(face_detection.detect_face_from_video(video_path))
+        self.assertIsNotNone(
+            face_detection.detect_face_from_video(video_path, frame_stride=5)
+        )
+        self.assertIsNotNone(
+            face_detection.detect_face_from_video(
+                video_path, stride_msec=300.0, max_side=240
+            )
+        )
+        self.assertIsNotNone(
+            face_detection.detect_face_from_video(
+                video_path, start_msec=1200.0, max_frames=1
+            )
+        )
+        self.assertIsNone(
+            face_detection.detect_face_from_video(video_path, max_frames=3)
+        )
+        self.assertIsNone(
+            face_detection.detect_face_from_video(video_path, deadline=0.0)
+        )
+
+    def test_detect_face_from_video_best_frame(self):
+        video_path = os.path.join(self._directory, "card.avi")
+        _write_video(video_path, 4, 6, blurred_frames=6)
+        calls = []
+        detect_faces = face_detection._detect_faces
+
+        def count(*args):
+            calls.append(args[0].shape)
+            return detect_faces(*args)
+
+        with mock.patch.object(face_detection, "_detect_faces", count):
+            first_face = face_detection.detect_face_from_video(video_path)
+            self.assertEqual(len(calls), 5)
+            del calls[:]
+            best_face = face_detection.detect_face_from_video(
+                video_path, best_frame=True, detect_interval=3
+            )
+        # the cascade runs on the blank frames and every third card frame,
+        # the face is followed in between
+        self.assertEqual(len(calls), 4 + 4)
+        self.assertGreater(_sharpness(best_face), 2 * _sharpness(first_face))
+        # nothing is drawn on the crops
+        for face in (first_face, best_face):
+            border = face[0].astype(np.float64).mean(axis=0)
+            self.assertLess(border[1] - (border[0] + border[2]) / 2, 60)
+
+        self.assertIsNone(
+            face_detection.detect_face_from_video(
+                video_path, best_frame=True, max_frames=4
+            )
+        )
+
+    def test_detect_face_from_video_lost_track(self):
+        random = np.random.RandomState(3)
+        frames = [
+            np.full((120, 160, 3), 127, np.uint8),
+            random.randint(0, 255, (120, 160, 3)).astype(np.uint8),
+            np.full((120, 160, 3), 127, np.uint8),
+            np.full((120, 160, 3), 127, np.uint8),
+        ]
+        for frame in (frames[0], frames[3]):
+            cv2.rectangle(frame, (50, 30), (70, 50), (0, 0, 0), -1)
+        # one tracked frame, the track is lost and the face detected again
+        follow = mock.Mock(side_effect=[((40, 20, 40, 40), None), (None, None)])
+        detect = mock.Mock(return_value=[(40, 20, 40, 40)])
+        with mock.patch.object(face_detection, "_detect_faces", detect):
+            with mock.patch.object(face_detection, "_follow_face", follow):
+                face = face_detection._best_face(iter(frames), 3)
+        self.assertEqual(follow.call_count, 2)
+        # the cascade is given the grayscale frame the tracker uses as well
+        self.assertTrue(all(call[0][0].ndim == 2 for call in detect.call_args_list))
+        # the sharp crop of the lost track is never confirmed
+        self.assertEqual(face.shape, (40, 40, 3))
+        self.assertTrue((face == frames[0][20:60, 40:80]).all())
+
     def main(self):
+        self.setUp()
         self.test_detect_face_success()
+        self.test_detect_face_in_memory()
+        self.test_detect_face_downscaled()
+        self.test_face_cascade_cached_per_thread()
         self.test_detect_face_fails()
         self.test_detect_face_from_video_success()
         self.test_detect_face_from_video_fails()
+        self.test_detect_face_from_video_end_of_stream()
+        self.test_detect_face_from_video_streaming()
+        self.test_detect_face_from_video_best_frame()
+        self.test_detect_face_from_video_lost_track()
+        self.tearDown()
 
 
 if __name__ == "__main__":
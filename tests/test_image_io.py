@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+import pytest
+import numpy as np
+
+from mocr import image_io
+
+
+class ImageIOTest(unittest.TestCase):
+    def setUp(self):
+        self._image_path = os.path.join(
+            os.path.dirname(__file__), "data/sample_uk_identity_card.png"
+        )
+
+    def test_read_image_path(self):
+        image = image_io.read_image(self._image_path)
+        self.assertEqual(image.shape, (201, 312, 3))
+
+    def test_read_image_bytes(self):
+        with open(self._image_path, "rb") as image_file:
+            data = image_file.read()
+        expected = image_io.read_image(self._image_path)
+        np.testing.assert_array_equal(image_io.read_image(data), expected)
+        np.testing.assert_array_equal(image_io.read_image(bytearray(data)), expected)
+        np.testing.assert_array_equal(image_io.read_image(memoryview(data)), expected)
+
+    def test_read_image_array(self):
+        image = np.zeros((10, 20, 3), np.uint8)
+        self.assertIs(image_io.read_image(image), image)
+        copied = image_io.read_image(image, copy=True)
+        self.assertIsNot(copied, image)
+        np.testing.assert_array_equal(copied, image)
+
+    def test_read_image_fails(self):
+        self.assertIsNone(image_io.read_image(None))
+        self.assertIsNone(image_io.read_image(b""))
+        self.assertIsNone(image_io.read_image(b"not an image"))
+        self.assertIsNone(
+            image_io.read_image(
+                os.path.join(os.path.dirname(__file__), "data/unavailable.png")
+            )
+        )
+
+    def main(self):
+        self.setUp()
+        self.test_read_image_path()
+        self.test_read_image_bytes()
+        self.test_read_image_array()
+        self.test_read_image_fails()
+
+
+if __name__ == "__main__":
+    image_io_tests = ImageIOTest()
+    image_io_tests.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import subprocess
+import unittest
+import pytest
+
+HEAVY_MODULES = ("cv2", "numpy", "pytesseract", "imutils")
+# module level __getattr__ needs Python 3.7, mocr imports eagerly before
+lazy = pytest.mark.skipif(sys.version_info < (3, 7), reason="eager import")
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+class ImportTest(unittest.TestCase):
+    @lazy
+    def test_import_is_lazy(self):
+        process = _run(
+            "import sys, mocr; print(*[name for name in {!r} if name in sys.modules])".format(
+                HEAVY_MODULES
+            )
+        )
+        self.assertEqual(process.stdout.strip(), "")
+        # -X importtime reports "self | cumulative | package" in microseconds
+        cumulative = [
+            int(line.split("|")[1])
+            for line in process.stderr.splitlines()
+            if line.split("|")[-1].strip() == "mocr"
+        ]
+        self.assertEqual(len(cumulative), 1)
+        self.assertLess(cumulative[0], 100 * 1000)
+
+    @lazy
+    def test_attributes_load_on_first_use(self):
+        process = _run(
+            "import sys, mocr; mocr.face_detection; print('cv2' in sys.modules, "
+            "'mocr.text_recognition' in sys.modules); from mocr import TextRecognizer; "
+            "print(TextRecognizer.__module__)"
+        )
+        self.assertEqual(
+            process.stdout.split(), ["True", "False", "mocr.text_recognition"]
+        )
+
+    def test_unknown_attribute(self):
+        import mocr
+
+        with pytest.raises(AttributeError):
+            mocr.unavailable
+        self.assertIn("TextRecognizer", dir(mocr))
+
+    def main(self):
+        self.test_import_is_lazy()
+        self.test_attributes_load_on_first_use()
+        self.test_unknown_attribute()
+
+
+if __name__ == "__main__":
+    import_tests = ImportTest()
+    import_tests.main()
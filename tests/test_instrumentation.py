@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import pytest
+
+from mocr import instrumentation
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_null_tracer(self):
+        tracer = instrumentation.NULL_TRACER
+        self.assertFalse(tracer.enabled)
+        self.assertIs(tracer.stage("forward"), tracer.stage("nms"))
+        with tracer.stage("forward"):
+            tracer.count("boxes", 3)
+
+    def test_recording_tracer(self):
+        tracer = instrumentation.RecordingTracer()
+        with tracer.stage("forward"):
+            pass
+        with tracer.stage("forward"):
+            pass
+        tracer.count("boxes", 3)
+        tracer.count("boxes", 2)
+        self.assertEqual(len(tracer.timings["forward"]), 2)
+        self.assertEqual(tracer.counters["boxes"], 5)
+        self.assertGreaterEqual(tracer.totals()["forward"], 0.0)
+        tracer.reset()
+        self.assertEqual(len(tracer.timings), 0)
+
+    def test_recording_tracer_exception(self):
+        tracer = instrumentation.RecordingTracer()
+        with self.assertRaises(ValueError):
+            with tracer.stage("ocr"):
+                raise ValueError()
+        self.assertEqual(len(tracer.timings["ocr"]), 1)
+
+    def test_callback_tracer(self):
+        timings = []
+        counts = []
+        tracer = instrumentation.CallbackTracer(
+            on_timing=lambda name, seconds: timings.append(name),
+            on_count=lambda name, value: counts.append((name, value)),
+        )
+        with tracer.stage("nms"):
+            tracer.count("candidates", 7)
+        self.assertEqual(timings, ["nms"])
+        self.assertEqual(counts, [("candidates", 7)])
+        instrumentation.CallbackTracer().count("boxes", 1)
+
+    def main(self):
+        self.test_null_tracer()
+        self.test_recording_tracer()
+        self.test_recording_tracer_exception()
+        self.test_callback_tracer()
+
+
+if __name__ == "__main__":
+    instrumentation_tests = InstrumentationTest()
+    instrumentation_tests.main()
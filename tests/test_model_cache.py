@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import pytest
+
+from mocr import model_cache
+
+
+class ModelCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._paths = []
+        for name in ("first.pb", "second.pb", "third.pb"):
+            path = os.path.join(self._directory, name)
+            with open(path, "wb") as model_file:
+                model_file.write(b"model")
+            self._paths.append(path)
+        self._loaded = []
+        self._cache = model_cache.ModelCache(max_size=2, loader=self._loader)
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _loader(self, path):
+        self._loaded.append(path)
+        return object()
+
+    def test_get_loads_once(self):
+        first = self._cache.get(self._paths[0])
+        second = self._cache.get(self._paths[0])
+        self.assertIs(first.net, second.net)
+        self.assertEqual(len(self._loaded), 1)
+
+    def test_get_fails(self):
+        model = self._cache.get(os.path.join(self._directory, "unavailable.pb"))
+        self.assertIsNone(model)
+        self.assertEqual(len(self._cache), 0)
+
+    def test_get_reloads_changed_file(self):
+        first = self._cache.get(self._paths[0])
+        stat = os.stat(self._paths[0])
+        os.utime(self._paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = self._cache.get(self._paths[0])
+        self.assertIsNot(first.net, second.net)
+        self.assertEqual(len(self._cache), 1)
+
+    def test_lru_eviction(self):
+        self._cache.get(self._paths[0])
+        self._cache.get(self._paths[1])
+        self._cache.get(self._paths[0])
+        self._cache.get(self._paths[2])
+        self.assertEqual(len(self._cache), 2)
+        self._cache.get(self._paths[0])
+        self.assertEqual(len(self._loaded), 3)
+        self._cache.get(self._paths[1])
+        self.assertEqual(len(self._loaded), 4)
+
+    def test_preload_and_clear(self):
+        self._cache.preload(self._paths[0], self._paths[1])
+        self.assertEqual(len(self._loaded), 2)
+        self._cache.clear()
+        self.assertEqual(len(self._cache), 0)
+
+    def test_after_fork_in_child(self):
+        model = self._cache.get(self._paths[0])
+        model.lock.acquire()
+        self._cache._after_fork_in_child()
+        child_model = self._cache.get(self._paths[0])
+        self.assertIs(child_model.net, model.net)
+        self.assertTrue(child_model.lock.acquire(blocking=False))
+        child_model.lock.release()
+        model.lock.release()
+
+    def main(self):
+        for test in (
+            self.test_get_loads_once,
+            self.test_get_fails,
+            self.test_get_reloads_changed_file,
+            self.test_lru_eviction,
+            self.test_preload_and_clear,
+            self.test_after_fork_in_child,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    model_cache_tests = ModelCacheTest()
+    model_cache_tests.main()
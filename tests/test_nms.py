@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+import pytest
+import numpy as np
+
+from mocr import nms
+from mocr.text_recognition import TextRecognizer
+
+
+class NMSTest(unittest.TestCase):
+    def test_non_max_suppression(self):
+        boxes = np.array(
+            [[0, 0, 9, 9], [1, 1, 10, 10], [20, 20, 29, 29], [0, 0, 4, 4]],
+            dtype=np.int64,
+        )
+        probs = np.array([0.9, 0.8, 0.7, 0.95], dtype=np.float32)
+        # the small box is most confident, the big one covers it entirely but
+        # is only suppressed relative to its own area (25 / 100)
+        kept = nms.non_max_suppression_indices(boxes, probs)
+        self.assertEqual(list(kept), [3, 0, 2])
+        self.assertEqual(
+            nms.non_max_suppression(boxes, probs).tolist(),
+            [[0, 0, 4, 4], [0, 0, 9, 9], [20, 20, 29, 29]],
+        )
+
+    def test_iou(self):
+        self.assertAlmostEqual(nms.iou((0, 0, 10, 10), (5, 0, 15, 10)), 1 / 3.0)
+        self.assertEqual(nms.iou((0, 0, 10, 10), (20, 20, 30, 30)), 0.0)
+        self.assertEqual(nms.iou((0, 0, 0, 0), (0, 0, 0, 0)), 0.0)
+        self.assertAlmostEqual(
+            nms.iou((0, 0, 10, 10), (5, 0, 10, 10), xywh=True), 1 / 3.0
+        )
+
+    def test_non_max_suppression_empty(self):
+        self.assertEqual(nms.non_max_suppression(np.empty((0, 4))).shape, (0, 4))
+        self.assertEqual(len(nms.non_max_suppression_indices([])), 0)
+
+    def test_non_max_suppression_top_k(self):
+        boxes = np.array([[0, 0, 9, 9], [20, 20, 29, 29], [40, 40, 49, 49]])
+        probs = np.array([0.5, 0.9, 0.7])
+        self.assertEqual(
+            list(nms.non_max_suppression_indices(boxes, probs, top_k=2)), [1, 2]
+        )
+
+    def test_non_max_suppression_matches_imutils(self):
+        object_detection = pytest.importorskip("imutils.object_detection")
+        generator = np.random.default_rng(0)
+        start = generator.integers(0, 300, size=(2000, 2))
+        size = generator.integers(4, 80, size=(2000, 2))
+        boxes = np.concatenate((start, start + size), axis=1)
+        probs = generator.random(2000)
+        for overlap_thresh in (0.1, 0.3, 0.7):
+            self.assertTrue(
+                np.array_equal(
+                    nms.non_max_suppression(boxes, probs, overlap_thresh),
+                    object_detection.non_max_suppression(
+                        boxes, probs=probs, overlapThresh=overlap_thresh
+                    ),
+                )
+            )
+
+    def test_rotated_non_max_suppression(self):
+        rotated_rects = [
+            ((50.0, 50.0), (80.0, 10.0), 30.0),
+            ((51.0, 50.0), (80.0, 10.0), 30.0),
+            ((50.0, 50.0), (80.0, 10.0), -30.0),
+        ]
+        probs = np.array([0.8, 0.9, 0.7])
+        # the crossing line barely overlaps the others and is kept
+        kept = nms.rotated_non_max_suppression_indices(rotated_rects, probs)
+        self.assertEqual(list(kept), [1, 2])
+        self.assertEqual(len(nms.rotated_non_max_suppression_indices([], [])), 0)
+
+    def test_boxes_rotated(self):
+        scores = np.zeros((1, 1, 8, 8), dtype=np.float32)
+        geometry = np.zeros((1, 5, 8, 8), dtype=np.float32)
+        # two neighbouring cells predicting the same tilted line
+        scores[0, 0, 4, 2:4] = (0.9, 0.8)
+        geometry[0, 0:4, 4, 2] = (6, 30, 6, 2)
+        geometry[0, 0:4, 4, 3] = (6, 26, 6, 6)
+        geometry[0, 4, 4, 2:4] = 0.3
+        for nms_mode in ("axis", "rotated"):
+            text_recognizer = TextRecognizer(None, None, nms_mode=nms_mode)
+            boxes = text_recognizer.boxes(scores, geometry)
+            self.assertEqual(len(boxes), 1)
+        with pytest.raises(ValueError):
+            TextRecognizer(None, None, nms_mode="unknown")
+
+    def main(self):
+        self.test_non_max_suppression()
+        self.test_iou()
+        self.test_non_max_suppression_empty()
+        self.test_non_max_suppression_top_k()
+        self.test_non_max_suppression_matches_imutils()
+        self.test_rotated_non_max_suppression()
+        self.test_boxes_rotated()
+
+
+if __name__ == "__main__":
+    nms_tests = NMSTest()
+    nms_tests.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import pytest
+import cv2
+import numpy as np
+
+from mocr import TextRecognizer, result_cache, tesseract_engine
+from fakes import FakeEngine, FakeNet, patch_model
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._results = [((1, 2, 30, 12), "SURNAME"), ((1, 20, 30, 32), "GIVEN")]
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_memory_lru(self):
+        cache = result_cache.ResultCache(max_entries=2)
+        for key in ("first", "second"):
+            cache.put(key, self._results)
+        self.assertEqual(cache.get("first"), self._results)
+        cache.put("third", self._results)
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("first"), self._results)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(
+            cache.stats(),
+            {"hits": 2, "disk_hits": 0, "misses": 1, "entries": 2, "disk_bytes": 0},
+        )
+
+    def test_disk_tier(self):
+        cache = result_cache.ResultCache(directory=self._directory)
+        cache.put("first", self._results)
+        # a new cache on the same directory, e.g. after a restart
+        cache = result_cache.ResultCache(directory=self._directory)
+        self.assertGreater(cache.stats()["disk_bytes"], 0)
+        self.assertEqual(cache.get("first"), self._results)
+        self.assertEqual(cache.get("first"), self._results)
+        self.assertEqual(cache.stats()["disk_hits"], 1)
+        cache.clear()
+        self.assertIsNone(cache.get("first"))
+        self.assertEqual(os.listdir(self._directory), [])
+
+    def test_disk_eviction(self):
+        cache = result_cache.ResultCache(
+            max_entries=1, directory=self._directory, max_disk_bytes=200
+        )
+        for index in range(10):
+            cache.put(str(index), self._results)
+            path = os.path.join(self._directory, str(index) + ".json")
+            os.utime(path, ns=(index * 10**9, index * 10**9))
+        self.assertLessEqual(cache.stats()["disk_bytes"], 200)
+        self.assertIsNone(cache.get("0"))
+        self.assertEqual(cache.get("9"), self._results)
+
+    def test_result_key(self):
+        digest = result_cache.image_digest(b"image")
+        self.assertEqual(
+            result_cache.result_key(digest, {"width": 320, "lang": "eng"}),
+            result_cache.result_key(digest, {"lang": "eng", "width": 320}),
+        )
+        self.assertNotEqual(
+            result_cache.result_key(digest, {"width": 320}),
+            result_cache.result_key(digest, {"width": 640}),
+        )
+        self.assertNotEqual(
+            result_cache.image_digest(np.zeros((2, 3), np.uint8)),
+            result_cache.image_digest(np.zeros((3, 2), np.uint8)),
+        )
+        self.assertIsNone(result_cache.model_digest("unavailable.pb"))
+        self.assertEqual(len(result_cache.model_digest(__file__)), 64)
+
+    def test_recognize(self):
+        image = np.full((200, 300, 3), 255, np.uint8)
+        image_path = os.path.join(self._directory, "card.png")
+        cv2.imwrite(image_path, image)
+        engine = FakeEngine("SURNAME")
+        cache = result_cache.ResultCache()
+        with patch_model(FakeNet()):
+            text_recognizer = TextRecognizer(image_path, __file__, engine=engine)
+            first = text_recognizer.recognize(cache)
+            second = text_recognizer.recognize(cache)
+            in_memory = TextRecognizer(image, __file__, engine=engine)
+            in_memory.recognize(cache)
+            in_memory.min_confidence = 0.3
+            in_memory.recognize(cache)
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0][1], second[0][1])
+        # encoded and decoded images have different keys
+        self.assertEqual(engine.calls, 3)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 3)
+
+    def test_cache_key_engine_settings(self):
+        image = np.full((20, 30, 3), 255, np.uint8)
+        keys = [
+            TextRecognizer(None, __file__, engine=engine).cache_key(image)
+            for engine in (
+                tesseract_engine.PytesseractEngine("eng"),
+                tesseract_engine.PytesseractEngine("deu"),
+                tesseract_engine.PytesseractEngine("eng", oem=0),
+                tesseract_engine.PytesseractEngine("eng"),
+            )
+        ]
+        self.assertEqual(len(set(keys[:3])), 3)
+        self.assertEqual(keys[0], keys[3])
+
+    def main(self):
+        for test in (
+            self.test_memory_lru,
+            self.test_disk_tier,
+            self.test_disk_eviction,
+            self.test_result_key,
+            self.test_recognize,
+            self.test_cache_key_engine_settings,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    result_cache_tests = ResultCacheTest()
+    result_cache_tests.main()
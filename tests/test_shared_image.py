@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import multiprocessing
+import unittest
+import pytest
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+from mocr import TextRecognizer, tesseract_engine
+
+# shared memory was added in Python 3.8
+shared_memory = pytest.importorskip("multiprocessing.shared_memory")
+from mocr import shared_image  # noqa: E402
+
+
+class _SumEngine(object):
+    def image_to_string(self, image, psm=7, variables=None):
+        return "{0}x{1}:{2}".format(image.shape[0], image.shape[1], int(image.sum()))
+
+
+def _init_worker():
+    # runs in every worker process
+    tesseract_engine.get_engine = lambda engine="auto", lang="eng": _SumEngine()
+
+
+def _crash(*args):
+    os._exit(1)
+
+
+class SharedImageTest(unittest.TestCase):
+    def setUp(self):
+        self._image = np.arange(300 * 400 * 3, dtype=np.uint32).reshape(300, 400, 3)
+        self._image = (self._image % 251).astype(np.uint8)
+        self._regions = [(0, 0, 40, 20), (100, 50, 300, 90), (10, 200, 20, 290)]
+
+    def test_shared_image(self):
+        with shared_image.SharedImage(self._image) as shared:
+            name = shared.descriptor.name
+            np.testing.assert_array_equal(shared.array, self._image)
+            with mock.patch.object(
+                tesseract_engine, "get_engine", lambda engine, lang: _SumEngine()
+            ):
+                texts = shared_image.recognize_regions(
+                    shared.descriptor, self._regions, "auto", "eng", 7
+                )
+        self.assertEqual(
+            texts[0], _SumEngine().image_to_string(self._image[0:20, 0:40])
+        )
+        # the owner removed the segment
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    @pytest.mark.skipif(
+        multiprocessing.get_start_method() != "fork",
+        reason="workers patch the engine after forking",
+    )
+    def test_get_results_in_processes(self):
+        expected = TextRecognizer(None, None, engine=_SumEngine()).get_results(
+            self._regions, self._image, 1.0, 1.0
+        )
+        with ProcessPoolExecutor(max_workers=2, initializer=_init_worker) as executor:
+            text_recognizer = TextRecognizer(None, None, executor=executor)
+            results = text_recognizer.get_results(self._regions, self._image, 1.0, 1.0)
+            self.assertEqual(results, expected)
+            text_recognizer.max_regions = 1
+            results = text_recognizer.get_results(self._regions, self._image, 1.0, 1.0)
+            self.assertEqual(results.skipped, 2)
+            self.assertEqual(results[0][0], (100, 50, 300, 90))
+
+    def test_worker_crash(self):
+        created = []
+        original = shared_image.SharedImage.__init__
+
+        def remember(shared, image):
+            original(shared, image)
+            created.append(shared.descriptor.name)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            text_recognizer = TextRecognizer(None, None, executor=executor)
+            with mock.patch.object(shared_image, "recognize_regions", _crash):
+                with mock.patch.object(shared_image.SharedImage, "__init__", remember):
+                    with pytest.raises(Exception):
+                        text_recognizer.get_results(
+                            self._regions, self._image, 1.0, 1.0
+                        )
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=created[0])
+
+    def test_engine_instance_fails(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(ValueError):
+                TextRecognizer(None, None, engine=_SumEngine(), executor=executor)
+
+    def test_old_python_fails(self):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            with mock.patch.object(sys, "version_info", (3, 7, 9)):
+                with pytest.raises(ValueError):
+                    TextRecognizer(None, None, executor=executor)
+
+    def main(self):
+        self.setUp()
+        self.test_shared_image()
+        self.test_get_results_in_processes()
+        self.test_worker_crash()
+        self.test_engine_instance_fails()
+        self.test_old_python_fails()
+
+
+if __name__ == "__main__":
+    shared_image_tests = SharedImageTest()
+    shared_image_tests.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+import cv2
+
+from mocr import templates
+
+
+class _RecordingEngine(object):
+    def __init__(self):
+        self.calls = []
+
+    def image_to_string(self, image, psm=7, variables=None):
+        self.calls.append((image.shape, psm, variables))
+        return " field {}\n".format(len(self.calls))
+
+
+class TemplatesTest(unittest.TestCase):
+    def setUp(self):
+        self._uk_path = os.path.join("tests", "data/sample_uk_identity_card.png")
+        self._de_path = os.path.join("tests", "data/sample_de_identity_card.jpg")
+
+    def test_match_template(self):
+        self.assertIs(
+            templates.match_template(201, 312, (16, 97, 80, 80)),
+            templates.UK_IDENTITY_CARD,
+        )
+        self.assertIs(
+            templates.match_template(631, 1000, (78, 221, 284, 284)),
+            templates.DE_IDENTITY_CARD,
+        )
+        # a portrait card or a face elsewhere matches no layout
+        self.assertIsNone(templates.match_template(312, 201, (16, 97, 80, 80)))
+        self.assertIsNone(templates.match_template(201, 312, (200, 20, 80, 80)))
+
+    def test_field_boxes(self):
+        boxes = templates.field_boxes(templates.UK_IDENTITY_CARD, 201, 312)
+        self.assertEqual(len(boxes), len(templates.UK_IDENTITY_CARD.fields))
+        for (start_x, start_y, end_x, end_y) in boxes:
+            self.assertTrue(0 <= start_x < end_x <= 312)
+            self.assertTrue(0 <= start_y < end_y <= 201)
+
+    def test_extract_fields(self):
+        for (path, template) in (
+            (self._uk_path, templates.UK_IDENTITY_CARD),
+            (self._de_path, templates.DE_IDENTITY_CARD),
+        ):
+            engine = _RecordingEngine()
+            card_fields = templates.extract_fields(path, engine=engine)
+            self.assertEqual(card_fields.template, template.name)
+            self.assertEqual(
+                list(card_fields.fields), [field.name for field in template.fields]
+            )
+            self.assertEqual(card_fields.fields[template.fields[0].name], "field 1")
+            # every field is recognized once on the grayscale card with its
+            # own settings
+            self.assertEqual(
+                [(psm, variables) for (_, psm, variables) in engine.calls],
+                [(field.psm, field.variables) for field in template.fields],
+            )
+            self.assertTrue(all(len(shape) == 2 for (shape, _, _) in engine.calls))
+
+        card_fields = templates.extract_fields(
+            cv2.imread(self._uk_path), engine=_RecordingEngine(), max_workers=2
+        )
+        self.assertEqual(card_fields.fields["sex"], "field 4")
+        self.assertEqual(card_fields.face_box, (16, 97, 80, 80))
+
+    def test_name_whitelists(self):
+        # double barrelled names, O'Brien and several given names are kept
+        for template in templates.TEMPLATES:
+            fields = {field.name: field for field in template.fields}
+            for name in ("surname", "given_names", "place_of_birth"):
+                whitelist = fields[name].variables["tessedit_char_whitelist"]
+                self.assertTrue(set("-' ").issubset(whitelist))
+
+    def test_extract_fields_without_template(self):
+        engine = _RecordingEngine()
+        image = cv2.imread(self._uk_path)
+        self.assertIsNone(
+            templates.extract_fields(image, face_box=(200, 20, 80, 80), engine=engine)
+        )
+        self.assertIsNone(templates.extract_fields("unavailable.png", engine=engine))
+        self.assertEqual(engine.calls, [])
+
+    def main(self):
+        self.setUp()
+        self.test_match_template()
+        self.test_field_boxes()
+        self.test_extract_fields()
+        self.test_extract_fields_without_template()
+        self.test_name_whitelists()
+
+
+if __name__ == "__main__":
+    templates_tests = TemplatesTest()
+    templates_tests.main()
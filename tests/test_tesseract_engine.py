@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shlex
+import unittest
+import pytest
+
+from unittest import mock
+from mocr import tesseract_engine
+
+
+class TesseractEngineTest(unittest.TestCase):
+    def test_pytesseract_config(self):
+        engine = tesseract_engine.PytesseractEngine("deu")
+        self.assertEqual(engine.config(7), "-l deu --oem 1 --psm 7")
+        self.assertEqual(
+            engine.config(6, {"tessedit_char_whitelist": "0123456789"}),
+            "-l deu --oem 1 --psm 6 -c tessedit_char_whitelist=0123456789",
+        )
+        config = engine.config(7, {"tessedit_char_whitelist": "AB-' "})
+        self.assertEqual(shlex.split(config)[-1], "tessedit_char_whitelist=AB-' ")
+
+    def test_capi_engine_fails(self):
+        with self.assertRaises(OSError):
+            tesseract_engine.CAPIEngine(library="/unavailable/libtesseract.so")
+
+    def test_get_engine(self):
+        engine = tesseract_engine.get_engine("pytesseract", "eng")
+        self.assertIsInstance(engine, tesseract_engine.PytesseractEngine)
+        self.assertIs(engine, tesseract_engine.get_engine("pytesseract", "eng"))
+        self.assertIsNot(engine, tesseract_engine.get_engine("pytesseract", "deu"))
+        with self.assertRaises(ValueError):
+            tesseract_engine.get_engine("unavailable")
+
+    def test_get_engine_auto_fallback(self):
+        with mock.patch.dict(tesseract_engine._engines, clear=True), mock.patch.object(
+            tesseract_engine, "_load_library", side_effect=OSError
+        ):
+            engine = tesseract_engine.get_engine("auto", "eng")
+        self.assertIsInstance(engine, tesseract_engine.PytesseractEngine)
+
+    def test_limit_threads(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertTrue(tesseract_engine.limit_threads())
+            self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "1")
+        # the limit is read when libtesseract is loaded
+        with mock.patch.dict(os.environ, clear=True), mock.patch.object(
+            tesseract_engine, "_loaded_thread_limit", ""
+        ):
+            self.assertFalse(tesseract_engine.limit_threads())
+        with mock.patch.dict(os.environ, {"OMP_THREAD_LIMIT": "2"}), mock.patch.object(
+            tesseract_engine, "_loaded_thread_limit", "2"
+        ):
+            self.assertTrue(tesseract_engine.limit_threads())
+            self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "2")
+
+    def main(self):
+        self.test_pytesseract_config()
+        self.test_capi_engine_fails()
+        self.test_get_engine()
+        self.test_get_engine_auto_fallback()
+        self.test_limit_threads()
+
+
+if __name__ == "__main__":
+    tesseract_engine_tests = TesseractEngineTest()
+    tesseract_engine_tests.main()
@@ -2,9 +2,131 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
 import unittest
 import pytest
-from mocr import TextRecognizer
+import cv2
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from mocr import TextRecognizer, instrumentation, text_recognition
+from fakes import FakeNet, patch_model
+
+
+class _FakeEngine(object):
+    def __init__(self):
+        self.shapes = []
+
+    def image_to_string(self, image, psm=7, variables=None):
+        self.shapes.append(image.shape[:2])
+        return str(len(self.shapes))
+
+
+class _ShapeEngine(object):
+    def image_to_string(self, image, psm=7, variables=None):
+        time.sleep(0.001 * (image.shape[1] % 7))
+        return str.format("{0}x{1}", *image.shape[:2])
+
+
+class _SlowEngine(object):
+    def image_to_string(self, image, psm=7, variables=None):
+        # only the widest region in the tests is recognized quickly
+        if image.shape[1] < 100:
+            time.sleep(0.5)
+        return "WIDE" if image.shape[1] >= 100 else "NARROW"
+
+
+class _FakeNet(object):
+    def __init__(self):
+        self.batches = []
+
+    def setInput(self, blob):
+        self._blob = blob
+
+    def forward(self, layer_names):
+        (batch, _, height, width) = self._blob.shape
+        self.batches.append(batch)
+        means = self._blob.mean(axis=(1, 2, 3)).reshape(batch, 1, 1, 1)
+        scores = np.ones((batch, 1, height // 4, width // 4), np.float32) * means
+        geometry = np.ones((batch, 5, height // 4, width // 4), np.float32) * means
+        return (scores, geometry)
+
+
+class _DotNet(FakeNet):
+    """Predicts one 20x8 box around the darkest pixel of a non-uniform input."""
+
+    def predict(self, blob):
+        intensity = blob[0].sum(axis=0)
+        (y, x) = np.unravel_index(np.argmin(intensity), intensity.shape)
+        if intensity[y, x] == intensity.max():
+            return []
+        return [((y // 4, x // 4), 0.9, (4, 10, 4, 10))]
+
+
+class _EdgeNet(FakeNet):
+    """Predicts a 4x8 box on the fifth cell and one on the last column."""
+
+    def predict(self, blob):
+        width = blob.shape[3]
+        return [((5, x), 0.9, (4, 2, 4, 2)) for x in (5, width // 4 - 1)]
+
+
+def _loop_decode_predictions(scores, geometry, min_confidence):
+    # the loop decode_predictions had before it was vectorized, copied as it
+    # was with self.min_confidence given as an argument
+    (num_rows, num_cols) = scores.shape[2:4]
+    rects = []
+    confidences = []
+
+    # loop over the number of rows
+    for y in range(0, num_rows):
+        # extract the scores (probabilities), followed by the
+        # geometrical data used to derive potential bounding box
+        # coordinates that surround text
+        scores_data = scores[0, 0, y]
+        xdata0 = geometry[0, 0, y]
+        xdata1 = geometry[0, 1, y]
+        xdata2 = geometry[0, 2, y]
+        xdata3 = geometry[0, 3, y]
+        angles_data = geometry[0, 4, y]
+
+        # loop over the number of columns
+        for x in range(0, num_cols):
+            # if our score does not have sufficient probability,
+            # ignore it
+            if scores_data[x] < min_confidence:
+                continue
+
+            # compute the offset factor as our resulting feature
+            # maps will be 4x smaller than the input image
+            (offset_x, offset_y) = (x * 4.0, y * 4.0)
+
+            # extract the rotation angle for the prediction and
+            # then compute the sin and cosine
+            angle = angles_data[x]
+            cos = np.cos(angle)
+            sin = np.sin(angle)
+
+            # use the geometry volume to derive the width and height
+            # of the bounding box
+            h = xdata0[x] + xdata2[x]
+            w = xdata1[x] + xdata3[x]
+
+            # compute both the starting and ending (x, y)-coordinates
+            # for the text prediction bounding box
+            end_x = int(offset_x + (cos * xdata1[x]) + (sin * xdata2[x]))
+            end_y = int(offset_y - (sin * xdata1[x]) + (cos * xdata2[x]))
+            start_x = int(end_x - w)
+            start_y = int(end_y - h)
+
+            # add the bounding box coordinates and probability score
+            # to our respective lists
+            rects.append((start_x, start_y, end_x, end_y))
+            confidences.append(scores_data[x])
+
+    # return a tuple of the bounding boxes and associated confidences
+    return (rects, confidences)
 
 
 class TextRecognizerTest(unittest.TestCase):
@@ -23,6 +145,17 @@ class TextRecognizerTest(unittest.TestCase):
         self.assertEqual(original_height, 201)
         self.assertEqual(original_width, 312)
 
+    def test_load_image_in_memory(self):
+        with open(self._image_path, "rb") as image_file:
+            data = image_file.read()
+        text_recognizer = TextRecognizer(data, self._east_path)
+        (original, original_height, original_width) = text_recognizer.load_image()
+        self.assertEqual((original_height, original_width), (201, 312))
+        text_recognizer = TextRecognizer(original, self._east_path)
+        self.assertIs(text_recognizer.load_image()[0], original)
+        text_recognizer = TextRecognizer(original, self._east_path, copy=True)
+        self.assertIsNot(text_recognizer.load_image()[0], original)
+
     def test_resize_image(self):
         (image, _, _) = self._text_recognizer.load_image()
         (
@@ -49,6 +182,196 @@ class TextRecognizerTest(unittest.TestCase):
         self.assertIsNotNone(scores)
         self.assertIsNotNone(geometry)
 
+    def test_detect_batch(self):
+        net = _FakeNet()
+        text_recognizer = TextRecognizer(None, __file__, width=64, height=32)
+        images = [
+            np.full((100, 200, 3), 10, np.uint8),
+            None,
+            np.full((50, 40, 3), 200, np.uint8),
+            np.full((64, 64, 3), 90, np.uint8),
+        ]
+        with patch_model(net):
+            detections = text_recognizer.detect_batch(images, batch_size=2)
+            (single_scores, _) = text_recognizer.geometry_score(
+                __file__, cv2.resize(images[2], (64, 32))
+            )
+        self.assertEqual(net.batches, [2, 1, 1])
+        self.assertEqual(len(detections), 4)
+        self.assertEqual(detections[1], (None, None, 0, 0))
+        (scores, geometry, ratio_height, ratio_width) = detections[2]
+        self.assertEqual(scores.shape, (1, 1, 8, 16))
+        self.assertEqual(geometry.shape, (1, 5, 8, 16))
+        self.assertEqual((ratio_height, ratio_width), (50 / 32.0, 40 / 64.0))
+        np.testing.assert_allclose(scores, single_scores)
+        self.assertNotEqual(detections[0][0][0, 0, 0, 0], scores[0, 0, 0, 0])
+
+    def test_fit_input_size(self):
+        self.assertEqual(
+            text_recognition.fit_input_size(201, 312, 320 * 320), (320, 192)
+        )
+        for (height, width) in ((2000, 3000), (4961, 3508), (100, 4000)):
+            (new_width, new_height) = text_recognition.fit_input_size(
+                height, width, 640 * 640
+            )
+            self.assertEqual((new_width % 32, new_height % 32), (0, 0))
+            self.assertLessEqual(new_width * new_height, 640 * 640)
+            aspect = (new_width / float(new_height)) / (width / float(height))
+            self.assertAlmostEqual(aspect, 1.0, delta=0.1)
+        text_recognizer = TextRecognizer(None, None, max_pixels=640 * 640)
+        self.assertEqual(
+            text_recognizer.input_size(np.zeros((2000, 3000, 3), np.uint8)), (768, 512)
+        )
+
+    def test_detect_tiled(self):
+        tracer = instrumentation.RecordingTracer()
+        net = _DotNet()
+        image = np.full((200, 300, 3), 255, np.uint8)
+        image[100, 150] = 0
+        text_recognizer = TextRecognizer(
+            None, __file__, tile_size=128, tile_overlap=64, tracer=tracer
+        )
+        with patch_model(net):
+            (boxes, ratio_height, ratio_width) = text_recognizer.detect(image)
+        # the dot lies on several overlapping tiles, their boxes are merged
+        self.assertEqual(boxes.tolist(), [[138, 96, 158, 104]])
+        self.assertEqual((ratio_height, ratio_width), (1.0, 1.0))
+        self.assertEqual(tracer.counters["tiles"], 3 * 4)
+        self.assertEqual(tracer.counters["boxes"], 1)
+
+    def test_detect_boxes(self):
+        net = _DotNet()
+        image = np.full((200, 300, 3), 255, np.uint8)
+        image[100, 150] = 0
+        text_recognizer = TextRecognizer(None, __file__, tile_size=128, tile_overlap=64)
+        with patch_model(net):
+            detection = text_recognizer.detect_boxes(image)
+        # the confidences come with the boxes they belong to
+        self.assertEqual(detection.boxes.tolist(), [[138, 96, 158, 104]])
+        self.assertEqual(len(detection.confidences), 1)
+        self.assertEqual((detection.ratio_height, detection.ratio_width), (1.0, 1.0))
+
+    def test_detect_tiled_padded_border(self):
+        net = _EdgeNet()
+        image = np.full((200, 100, 3), 255, np.uint8)
+        text_recognizer = TextRecognizer(None, __file__, tile_size=128, tile_overlap=64)
+        with patch_model(net):
+            boxes = text_recognizer.detect_tiled(image)
+        # the tiles are padded from 100 to 128 pixels, the boxes on the
+        # padding are dropped and one box of every tile is left
+        self.assertEqual(len(boxes), 3)
+        self.assertTrue((boxes[:, 0] < 100).all())
+
+    def test_group_lines(self):
+        boxes = [
+            (120, 12, 180, 30),
+            (10, 10, 60, 30),
+            (70, 8, 110, 28),
+            (10, 50, 80, 70),
+            (300, 10, 340, 30),
+        ]
+        # the last word on the first row is too far away to join the line
+        self.assertEqual(
+            text_recognition.group_lines(boxes),
+            [(10, 8, 180, 30), (10, 50, 80, 70), (300, 10, 340, 30)],
+        )
+        self.assertEqual(len(text_recognition.group_lines(boxes, max_gap=10.0)), 2)
+        self.assertEqual(text_recognition.group_lines([]), [])
+
+    def test_get_results_merge_lines(self):
+        engine = _FakeEngine()
+        text_recognizer = TextRecognizer(
+            None, None, engine=engine, merge_lines=True, padding=0.1
+        )
+        image = np.full((100, 400, 3), 255, np.uint8)
+        boxes = [(70, 8, 110, 28), (10, 10, 60, 30), (10, 50, 80, 70)]
+        results = text_recognizer.get_results(boxes, image, 1.0, 1.0)
+        self.assertEqual(len(engine.shapes), 2)
+        self.assertEqual([region for (region, _) in results][0][:2], (0, 6))
+
+    def test_get_results_max_regions(self):
+        engine = _FakeEngine()
+        text_recognizer = TextRecognizer(None, None, engine=engine, max_regions=2)
+        image = np.full((100, 400, 3), 255, np.uint8)
+        boxes = [(10, 60, 60, 80), (10, 10, 200, 30), (10, 35, 60, 55)]
+        results = text_recognizer.get_results(
+            boxes, image, 1.0, 1.0, confidences=[0.9, 0.6, 0.5]
+        )
+        # the wide box and the more confident of the small ones, top to bottom
+        self.assertEqual(
+            [region for (region, _) in results], [(10, 10, 200, 30), (10, 60, 60, 80)]
+        )
+        self.assertEqual(results.skipped, 1)
+        self.assertFalse(results.complete)
+        text_recognizer.max_regions = None
+        self.assertTrue(text_recognizer.get_results(boxes, image, 1.0, 1.0).complete)
+        # regions on the same row keep the order they were detected in
+        text_recognizer.max_regions = 2
+        boxes = [(10, 10, 40, 30), (100, 10, 300, 30)]
+        results = text_recognizer.get_results(boxes, image, 1.0, 1.0)
+        self.assertEqual([region for (region, _) in results], boxes)
+
+    def test_get_results_deadline(self):
+        image = np.full((100, 400, 3), 255, np.uint8)
+        boxes = [(10, 60, 60, 80), (10, 10, 200, 30), (10, 35, 60, 55)]
+        text_recognizer = TextRecognizer(None, None, engine=_FakeEngine(), deadline=0)
+        results = text_recognizer.get_results(boxes, image, 1.0, 1.0)
+        self.assertEqual((len(results), results.skipped), (0, 3))
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            text_recognizer = TextRecognizer(
+                None, None, engine=_SlowEngine(), executor=executor, deadline=0.2
+            )
+            started = time.monotonic()
+            results = text_recognizer.get_results(boxes, image, 1.0, 1.0)
+            self.assertLess(time.monotonic() - started, 0.45)
+        self.assertEqual(results, [((10, 10, 200, 30), "WIDE")])
+        self.assertEqual(results.skipped, 2)
+
+    def test_tracer(self):
+        tracer = instrumentation.RecordingTracer()
+        net = _FakeNet()
+        text_recognizer = TextRecognizer(
+            self._image_path,
+            __file__,
+            min_confidence=0.0,
+            engine=_FakeEngine(),
+            tracer=tracer,
+        )
+        (image, _, _) = text_recognizer.load_image()
+        (resized_image, ratio_height, ratio_width, _, _) = text_recognizer.resize_image(
+            image, 320, 320
+        )
+        with patch_model(net):
+            (scores, geometry) = text_recognizer.geometry_score(__file__, resized_image)
+        boxes = text_recognizer.boxes(scores, geometry)
+        results = text_recognizer.get_results(boxes, image, ratio_height, ratio_width)
+        self.assertEqual(
+            set(tracer.timings),
+            {
+                "load_image",
+                "resize_image",
+                "model_load",
+                "forward",
+                "decode_predictions",
+                "nms",
+                "ocr",
+                "get_results",
+            },
+        )
+        self.assertEqual(tracer.counters["candidates"], 80 * 80)
+        self.assertEqual(tracer.counters["boxes"], len(boxes))
+        self.assertEqual(tracer.counters["regions"], len(results))
+        self.assertEqual(len(tracer.timings["ocr"]), len(results))
+
+    def test_detect_batch_fail(self):
+        text_recognizer = TextRecognizer(None, self._east_path)
+        self.assertIsNone(
+            text_recognizer.detect_batch(
+                [], os.path.join("tests", "model/unavailable.pb")
+            )
+        )
+
     def test_geometry_score_fail(self):
         image_path = os.path.join("tests", "data/sample_uk_identity_card.png")
         east_path = os.path.join("tests", "model/unavailable.pb")
@@ -73,6 +396,40 @@ class TextRecognizerTest(unittest.TestCase):
         self.assertIsNotNone(rects)
         self.assertIsNotNone(confidences)
 
+    def test_decode_predictions_matches_loop(self):
+        random = np.random.RandomState(7)
+        scores = random.rand(1, 1, 80, 80).astype(np.float32)
+        geometry = np.concatenate(
+            [
+                random.rand(1, 4, 80, 80).astype(np.float32) * 60.0,
+                (random.rand(1, 1, 80, 80).astype(np.float32) - 0.5) * 1.5,
+            ],
+            axis=1,
+        )
+        (rects, confidences) = self._text_recognizer.decode_predictions(
+            scores, geometry
+        )
+        (expected_rects, expected_confidences) = _loop_decode_predictions(
+            scores, geometry, self._text_recognizer.min_confidence
+        )
+        self.assertIsInstance(rects, np.ndarray)
+        self.assertEqual(rects.shape, (len(expected_rects), 4))
+        self.assertTrue(rects.flags["C_CONTIGUOUS"])
+        # float precision of the arithmetic depends on the numpy version, a
+        # coordinate may be truncated to the neighbouring pixel
+        np.testing.assert_allclose(rects, np.array(expected_rects), rtol=0, atol=1)
+        np.testing.assert_array_equal(confidences, np.array(expected_confidences))
+
+    def test_decode_predictions_empty(self):
+        scores = np.zeros((1, 1, 80, 80), dtype=np.float32)
+        geometry = np.zeros((1, 5, 80, 80), dtype=np.float32)
+        (rects, confidences) = self._text_recognizer.decode_predictions(
+            scores, geometry
+        )
+        self.assertEqual(rects.shape, (0, 4))
+        self.assertEqual(confidences.shape, (0,))
+        self.assertEqual(len(self._text_recognizer.boxes(scores, geometry)), 0)
+
     def test_boxes(self):
         (image, _, _) = self._text_recognizer.load_image()
         (resized_image, _, _, _, _) = self._text_recognizer.resize_image(
@@ -102,6 +459,43 @@ class TextRecognizerTest(unittest.TestCase):
         )
         self.assertIsNotNone(results)
 
+    def test_get_results_with_engine(self):
+        engine = _FakeEngine()
+        text_recognizer = TextRecognizer(
+            self._image_path, self._east_path, engine=engine
+        )
+        self.assertIs(text_recognizer.get_engine(), engine)
+        (image, _, _) = text_recognizer.load_image()
+        boxes = np.array([[10, 100, 60, 120], [10, 20, 90, 40]])
+        results = text_recognizer.get_results(boxes, image, 0.5, 2.0)
+        self.assertEqual(engine.shapes, [(10, 100), (10, 160)])
+        self.assertEqual(results, [((20, 10, 180, 20), "2"), ((20, 50, 120, 60), "1")])
+
+    def test_get_results_parallel(self):
+        (image, _, _) = self._text_recognizer.load_image()
+        random = np.random.RandomState(3)
+        starts = random.randint(0, 150, size=(40, 2))
+        sizes = random.randint(5, 60, size=(40, 2))
+        boxes = np.hstack([starts, starts + sizes])
+        serial = TextRecognizer(
+            self._image_path, self._east_path, engine=_ShapeEngine()
+        )
+        expected = serial.get_results(boxes, image, 1.0, 1.0)
+        with mock.patch.dict(os.environ, clear=True):
+            parallel = TextRecognizer(
+                self._image_path, self._east_path, engine=_ShapeEngine(), max_workers=4
+            )
+            self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "1")
+        self.assertEqual(parallel.get_results(boxes, image, 1.0, 1.0), expected)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            pooled = TextRecognizer(
+                self._image_path,
+                self._east_path,
+                engine=_ShapeEngine(),
+                executor=executor,
+            )
+            self.assertEqual(pooled.get_results(boxes, image, 1.0, 1.0), expected)
+
     def test_de_get_results(self):
         image_path = os.path.join("tests", "data/sample_de_identity_card.jpg")
         text_recognizer = TextRecognizer(image_path, self._east_path, lang="deu")
@@ -138,12 +532,27 @@ class TextRecognizerTest(unittest.TestCase):
         self.setUp()
         self.test_init()
         self.test_load_image()
+        self.test_load_image_in_memory()
         self.test_resize_image()
         self.test_geometry_score()
+        self.test_detect_batch()
+        self.test_detect_batch_fail()
+        self.test_fit_input_size()
+        self.test_detect_tiled()
+        self.test_detect_tiled_padded_border()
+        self.test_group_lines()
+        self.test_get_results_merge_lines()
+        self.test_get_results_max_regions()
+        self.test_get_results_deadline()
+        self.test_tracer()
         self.test_geometry_score_fail()
         self.test_decode_predictions()
+        self.test_decode_predictions_matches_loop()
+        self.test_decode_predictions_empty()
         self.test_boxes()
         self.test_get_results()
+        self.test_get_results_with_engine()
+        self.test_get_results_parallel()
         self.test_de_get_results()
         self.test_get_results_fail()
 
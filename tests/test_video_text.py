@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+import pytest
+import cv2
+import numpy as np
+
+from mocr import video_text
+from fakes import FakeEngine, FakeNet, patch_model
+
+
+class _DarkPixelNet(FakeNet):
+    """Predicts one box around the dark pixels of the input."""
+
+    def predict(self, blob):
+        (ys, xs) = np.nonzero(blob[0].mean(axis=0) < 0)
+        if len(xs) == 0:
+            return []
+        (start_x, start_y, end_x, end_y) = (xs.min(), ys.min(), xs.max(), ys.max())
+        (x, y) = ((start_x + end_x) // 8, (start_y + end_y) // 8)
+        distances = (y * 4 - start_y, end_x - x * 4, end_y - y * 4, x * 4 - start_x)
+        return [((y, x), 0.9, distances)]
+
+
+def _frames(count=30, changed_from=20):
+    frames = []
+    for index in range(count):
+        frame = np.full((320, 320, 3), 255, np.uint8)
+        text = "HELLO" if index < changed_from else "WORLD"
+        # the card moves one pixel to the right on every frame
+        cv2.putText(
+            frame, text, (60 + index, 160), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3
+        )
+        frames.append(frame)
+    return frames
+
+
+class VideoTextTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._net = _DarkPixelNet()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_recognize(self):
+        engine = FakeEngine("reading {call}\n")
+        recognizer = video_text.VideoTextRecognizer(
+            __file__, keyframe_interval=10, engine=engine, padding=0.1
+        )
+        with patch_model(self._net):
+            results = recognizer.recognize(_frames())
+        # the detector runs on keyframes only and the region is recognized
+        # again only when its text changed
+        self.assertEqual(self._net.calls, 3)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(engine.calls, 2)
+        self.assertEqual(results[0].readings, {"reading 1": 20, "reading 2": 10})
+        self.assertEqual(results[0].text, "reading 1")
+        self.assertEqual(results[0].frames, 30)
+
+    def test_recognize_follows_motion(self):
+        recognizer = video_text.VideoTextRecognizer(
+            __file__, keyframe_interval=100, engine=FakeEngine("reading {call}\n")
+        )
+        with patch_model(self._net):
+            first = recognizer.recognize(_frames(count=1))
+            last = recognizer.recognize(_frames(count=25, changed_from=25))
+        self.assertEqual(self._net.calls, 2)
+        self.assertAlmostEqual(last[0].box[0] - first[0].box[0], 24, delta=2)
+        self.assertAlmostEqual(last[0].box[2] - first[0].box[2], 24, delta=2)
+
+    def test_follow_without_points(self):
+        recognizer = video_text.VideoTextRecognizer(__file__)
+        gray = np.full((64, 64), 255, np.uint8)
+        plain = video_text._Track(np.array([8.0, 8.0, 40.0, 24.0]))
+        plain.points = np.zeros((2, 1, 2), np.float32)
+        # a plain region can not be followed and brings the next keyframe
+        self.assertTrue(recognizer._follow(gray, gray, [plain]))
+        plain.points = None
+        self.assertTrue(recognizer._follow(gray, gray, [plain]))
+        plain.active = False
+        self.assertFalse(recognizer._follow(gray, gray, [plain]))
+
+    def test_recognize_video_file(self):
+        video_path = os.path.join(self._directory, "card.avi")
+        writer = cv2.VideoWriter(
+            video_path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 320)
+        )
+        for frame in _frames():
+            writer.write(frame)
+        writer.release()
+
+        recognizer = video_text.VideoTextRecognizer(
+            __file__,
+            frame_stride=2,
+            max_frames=12,
+            engine=FakeEngine("reading {call}\n"),
+        )
+        with patch_model(self._net):
+            results = recognizer.recognize(video_path)
+        self.assertEqual(self._net.calls, 2)
+        self.assertEqual(results[0].frames, 12)
+        self.assertEqual(results[0].text, "reading 1")
+
+    def test_recognize_fails(self):
+        recognizer = video_text.VideoTextRecognizer(__file__)
+        self.assertIsNone(
+            recognizer.recognize(os.path.join(self._directory, "unavailable.mp4"))
+        )
+        with pytest.raises(ValueError):
+            video_text.VideoTextRecognizer(__file__, keyframe_interval=0)
+
+    def main(self):
+        for test in (
+            self.test_recognize,
+            self.test_recognize_follows_motion,
+            self.test_follow_without_points,
+            self.test_recognize_video_file,
+            self.test_recognize_fails,
+        ):
+            self.setUp()
+            test()
+            self.tearDown()
+
+
+if __name__ == "__main__":
+    video_text_tests = VideoTextTest()
+    video_text_tests.main()